@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 try:  # Support both `voice_mvp` package and flat module execution
@@ -8,8 +9,11 @@ except ModuleNotFoundError:  # pragma: no cover
     from fastapi_app.menus import MenuCatalog
 
 from .core import VoiceOrderAgent
-from .memory import Memory
+from .memory import Memory, SqliteSessionBackend
 from .llm_openai import AzureLLM
+from .tracing import get_logger
+
+log = get_logger("agent")
 
 
 def build_agent() -> VoiceOrderAgent:
@@ -17,12 +21,14 @@ def build_agent() -> VoiceOrderAgent:
     data_path = Path(__file__).resolve().parent.parent / "data" / "oxoban_menu.json"
     catalog.bootstrap_from_file(data_path)
 
-    memory = Memory()
+    # 세션을 재시작/워커 간에 공유하려면 sqlite 경로 지정 (예: data/sessions.sqlite3)
+    session_db = (os.getenv("AGENT_SESSION_DB") or "").strip()
+    memory = Memory(backend=SqliteSessionBackend(Path(session_db)) if session_db else None)
     llm = AzureLLM()
     try:
         # Lightweight diagnostics to help spot misconfiguration in dev
-        print(
-            "[Agent] Azure LLM configured:",
+        log.info(
+            "Azure LLM configured: %s",
             {
                 "available": llm.available,
                 "endpoint": getattr(llm, "endpoint", None),
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import contextvars
+import functools
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+# 한 턴(세션 락 획득 → 최종 답)에 쓸 수 있는 시간. LLM/도구/HTTP 모두 남은 시간 안에서만 기다린다
+TURN_BUDGET_S = float(os.getenv("AGENT_TURN_BUDGET", "8"))
+# LLM 한 번 더 부르려면 최소한 이만큼은 남아 있어야 함 (도구 실행 시간에서도 미리 떼어 둠)
+LLM_ROUND_RESERVE_S = float(os.getenv("AGENT_LLM_RESERVE", "2"))
+
+DEADLINE_ERROR = "turn budget exhausted"
+
+_DEADLINE: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar("voice_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """Run the block with a deadline ``seconds`` from now (``time.monotonic`` based).
+
+    Nested deadlines can only shorten the enclosing one; ``None`` keeps it.
+    """
+    outer = _DEADLINE.get()
+    at = outer if seconds is None else time.monotonic() + max(0.0, seconds)
+    if outer is not None and at is not None:
+        at = min(at, outer)
+    token = _DEADLINE.set(at)
+    try:
+        yield at
+    finally:
+        try:
+            _DEADLINE.reset(token)
+        except ValueError:
+            pass  # 스트리밍 async generator가 다른 컨텍스트에서 닫힐 때
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or ``None`` when there is none."""
+    at = _DEADLINE.get()
+    return None if at is None else max(0.0, at - time.monotonic())
+
+
+def expired(margin: float = 0.0) -> bool:
+    """True when no more than ``margin`` seconds are left."""
+    left = remaining()
+    return left is not None and left <= margin
+
+
+def clamp(timeout: float, reserve: float = 0.0) -> float:
+    """``timeout`` shortened to what is left, keeping ``reserve`` seconds for later steps."""
+    left = remaining()
+    return timeout if left is None else max(0.0, min(timeout, left - reserve))
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Carry the caller's context (deadline, trace) into an executor thread."""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+__all__ = [
+    "TURN_BUDGET_S",
+    "LLM_ROUND_RESERVE_S",
+    "DEADLINE_ERROR",
+    "deadline",
+    "remaining",
+    "expired",
+    "clamp",
+    "bind",
+]
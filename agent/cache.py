@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import RLock
+from typing import Any, Callable, Dict, Hashable, Optional, Protocol, Tuple
+
+_MISSING = object()
+
+
+class CacheBackend(Protocol):
+    """Second-tier storage consulted by :class:`TTLCache` on a memory miss."""
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]: ...
+
+    def set(self, key: str, value: Any, expires_at: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class SqliteCacheBackend:
+    """Tiny sqlite key/value table so scraped results survive restarts.
+
+    Values are stored as JSON, so tuples come back as lists. Expired rows are
+    deleted by the first write after every ``purge_interval`` seconds.
+    """
+
+    def __init__(self, path: Path, table: str = "cache", purge_interval: float = 300.0) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._table = table
+        self._purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._lock = RLock()
+        self._conn = sqlite3.connect(str(self._path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        try:
+            return float(row[1]), json.loads(row[0])
+        except Exception:
+            return None
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at),
+            )
+            now = time.time()
+            if now >= self._next_purge:
+                # 만료된 행은 읽을 때 무시될 뿐이라 따로 지우지 않으면 파일이 계속 커진다
+                self._conn.execute(f"DELETE FROM {self._table} WHERE expires_at < ?", (now,))
+                self._next_purge = now + self._purge_interval
+            self._conn.commit()
+
+    def purge(self) -> int:
+        """Delete expired rows now; returns how many were removed."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(f"DELETE FROM {self._table} WHERE expires_at < ?", (now,))
+            self._conn.commit()
+            self._next_purge = now + self._purge_interval
+        return cur.rowcount
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry TTL and an optional persistent backend.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 600.0,
+        *,
+        backend: Optional[CacheBackend] = None,
+        name: str = "cache",
+    ) -> None:
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.name = name
+        self._backend = backend
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.backend_errors = 0
+
+    # ------------------------------------------------------------------
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._data[key]
+        if self._backend is not None:
+            try:
+                stored = self._backend.get(_backend_key(key))
+            except Exception:
+                # 잠기거나 깨진 sqlite 파일은 캐시 miss로 취급 (set과 같은 방침)
+                stored = None
+                with self._lock:
+                    self.backend_errors += 1
+            if stored is not None and stored[0] > now:
+                with self._lock:
+                    self._store(key, stored[1], stored[0])
+                    self.hits += 1
+                return stored[1]
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else float(ttl))
+        with self._lock:
+            self._store(key, value, expires_at)
+        if self._backend is not None:
+            try:
+                self._backend.set(_backend_key(key), value, expires_at)
+            except Exception:
+                with self._lock:
+                    self.backend_errors += 1
+
+    def get_or_set(
+        self,
+        key: Hashable,
+        factory: Callable[[], Any],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = factory()
+        self.set(key, value, ttl)
+        return value
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+        if self._backend is not None:
+            try:
+                self._backend.delete(_backend_key(key))
+            except Exception:
+                with self._lock:
+                    self.backend_errors += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "backend_errors": self.backend_errors,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    # ------------------------------------------------------------------
+    def _store(self, key: Hashable, value: Any, expires_at: float) -> None:
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+
+def _backend_key(key: Hashable) -> str:
+    if isinstance(key, str):
+        return key
+    return json.dumps(key, ensure_ascii=False, default=str)
+
+
+def normalize_key(text: Optional[str]) -> str:
+    """Collapse whitespace and case so equivalent queries share one cache slot."""
+    return " ".join(str(text or "").split()).lower()
+
+
+__all__ = ["CacheBackend", "SqliteCacheBackend", "TTLCache", "normalize_key"]
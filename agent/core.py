@@ -1,8 +1,16 @@
 # core.py
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
-from typing import Any, Dict, List, Optional, Tuple
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 try:
     from voice_mvp.backend import ConversationStage, MenuCatalog  # type: ignore[import-not-found]
@@ -10,8 +18,14 @@ except ModuleNotFoundError:
     from fastapi_app.state import ConversationStage  # type: ignore
     from fastapi_app.menus import MenuCatalog  # type: ignore
 
-from .prompt import default_prompt
+from .prompt import PromptBuilder, estimate_tokens
+from .streaming import SentenceSplitter, SpeakExtractor
+from .cache import TTLCache, normalize_key
 from .memory import Memory
+from .prefetch import Prefetcher
+from . import budget
+from .budget import DEADLINE_ERROR, LLM_ROUND_RESERVE_S, TURN_BUDGET_S
+from .tracing import SAMPLED, get_logger, tracer
 from . import tools as toolmod  # <-- docstring 기반 discover
 
 # 프론트가 이해하는 액션만 전달
@@ -28,6 +42,50 @@ UI_ACTION_WHITELIST = {
     "ORDER",
 }
 
+# 한 턴에 여러 도구 호출이 오면 병렬 실행 (동시 실행 수/도구별 시간 제한)
+#   웹/LLM을 부르는 도구(toolmod.NETWORK_TOOLS)는 따로 된 풀에서: 느린 수집이 몰려도 로컬 도구는 바로 돈다
+TOOL_TIMEOUT_S = float(os.getenv("AGENT_TOOL_TIMEOUT", "10"))
+_TOOL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("AGENT_TOOL_WORKERS", "8")),
+    thread_name_prefix="agent-tool",
+)
+_NETWORK_TOOL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("AGENT_NETWORK_TOOL_WORKERS", "16")),
+    thread_name_prefix="agent-net-tool",
+)
+
+log = get_logger("agent")
+
+
+def _traced_tool(name: str, func: Any, args: Dict[str, Any]) -> Any:
+    """Bind ``func(**args)`` for the tool executor, recording queue wait and run time.
+
+    Worker threads don't inherit the request context, so the caller's (trace,
+    turn deadline) is carried over explicitly. Tools bound their own waits by
+    that deadline, so a call abandoned at the window timeout frees its worker
+    soon after instead of running to completion.
+    """
+    submitted = time.perf_counter()
+
+    def run() -> Any:
+        started = time.perf_counter()
+        tracer.record("tool.queue_wait", started - submitted)
+        if budget.expired():
+            # 도구 창이 닫힌 뒤에야 차례가 온 호출은 돌리지 않고 워커를 바로 돌려준다
+            tracer.count("budget_skips_total", what="tool")
+            return {"error": f"tool timeout: {name}"}
+        try:
+            return func(**args)
+        finally:
+            tracer.record(f"tool.{name}", time.perf_counter() - started)
+
+    return budget.bind(run)
+
+
+def _tool_executor(name: str) -> ThreadPoolExecutor:
+    return _NETWORK_TOOL_EXECUTOR if name in toolmod.NETWORK_TOOLS else _TOOL_EXECUTOR
+
+
 def _strip_json_fence(text: str) -> str:
     """Return a JSON string.
 
@@ -54,6 +112,283 @@ def _strip_json_fence(text: str) -> str:
         return '{"speak":"%s","actions":[{"type":"CLARIFY"}]}' % speak.replace('"', '\\"')
 
 
+def _coerce_tool_calls(r: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Normalize different wrappers (our AzureLLM returns `tool_call`)
+    tc = r.get("tool_calls") or []
+    if not tc and r.get("tool_call"):
+        single = r["tool_call"] or {}
+        tc = [{
+            "id": single.get("id") or "tc1",
+            "type": "function",
+            "function": {
+                "name": single.get("name"),
+                "arguments": single.get("arguments"),
+            },
+        }]
+    if not tc and r.get("function_call"):
+        fc = r["function_call"]
+        tc = [{"id": "fc1", "type": "function", "function": fc}]
+    return tc
+
+
+# ─────────────────────────────────────────────────────────────
+# 규칙 기반 빠른 경로: 수량/확인/메뉴명만 말한 단순 턴은 LLM 없이 처리
+# ─────────────────────────────────────────────────────────────
+FAST_PATH_ENABLED = os.getenv("AGENT_FAST_PATH", "1") != "0"
+FAST_PATH_MIN_CONFIDENCE = 0.85
+
+# ─────────────────────────────────────────────────────────────
+# LLM 응답 캐시(선택): 같은 매장 prefix + 상태 블록 + 정규화된 발화면 지난 턴의 최종 답을 재사용
+#   탐색 단계에서만, 주문/장바구니/메모리 변경이 없는 답만 저장
+# ─────────────────────────────────────────────────────────────
+LLM_CACHE_ENABLED = os.getenv("AGENT_LLM_CACHE", "0") == "1"
+_LLM_CACHE = TTLCache(
+    maxsize=int(os.getenv("AGENT_LLM_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("AGENT_LLM_CACHE_TTL", "300")),
+    name="llm_response",
+)
+_CACHEABLE_STAGES = {
+    ConversationStage.NEED_STORE,
+    ConversationStage.INTRODUCED,
+    ConversationStage.AWAIT_RECOMMENDATION,
+    ConversationStage.AWAIT_MENU_CHOICE,
+}
+_CACHEABLE_ACTIONS = {"NAVIGATE", "SHOW_RECOMMENDATIONS", "SELECT_MENU_BY_NAME"}
+
+
+# (prompt prefix 해시, 상태 블록, 프로필+최근 대화 digest, 정규화된 발화)
+_CacheKey = Tuple[str, str, str, str]
+# 프롬프트에 싣는 최근 대화 수 (캐시 키도 같은 범위를 본다)
+_HISTORY_TURNS = 6
+# 1차 응답 뒤 도구 실행 + LLM 재호출을 몇 바퀴까지 허용할지
+_MAX_TOOL_ROUNDS = 6
+_CACHE_HIT_USAGE = {"llm_calls": 0, "response_cache": "hit"}
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the turn-level LLM response cache."""
+    return {"enabled": LLM_CACHE_ENABLED, **_LLM_CACHE.stats()}
+
+
+def _context_digest(session: Any) -> str:
+    """Hash of the whole profile (allergies, diseases, limits, ...) and the history sent to the LLM."""
+    payload = json.dumps(
+        [session.profile or {}, session.recent(_HISTORY_TURNS)], ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _cacheable_response(res: Dict[str, Any]) -> bool:
+    content = res.get("content")
+    if res.get("error") or not content or _coerce_tool_calls(res):
+        return False
+    try:
+        data = json.loads(_strip_json_fence(content))
+    except Exception:
+        return False
+    if not isinstance(data, dict) or not data.get("speak") or data.get("memory"):
+        return False
+    actions = data.get("actions") or []
+    return all(isinstance(a, dict) and str(a.get("type") or "").upper() in _CACHEABLE_ACTIONS for a in actions)
+
+_NUM_WORDS = {
+    "하나": 1, "한": 1, "둘": 2, "두": 2, "셋": 3, "세": 3, "석": 3, "넷": 4, "네": 4,
+    "다섯": 5, "여섯": 6, "일곱": 7, "여덟": 8, "아홉": 9, "열": 10,
+}
+_NUM_ALT = "|".join(sorted(_NUM_WORDS, key=len, reverse=True))
+# 발화는 공백을 모두 지운 형태로 본다 ("두 개요" → "두개요")
+_QTY_RE = re.compile(rf"(\d{{1,2}}|{_NUM_ALT})(?:개|잔|인분|그릇|봉지)")
+_BARE_QTY_RE = re.compile(r"^(\d{1,2}|하나|둘|셋|넷|다섯|여섯|일곱|여덟|아홉|열)(?:개|이요|요|만|만요)?$")
+_MORE_RE = re.compile(rf"(\d{{1,2}}|{_NUM_ALT})?(?:개|잔)?더(?:주세요|줘|요|할게요|추가)?$")
+_LESS_RE = re.compile(r"^(?:하나|한개|1개)(?:빼|덜|줄여)(?:주세요|줘요|줘|요)?$")
+# 수량만 고치는 말이 아닌데 빼기/더하기/세트/포장이 섞이면 메뉴 선택이 아니므로 LLM으로
+# ("빅맥 빼고", "콜라 하나 더 주세요", "빅맥 세트", "빅맥 하나 포장이요")
+_MODIFIER_RE = re.compile(r"빼|없이|말고|더(?:주|줘|요|$)|추가|랑|하고|세트|포장|매장")
+# 수량 패턴에 안 걸린 수 표현이 핵심어에 남으면 수량을 버리지 않도록 LLM으로
+_LEFTOVER_COUNT_RE = re.compile(r"하나|둘|셋|넷|다섯|여섯|일곱|여덟|아홉")
+# 확인/주문 발화는 짧은 전체 발화만 인정 ("네 콜라도 하나 주세요"처럼 뭔가 덧붙으면 LLM으로)
+_YES_WORD = r"(?:네|예|응|그래|좋아|좋습니다|맞아|맞습니다|그렇게|알겠습니다)(?:요|해요|해주세요|해줘|할게요)?"
+_ORDER_WORD = r"(?:주문|결제|계산)(?:할게|할께|해|하겠|할래|부탁)(?:요|습니다|해요|합니다|줘|주세요)?"
+_YES_RE = re.compile(rf"^(?:{_YES_WORD})+(?:{_ORDER_WORD})?$")
+_ORDER_RE = re.compile(rf"^(?:{_YES_WORD})*(?:그럼|이대로|그대로|이걸로)?{_ORDER_WORD}$")
+# 확인처럼 시작했거나 주문 말이 섞였지만 전체가 확인은 아닌 발화
+_CONFIRMISH_RE = re.compile(rf"^(?:{_YES_WORD})|(?:주문|결제|계산)")
+_BAIL_RE = re.compile(
+    r"(?:\?|아니|안돼|안할|말고|취소|잠깐|잠시만|바꿔|변경|뭐|무엇|어떤|어떻|추천|얼마|맛있|알레르기|맵|짜요|달아|칼로리|영양|리뷰|없어"
+    r"|근데|그런데|그리고|같이|추가)"
+)
+_TRAILING_QTY_RE = re.compile(r"(\d{1,2}|하나|둘|셋|넷|다섯|여섯|일곱|여덟|아홉|열)(?:개|이요|요|만|만요)?(?=(?:주세요|줘요|줘|요)?$)")
+_FILLER_RE = re.compile(
+    r"(?:으로|로|를|을|은|는|주세요|주시고|줘요|줘|할게요|할께요|할래요|먹을게요|시킬게요|부탁해요|부탁합니다|이요|요|만|좀|그럼|저는|나는)"
+)
+# 받침 판단용: 영문/숫자로 끝나는 메뉴명("후렌치 후라이 M")은 읽는 소리 기준
+_RO_AFTER_SOUND = set("MNmn0136")
+
+
+@dataclass
+class FastPathDecision:
+    intent: str
+    actions: List[Dict[str, Any]]
+    confidence: float
+    stage: Optional[ConversationStage] = None
+    reset_quantity: bool = False
+
+
+class FastPathRouter:
+    """Classify trivial turns (quantity, confirmation, bare menu name) locally.
+
+    Returns ``None`` whenever the utterance looks like anything more than that,
+    so the LLM keeps handling questions, negations and open requests.
+    """
+
+    def __init__(self, catalog: MenuCatalog) -> None:
+        self.catalog = catalog
+
+    def route(self, session: Any, text: str) -> Optional[FastPathDecision]:
+        compact = "".join((text or "").split()).rstrip(".!~")
+        if not compact or len(compact) > 30 or _BAIL_RE.search(compact):
+            return None
+        has_menu = bool(session.selected_menu)
+        awaiting_confirm = session.stage == ConversationStage.AWAIT_CONFIRMATION
+
+        if has_menu and _ORDER_RE.match(compact) or (awaiting_confirm and has_menu and _YES_RE.match(compact)):
+            if awaiting_confirm:
+                return FastPathDecision("confirm", [{"type": "ORDER"}], 0.95)
+            return FastPathDecision(
+                "confirm", [{"type": "READ_BACK_SUMMARY"}], 0.9, ConversationStage.AWAIT_CONFIRMATION
+            )
+        if _CONFIRMISH_RE.search(compact) and not (_parse_bare_count(compact) or _QTY_RE.match(compact)):
+            # "네 ○○도 주세요", "○○도 같이 주문할게요": 확인 + 추가 요청은 LLM이 판단
+            return None
+
+        if has_menu and _LESS_RE.match(compact):
+            return FastPathDecision(
+                "quantity", [{"type": "DECREMENT_QTY"}, {"type": "READ_BACK_SUMMARY"}], 0.9,
+                ConversationStage.AWAIT_CONFIRMATION,
+            )
+        more = _MORE_RE.search(compact) if has_menu else None
+        if more and more.start() == 0:
+            n = _parse_count(more.group(1)) if more.group(1) else 1
+            actions = (
+                [{"type": "INCREMENT_QTY"}] if n == 1
+                else [{"type": "SET_QTY", "value": int(session.quantity or 1) + n}]
+            )
+            return FastPathDecision(
+                "quantity", actions + [{"type": "READ_BACK_SUMMARY"}], 0.9, ConversationStage.AWAIT_CONFIRMATION
+            )
+        if _MODIFIER_RE.search(compact):
+            return None
+
+        bare = _parse_bare_count(compact)
+        if bare is not None:
+            if not has_menu:
+                return None
+            return FastPathDecision(
+                "quantity", [{"type": "SET_QTY", "value": bare}, {"type": "READ_BACK_SUMMARY"}], 0.92,
+                ConversationStage.AWAIT_CONFIRMATION,
+            )
+
+        qty_match = _QTY_RE.search(compact) or _TRAILING_QTY_RE.search(compact)
+        qty = _parse_count(qty_match.group(1)) if qty_match else None
+        rest = compact[:qty_match.start()] + compact[qty_match.end():] if qty_match else compact
+        core = _FILLER_RE.sub("", rest)
+
+        if core.endswith("도") or _LEFTOVER_COUNT_RE.search(core):
+            return None  # "콜라도 하나": 지금 메뉴를 바꾸는 게 아니라 더하는 요청
+        if not core:
+            if qty and has_menu:
+                return FastPathDecision(
+                    "quantity", [{"type": "SET_QTY", "value": qty}, {"type": "READ_BACK_SUMMARY"}], 0.92,
+                    ConversationStage.AWAIT_CONFIRMATION,
+                )
+            return None
+
+        candidates = self.catalog.match(session.store, core, limit=3)
+        if not candidates:
+            return None
+        top = candidates[0]
+        rivals = [c for c in candidates[1:] if c.item.name.replace(" ", "") not in top.item.name.replace(" ", "")]
+        margin = top.score - (rivals[0].score if rivals else 0.0)
+        confidence = top.score if margin >= 0.1 else top.score - 0.2
+        actions: List[Dict[str, Any]] = [{"type": "SELECT_MENU_BY_NAME", "name": top.item.name}]
+        if qty:
+            actions += [{"type": "SET_QTY", "value": qty}, {"type": "READ_BACK_SUMMARY"}]
+            return FastPathDecision("select", actions, confidence, ConversationStage.AWAIT_CONFIRMATION)
+        # 다른 메뉴로 바꾸면 이전 수량은 버리고 다시 묻는다
+        return FastPathDecision("select", actions, confidence, reset_quantity=top.item.name != session.selected_menu)
+
+
+def _parse_count(token: Optional[str]) -> Optional[int]:
+    if not token:
+        return None
+    if token.isdigit():
+        return max(1, min(int(token), 99))
+    return _NUM_WORDS.get(token)
+
+
+def _parse_bare_count(compact: str) -> Optional[int]:
+    m = _BARE_QTY_RE.match(compact)
+    return _parse_count(m.group(1)) if m else None
+
+
+def _won(amount: int) -> str:
+    """5500 → '5천 5백 원' (시니어 안내용으로 천천히 읽히는 표기)."""
+    amount = int(amount or 0)
+    man, rest = divmod(amount, 10000)
+    parts = []
+    if man:
+        parts.append(f"{man}만")
+    if rest // 1000:
+        parts.append(f"{rest // 1000}천")
+    if (rest % 1000) // 100:
+        parts.append(f"{(rest % 1000) // 100}백")
+    if rest % 100:
+        parts.append(str(rest % 100))
+    return (" ".join(parts) or "0") + " 원"
+
+
+def _with_ro(name: str) -> str:
+    """받침에 맞춰 '으로/로'를 붙인다."""
+    last = (name or " ").rstrip()[-1:] or " "
+    code = ord(last) - 0xAC00
+    if (0 <= code < 11172 and code % 28 not in (0, 8)) or last in _RO_AFTER_SOUND:
+        return f"{name}으로"
+    return f"{name}로"
+
+
+def _clarify_speak(clarify: Dict[str, Any]) -> str:
+    candidates = clarify.get("candidates") or []
+    if len(candidates) >= 2:
+        return f"{', '.join(candidates[:-1])}, {candidates[-1]} 중에서 어떤 메뉴를 말씀하신 건가요?"
+    if candidates:
+        return f"혹시 {candidates[0]} 말씀이세요?"
+    return "말씀하신 메뉴를 찾지 못했어요. 메뉴 이름을 한 번 더 말씀해 주세요."
+
+
+def _add_usage(totals: Dict[str, Any], msgs: List[Dict[str, Any]], res: Dict[str, Any]) -> None:
+    """Accumulate per-turn token usage; estimate when the wrapper gives none."""
+    u = res.get("usage") or {}
+    prompt = u.get("prompt_tokens")
+    if prompt is None:
+        prompt = sum(estimate_tokens(str(m.get("content") or "")) for m in msgs)
+        totals["estimated"] = True
+    totals["prompt_tokens"] = totals.get("prompt_tokens", 0) + int(prompt or 0)
+    totals["completion_tokens"] = totals.get("completion_tokens", 0) + int(u.get("completion_tokens") or 0)
+    totals["cached_tokens"] = totals.get("cached_tokens", 0) + int(u.get("cached_tokens") or 0)
+    totals["llm_calls"] = totals.get("llm_calls", 0) + 1
+
+
+@dataclass
+class _TurnLoop:
+    """State of one function-calling turn, shared by the sync, async and streaming loops."""
+
+    msgs: List[Dict[str, Any]]
+    key: Optional[_CacheKey]
+    usage: Dict[str, Any] = field(default_factory=dict)
+    rounds: int = 0
+    cut: Optional[str] = None
+
+
 class VoiceOrderAgent:
     """
     default_prompt + (docstring에서 추출된 도구 안내/스키마)를 사용.
@@ -74,6 +409,20 @@ class VoiceOrderAgent:
         toolmod.set_catalog(menu_catalog)
         self._tool_schemas, self._tool_map, self._tools_text = toolmod.discover_tools()
 
+        self.prompts = PromptBuilder(menu_catalog, self._tools_text, has_tools=bool(self._tool_schemas))
+        self.router = FastPathRouter(menu_catalog)
+        self._route_counts: Counter = Counter()
+        # 매장이 정해지면 추천 데이터(리뷰/집계/영양)를 백그라운드에서 미리 데움
+        self.prefetcher = Prefetcher([("reviews", toolmod.warm_store)], accept=self.catalog.has_menu)
+
+    def route_stats(self) -> Dict[str, int]:
+        """경로별 처리 건수 (fast:<intent> / llm / no_llm)."""
+        return dict(self._route_counts)
+
+    def _count_route(self, route: str) -> None:
+        self._route_counts[route] += 1
+        tracer.count("turns_total", route=route)
+
     # ------------------------------------------------------------------
     def handle(
         self,
@@ -84,8 +433,166 @@ class VoiceOrderAgent:
         selected_names: Optional[List[str]] = None,
         profile: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        session = self.memory.get_session(session_id)
+        waited = time.perf_counter()
+        # 턴 예산은 락을 잡은 뒤부터: 앞 턴을 기다린 시간이 LLM/도구 몫을 깎지 않도록
+        with self.memory.lock(session_id), budget.deadline(TURN_BUDGET_S):
+            tracer.record("session.lock_wait", time.perf_counter() - waited)
+            session, text = self._begin_turn(
+                self.memory.get_session(session_id), message,
+                store=store, selected_names=selected_names, profile=profile,
+            )
+            try:
+                return self._run_turn(session, text)
+            finally:
+                self.memory.save(session)
+
+    async def handle_async(
+        self,
+        session_id: str,
+        message: str,
+        *,
+        store: Optional[str] = None,
+        selected_names: Optional[List[str]] = None,
+        profile: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Non-blocking variant of :meth:`handle` for async routes.
+
+        LLM round-trips go through ``AzureLLM.achat`` and the (blocking) tools run
+        in worker threads, so the event loop stays free while a turn is in flight.
+        Turns of the same session are serialized; other sessions run in parallel.
+        """
+        waited = time.perf_counter()
+        async with self.memory.alock(session_id):
+            with budget.deadline(TURN_BUDGET_S):
+                tracer.record("session.lock_wait", time.perf_counter() - waited)
+                session, text = self._begin_turn(
+                    await self._aload(session_id), message,
+                    store=store, selected_names=selected_names, profile=profile,
+                )
+                try:
+                    return await self._arun_turn(session, text)
+                finally:
+                    await self._asave(session)
+
+    async def handle_stream(
+        self,
+        session_id: str,
+        message: str,
+        *,
+        store: Optional[str] = None,
+        selected_names: Optional[List[str]] = None,
+        profile: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming variant of :meth:`handle_async` for SSE/WebSocket routes.
+
+        Yields ``speak`` events (``{"delta": ...}``) while the model is still
+        writing the JSON, a ``sentence`` event per complete sentence so TTS can
+        start on the first one, and a closing ``final`` event carrying the same
+        payload as :meth:`handle_async` (its ``reply`` is authoritative).
+        """
+        waited = time.perf_counter()
+        async with self.memory.alock(session_id):
+            with budget.deadline(TURN_BUDGET_S):
+                tracer.record("session.lock_wait", time.perf_counter() - waited)
+                session, text = self._begin_turn(
+                    await self._aload(session_id), message,
+                    store=store, selected_names=selected_names, profile=profile,
+                )
+                try:
+                    splitter = SentenceSplitter()
+                    streamed = False
+                    response = self._route_turn(session, text)
+                    if response is None:
+                        try:
+                            async for kind, payload in self._astream_loop(session, text):
+                                if kind == "final":
+                                    response = payload
+                                    break
+                                streamed = True
+                                yield {"event": "speak", "data": {"delta": payload}}
+                                for sentence in splitter.feed(payload):
+                                    yield {"event": "sentence", "data": {"text": sentence}}
+                        except Exception:
+                            response = self._failed_turn(session)
+                            streamed, splitter = False, SentenceSplitter()
+
+                    if not streamed:
+                        # 빠른 경로/대체 응답은 한 번에 완성되므로 그대로 흘려보냄
+                        reply = response.get("reply") or ""
+                        yield {"event": "speak", "data": {"delta": reply}}
+                        for sentence in splitter.feed(reply):
+                            yield {"event": "sentence", "data": {"text": sentence}}
+                    for sentence in splitter.flush():
+                        yield {"event": "sentence", "data": {"text": sentence}}
+                    yield {"event": "final", "data": response}
+                finally:
+                    await self._asave(session)
+
+    async def _aload(self, session_id: str) -> Any:
+        # 영속 백엔드가 있으면 sqlite 조회와 만료 정리도 이벤트 루프 밖에서
+        if self.memory.persistent:
+            return await asyncio.to_thread(self.memory.get_session, session_id)
+        return self.memory.get_session(session_id)
+
+    async def _asave(self, session: Any) -> None:
+        # 영속 백엔드가 있으면 sqlite 쓰기가 이벤트 루프를 막지 않도록 스레드로
+        if self.memory.persistent:
+            await asyncio.to_thread(self.memory.save, session)
+        else:
+            self.memory.save(session)
+
+    # ------------------------------------------------------------------
+    def _route_turn(self, session: Any, text: str) -> Optional[Dict[str, Any]]:
+        """Answer without the LLM when possible (fast path, no LLM configured); ``None`` means run the LLM loop."""
+        fast = self._try_fast_path(session, text)
+        if fast is not None:
+            return fast
 
+        if not (self.llm and getattr(self.llm, "available", False)):
+            log.warning("LLM not available; answering with the fallback greeting")
+            self._count_route("no_llm")
+            return self._respond(session, "안녕하세요. 무엇을 도와드릴까요?", {"store": session.store}, [])
+
+        self._count_route("llm")
+        log.info(
+            "turn session=%s stage=%s store=%s menu=%s qty=%s",
+            session.session_id, session.stage.value, session.store, session.selected_menu, session.quantity,
+            extra=SAMPLED,
+        )
+        return None
+
+    def _failed_turn(self, session: Any) -> Dict[str, Any]:
+        log.exception("agent turn failed (session=%s)", session.session_id)
+        return self._respond(session, "죄송합니다. 다시 한 번 말씀해 주세요.", {"store": session.store}, [])
+
+    def _run_turn(self, session: Any, text: str) -> Dict[str, Any]:
+        response = self._route_turn(session, text)
+        if response is not None:
+            return response
+        try:
+            return self._loop_with_function_calling(session, text)
+        except Exception:
+            return self._failed_turn(session)
+
+    async def _arun_turn(self, session: Any, text: str) -> Dict[str, Any]:
+        response = self._route_turn(session, text)
+        if response is not None:
+            return response
+        try:
+            return await self._aloop_with_function_calling(session, text)
+        except Exception:
+            return self._failed_turn(session)
+
+    # ------------------------------------------------------------------
+    def _begin_turn(
+        self,
+        session: Any,
+        message: str,
+        *,
+        store: Optional[str] = None,
+        selected_names: Optional[List[str]] = None,
+        profile: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Any, str]:
         if profile:
             session.profile.update(profile)
 
@@ -98,27 +605,221 @@ class VoiceOrderAgent:
             session.store = store.strip()
         elif not session.store:
             session.store = "옥소반 마곡본점"
+        self.prefetcher.warm(session.store)
 
         # 클라에서 직접 선택한 메뉴 반영
         if selected_names:
             for name in selected_names:
-                m = self.catalog.find(session.store, name)
+                m = self.catalog.resolve(session.store, name)
                 if m:
                     session.selected_menu = m.name
                     session.stage = ConversationStage.AWAIT_QUANTITY
 
-        if not (self.llm and getattr(self.llm, "available", False)):
-            print("[Agent] LLM not available")
-            return self._respond(session, "안녕하세요. 무엇을 도와드릴까요?", {"store": session.store}, [])
+        return session, text
 
+    # ------------------------------------------------------------------
+    def _try_fast_path(self, session: Any, text: str) -> Optional[Dict[str, Any]]:
+        if not (FAST_PATH_ENABLED and text and session.store):
+            return None
         try:
-            print(f"[Agent 응답 가능 / _loop_with_function_calling] session={session_id} stage={session.stage} store={session.store} selected_menu={session.selected_menu} quantity={session.quantity} profile={session.profile}")
-            return self._loop_with_function_calling(session, text)
+            with tracer.span("route"):
+                decision = self.router.route(session, text)
         except Exception:
-            return self._respond(session, "죄송합니다. 다시 한 번 말씀해 주세요.", {"store": session.store}, [])
+            return None
+        if decision is None or decision.confidence < FAST_PATH_MIN_CONFIDENCE:
+            return None
+        self._count_route(f"fast:{decision.intent}")
+
+        if decision.reset_quantity:
+            session.quantity = None
+        response = self._complete_turn(session, "", decision.actions, None)
+        if decision.stage is not None:
+            session.stage = decision.stage
+            response["state"] = session.as_state()
+        speak = self._fast_path_speak(session, decision, response["ui"])
+        response["reply"] = speak
+        session.remember_agent(speak)
+        return response
+
+    def _fast_path_speak(self, session: Any, decision: FastPathDecision, ui: Dict[str, Any]) -> str:
+        if ui.get("clarify"):
+            return _clarify_speak(ui["clarify"])
+        types = {a.get("type") for a in decision.actions}
+        if "ORDER" in types:
+            return "주문을 접수해 두었어요. 결제는 모의 처리이니 안심하셔도 됩니다. 더 도와드릴까요?"
+        summary = ui.get("summary")
+        if summary:
+            return (
+                f"제가 다시 말씀드릴게요. {summary.get('item')} {summary.get('qty')}개, "
+                f"모두 {_won(summary.get('total') or 0)}이에요. 이대로 주문할까요?"
+            )
+        return f"{_with_ro(session.selected_menu or '')} 준비할게요. 몇 개 드릴까요?"
 
     # ------------------------------------------------------------------
+    def _start_loop(self, session: Any, user_text: str) -> Tuple[Optional[_TurnLoop], Optional[Dict[str, Any]]]:
+        """Return ``(loop, None)`` for a fresh LLM turn, or ``(None, cached response)`` on a cache hit."""
+        state = self._state_block(session)
+        key, cached = self._lookup_response(session, state, user_text)
+        if cached is not None:
+            return None, cached
+        return _TurnLoop(msgs=self._build_messages(session, user_text, state), key=key), None
+
+    def _next_tool_calls(self, loop: _TurnLoop, res: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Record one LLM round and return the tool calls to run next (empty ends the loop).
+
+        Stops after ``_MAX_TOOL_ROUNDS`` tool rounds, and marks the turn cut
+        short when the budget can't cover another round after the tools.
+        """
+        _add_usage(loop.usage, loop.msgs, res)
+        log.debug("round %d response: %s", loop.rounds, res)
+        tool_calls = self._append_assistant(loop.msgs, res)
+        if not tool_calls or loop.rounds >= _MAX_TOOL_ROUNDS:
+            return []
+        if budget.expired(LLM_ROUND_RESERVE_S):
+            loop.cut = "rounds"
+            return []
+        loop.rounds += 1
+        return tool_calls
+
     def _loop_with_function_calling(self, session: Any, user_text: str) -> Dict[str, Any]:
+        loop, cached = self._start_loop(session, user_text)
+        if loop is None:
+            return self._with_usage(self._finish_turn(session, cached), dict(_CACHE_HIT_USAGE))
+
+        # 1차 호출 후 tool calls가 있으면 턴 예산 안에서만 한 바퀴 더
+        res = self._chat(loop.msgs, final=self._last_round())
+        tool_calls = self._next_tool_calls(loop, res)
+        while tool_calls:
+            loop.msgs.extend(self._run_tool_calls(session, tool_calls))
+            res = self._chat(loop.msgs, final=self._last_round())
+            tool_calls = self._next_tool_calls(loop, res)
+
+        res = self._settle(res, loop)
+        return self._with_usage(self._finish_turn(session, res), loop.usage)
+
+    async def _aloop_with_function_calling(self, session: Any, user_text: str) -> Dict[str, Any]:
+        loop, cached = self._start_loop(session, user_text)
+        if loop is None:
+            response = await asyncio.to_thread(self._finish_turn, session, cached)
+            return self._with_usage(response, dict(_CACHE_HIT_USAGE))
+
+        res = await self._achat(loop.msgs, final=self._last_round())
+        tool_calls = self._next_tool_calls(loop, res)
+        while tool_calls:
+            loop.msgs.extend(await self._arun_tool_calls(session, tool_calls))
+            res = await self._achat(loop.msgs, final=self._last_round())
+            tool_calls = self._next_tool_calls(loop, res)
+
+        res = self._settle(res, loop)
+        # 추천 보강(리뷰 검색)이 네트워크를 타므로 마무리도 워커 스레드에서 수행
+        return self._with_usage(await asyncio.to_thread(self._finish_turn, session, res), loop.usage)
+
+    async def _astream_loop(self, session: Any, user_text: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Function-calling loop that yields ``("delta", speak_text)`` as it streams.
+
+        Tool rounds run exactly like :meth:`_aloop_with_function_calling`; only
+        the content of each round is parsed incrementally for ``speak``. Ends
+        with ``("final", response)``.
+        """
+        loop, cached = self._start_loop(session, user_text)
+        if loop is None:
+            speak = SpeakExtractor().feed(cached["content"])
+            if speak:
+                yield "delta", speak
+            response = await asyncio.to_thread(self._finish_turn, session, cached)
+            yield "final", self._with_usage(response, dict(_CACHE_HIT_USAGE))
+            return
+
+        res: Dict[str, Any] = {}
+        while True:
+            extractor = SpeakExtractor()
+            spoken: List[str] = []
+            async for kind, payload in self._astream(loop.msgs, final=self._last_round()):
+                if kind == "delta":
+                    delta = extractor.feed(payload)
+                    if delta:
+                        spoken.append(delta)
+                        yield "delta", delta
+                else:
+                    res = payload
+            tool_calls = self._next_tool_calls(loop, res)
+            if not tool_calls:
+                break
+            loop.msgs.extend(await self._arun_tool_calls(session, tool_calls))
+
+        # 이미 소리 내 읽어 준 speak가 있으면 예산이 끊겨도 그게 최선의 답
+        res = self._settle(res, loop, spoken="".join(spoken))
+        yield "final", self._with_usage(await asyncio.to_thread(self._finish_turn, session, res), loop.usage)
+
+    async def _astream(self, msgs: List[Dict[str, Any]], final: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+        astream = getattr(self.llm, "astream", None)
+        if astream is None:
+            # 스트리밍 미지원 LLM 래퍼: 완성된 응답을 한 덩어리로 전달
+            res = await self._achat(msgs, final=final)
+            if res.get("content"):
+                yield "delta", res["content"]
+            yield "done", res
+            return
+        if budget.expired():
+            yield "done", {"error": DEADLINE_ERROR}
+            return
+        started = time.perf_counter()
+        first = True
+        stream = astream(msgs, **self._tool_kwargs(final)).__aiter__()
+        with tracer.span("llm.stream"):
+            while True:
+                try:
+                    kind, payload = await asyncio.wait_for(stream.__anext__(), timeout=budget.remaining())
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    await stream.aclose()
+                    yield "done", {"error": DEADLINE_ERROR}
+                    return
+                if kind == "delta" and first:
+                    # 음성 응답 체감 지연은 첫 조각까지의 시간이 좌우
+                    tracer.record("llm.first_delta", time.perf_counter() - started)
+                    first = False
+                elif kind == "done":
+                    tracer.tokens(payload.get("usage"))
+                yield kind, payload
+
+    @staticmethod
+    def _with_usage(response: Dict[str, Any], usage: Dict[str, Any]) -> Dict[str, Any]:
+        if usage:
+            response["usage"] = usage
+            log.info("usage: %s", usage, extra=SAMPLED)
+        return response
+
+    # ------------------------------------------------------------------
+    def _lookup_response(self, session: Any, state: str, user_text: str) -> Tuple[Optional[_CacheKey], Optional[Dict[str, Any]]]:
+        """Return ``(cache key, cached final response)``; the key is ``None`` when caching doesn't apply.
+
+        The key covers everything the answer can depend on: the store's
+        prompt prefix hash, the state block, a digest of the full profile and
+        the recent history (the state block abbreviates the profile), and the
+        normalized utterance. Only browsing stages are eligible, where the
+        answer doesn't depend on an order in progress.
+        """
+        if not LLM_CACHE_ENABLED:
+            return None, None
+        text = normalize_key(user_text).rstrip(".!~ ")
+        if session.stage not in _CACHEABLE_STAGES or not text:
+            tracer.count("llm_cache_total", result="bypass")
+            return None, None
+        _, prefix_hash, _ = self.prompts.prefix(session.store)
+        key = (prefix_hash, state, _context_digest(session), text)
+        cached = _LLM_CACHE.get(key)
+        tracer.count("llm_cache_total", result="miss" if cached is None else "hit")
+        return key, cached
+
+    @staticmethod
+    def _store_response(key: Optional[_CacheKey], res: Dict[str, Any]) -> None:
+        if key is not None and _cacheable_response(res):
+            _LLM_CACHE.set(key, {"role": "assistant", "content": res["content"]})
+
+    @tracer.timed("prompt.state")
+    def _state_block(self, session: Any) -> str:
         # 상태 요약
         context = [
             f"단계: {session.stage.value}",
@@ -136,74 +837,89 @@ class VoiceOrderAgent:
             brief = " / ".join([s for s in [prefers, allergies, lim_s] if s])
             if brief:
                 context.append(f"프로필: {brief}")
+            favorites = (session.profile.get("orders") or {}).get("favorites") or []
+            if favorites:
+                fav_s = ", ".join(f"{f.get('item')}×{f.get('count')}" for f in favorites[:3])
+                context.append(f"자주 주문: {fav_s}")
+            # 메뉴 블록은 매장 공통(캐시)이라 사용자별 제외 메뉴는 상태 블록에 싣는다
+            excluded = self._excluded_menu(session)
+            if excluded:
+                names = ", ".join(m.name for m in excluded[:8]) + (" 등" if len(excluded) > 8 else "")
+                context.append(f"권하지 말 메뉴(알레르기/비선호): {names}")
+        return " | ".join(context)
 
-        # 메뉴 요약(이름/가격/간단 설명) - LLM이 근사 매칭/정규화에 활용하도록 제공
-        menu_items = []
-        try:
-            for m in self.catalog.list(session.store)[:60]:
-                name = getattr(m, "name", "")
-                price = getattr(m, "price", None)
-                desc = (getattr(m, "desc", "") or "").strip()
-                price_s = f" | {price}원" if isinstance(price, (int, float)) and price is not None else ""
-                if desc:
-                    desc = (desc[:36] + ("…" if len(desc) > 36 else ""))
-                    menu_items.append(f"- {name}{price_s} | {desc}")
-                else:
-                    menu_items.append(f"- {name}{price_s}")
-        except Exception:
-            pass
-        menu_block = "\n".join(menu_items)
-
-        # System prompt = default_prompt + 도구 목록 텍스트 + 현재 상태 + 메뉴 요약
-        system = (
-            default_prompt.strip()
-            + "\n\n[사용 가능한 도구]\n"
-            + (self._tools_text or "(현재 사용 가능한 도구가 없습니다)")
-            + "\n\n[상태]\n"
-            + " | ".join(context)
-            + ("\n\n[매장 메뉴]\n" + menu_block if menu_block else "")
-            + "\n\n[형식]\n반드시 JSON만 출력하세요. 코드블록 금지."
-        )
-        print(f"[Agent] system prompt:\n{system}")
-        # 도구가 전혀 없을 때의 가드: LLM이 답변을 포기하지 않고 재질문하도록 지시
-        if not self._tool_schemas:
-            system += (
-                "\n\n[도구 없음 안내]\n"
-                "현재 사용할 수 있는 도구가 없어요. 필요한 정보가 부족하면 speak에 매우 짧은 재질문을 넣고, actions는 비워두세요."
-            )
+    @tracer.timed("prompt.build")
+    def _build_messages(self, session: Any, user_text: str, state: Optional[str] = None) -> List[Dict[str, Any]]:
+        if state is None:
+            state = self._state_block(session)
+        # System prompt = (매장별 캐시된 고정 prefix) + 현재 상태
+        system = self.prompts.build(session.store, state)
+        _, prefix_hash, prefix_tokens = self.prompts.prefix(session.store)
+        log.debug("system prompt: prefix=%s (~%d tok) state=%s", prefix_hash, prefix_tokens, state)
 
         # 히스토리
-        msgs: List[Dict[str, str]] = [{"role": "system", "content": system}]
-        for turn in (session.history or [])[-6:]:
-            role = turn.get("role", "user"); content = turn.get("message", "")
+        msgs: List[Dict[str, Any]] = [{"role": "system", "content": system}]
+        for role, content in session.recent(_HISTORY_TURNS):
             if content: msgs.append({"role": role, "content": content})
         msgs.append({"role": "user", "content": user_text})
+        return msgs
+
+    def _tool_kwargs(self, final: bool = False) -> Dict[str, Any]:
+        if not self._tool_schemas:
+            return {}
+        # 예산이 한 바퀴치만 남았으면 도구 없이 지금까지의 결과로 답하게 한다
+        return {"tools": self._tool_schemas, "tool_choice": "none" if final else "auto"}
+
+    @staticmethod
+    def _last_round() -> bool:
+        return budget.expired(2 * LLM_ROUND_RESERVE_S)
 
-        # 1차 호출 (tools 없을 때는 tool_choice를 넘기지 않음)
-        if self._tool_schemas:
-            res = self.llm.chat(msgs, tools=self._tool_schemas, tool_choice="auto")  # type: ignore
+    def _chat(self, msgs: List[Dict[str, Any]], final: bool = False) -> Dict[str, Any]:
+        # 동기 호출은 중간에 끊을 수 없으므로 시간 제한은 AzureLLM이 SDK timeout으로 건다
+        if budget.expired():
+            return {"error": DEADLINE_ERROR}
+        with tracer.span("llm.chat"):
+            res = self.llm.chat(msgs, **self._tool_kwargs(final))  # type: ignore
+        tracer.tokens(res.get("usage"))
+        return res
+
+    async def _achat(self, msgs: List[Dict[str, Any]], final: bool = False) -> Dict[str, Any]:
+        achat = getattr(self.llm, "achat", None)
+        if achat is None:
+            # 동기 전용 LLM 래퍼도 이벤트 루프를 막지 않도록 스레드로 넘김 (span은 _chat이 기록)
+            return await asyncio.to_thread(self._chat, msgs, final)
+        if budget.expired():
+            return {"error": DEADLINE_ERROR}
+        with tracer.span("llm.chat"):
+            try:
+                res = await asyncio.wait_for(achat(msgs, **self._tool_kwargs(final)), timeout=budget.remaining())
+            except asyncio.TimeoutError:
+                return {"error": DEADLINE_ERROR}
+        tracer.tokens(res.get("usage"))
+        return res
+
+    def _settle(self, res: Dict[str, Any], loop: _TurnLoop, spoken: str = "") -> Dict[str, Any]:
+        """Pick the LLM message that finishes the turn; record it when the budget cut the turn short."""
+        cut = loop.cut
+        if cut is None and res.get("error") == DEADLINE_ERROR:
+            cut = "llm_timeout"
+        if cut is None:
+            self._store_response(loop.key, res)
+            return res
+        tracer.count("turns_cut_short_total", reason=cut)
+        loop.usage["cut_short"] = cut
+        log.info("turn cut short by the %.1fs budget (%s)", TURN_BUDGET_S, cut)
+        if spoken:
+            speak = spoken
+        elif res.get("content") and not _coerce_tool_calls(res):
+            return res
         else:
-            res = self.llm.chat(msgs)  # type: ignore
-        print(f"[Agent] initial response: {res}")
-        # Append assistant including tool_calls when present (required by API)
-        def _coerce_tool_calls(r: Dict[str, Any]) -> List[Dict[str, Any]]:
-            # Normalize different wrappers (our AzureLLM returns `tool_call`)
-            tc = r.get("tool_calls") or []
-            if not tc and r.get("tool_call"):
-                single = r["tool_call"] or {}
-                tc = [{
-                    "id": single.get("id") or "tc1",
-                    "type": "function",
-                    "function": {
-                        "name": single.get("name"),
-                        "arguments": single.get("arguments"),
-                    },
-                }]
-            if not tc and r.get("function_call"):
-                fc = r["function_call"]
-                tc = [{"id": "fc1", "type": "function", "function": fc}]
-            return tc
+            speak = "확인하는 데 시간이 걸려서 먼저 말씀드려요. 원하시는 메뉴를 말씀해 주시면 바로 도와드릴게요."
+        return {"role": "assistant", "content": json.dumps({"speak": speak, "actions": []}, ensure_ascii=False)}
 
+    @staticmethod
+    def _append_assistant(msgs: List[Dict[str, Any]], res: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Append assistant including tool_calls when present (required by API)
         tc_list = _coerce_tool_calls(res)
         assistant_msg: Dict[str, Any] = {"role": "assistant"}
         if res.get("content") is not None:
@@ -214,63 +930,100 @@ class VoiceOrderAgent:
                 for c in tc_list
             ]
         msgs.append(assistant_msg)
+        return tc_list
 
-        # tool calls 처리
-        tool_calls = tc_list
-        print(f"[Agent] tool calls: {tool_calls}")
-        guard = 0
-        while tool_calls and guard < 6:
-            for call in tool_calls:
-                fn = call.get("function", {}) or {}
-                name = (fn.get("name") or "").strip()
-                try:
-                    args = json.loads(fn.get("arguments") or "{}")
-                except Exception:
-                    args = {}
-
-                # --- 호출 전 인자 보정(리뷰: menu_names 자동 주입) ---
-                if name == "reviews" and "menu_names" not in args:
-                    names = [m.name for m in self.catalog.list(session.store)][:40]
-                    args["menu_names"] = names
-
-                # 실제 실행
-                func = self._tool_map.get(name)
-                if not func:
-                    result = {"error": f"unknown tool: {name}"}
-                else:
-                    # tools 함수는 키워드 호출
-                    result = func(**args)
-
-                msgs.append({
-                    "role": "tool",
-                    "tool_call_id": call.get("id"),
-                    "name": name,
-                    "content": json.dumps(result, ensure_ascii=False),
-                })
-
-            if self._tool_schemas:
-                res = self.llm.chat(msgs, tools=self._tool_schemas, tool_choice="auto")  # type: ignore
+    def _prepare_tool_call(self, session: Any, call: Dict[str, Any]) -> Tuple[str, Any, Dict[str, Any]]:
+        fn = call.get("function", {}) or {}
+        name = (fn.get("name") or "").strip()
+        try:
+            args = json.loads(fn.get("arguments") or "{}")
+        except Exception:
+            args = {}
+
+        # --- 호출 전 인자 보정(리뷰: menu_names 자동 주입) ---
+        if name == "reviews" and "menu_names" not in args:
+            names = [m.name for m in self.catalog.list(session.store)][:40]
+            args["menu_names"] = names
+
+        return name, self._tool_map.get(name), args
+
+    @staticmethod
+    def _tool_message(call: Dict[str, Any], name: str, result: Any) -> Dict[str, Any]:
+        return {
+            "role": "tool",
+            "tool_call_id": call.get("id"),
+            "name": name,
+            "content": json.dumps(result, ensure_ascii=False),
+        }
+
+    def _submit_tool_calls(
+        self, session: Any, calls: List[Dict[str, Any]]
+    ) -> Tuple[float, List[Tuple[str, Optional[Future]]]]:
+        """Start every tool call of one LLM round on the shared executor.
+
+        Returns the wait window and ``(name, future)`` per call, in order;
+        the future is ``None`` for an unknown tool.
+        """
+        prepared = [self._prepare_tool_call(session, call) for call in calls]
+        # 도구는 남은 예산에서 마지막 LLM 한 번 몫을 떼고 쓴다 (HTTP 요청도 같은 마감을 봄)
+        window = budget.clamp(TOOL_TIMEOUT_S, reserve=LLM_ROUND_RESERVE_S)
+        with budget.deadline(window):
+            jobs = [
+                (name, _tool_executor(name).submit(_traced_tool(name, func, args)) if func else None)
+                for name, func, args in prepared
+            ]
+        return window, jobs
+
+    def _collect_tool_results(
+        self, calls: List[Dict[str, Any]], jobs: List[Tuple[str, Optional[Future]]]
+    ) -> List[Dict[str, Any]]:
+        """Turn finished (or abandoned) tool futures into tool messages, in call order.
+
+        A tool that raised or is still running when the window closed yields
+        an ``{"error": ...}`` payload instead of its result.
+        """
+        out: List[Dict[str, Any]] = []
+        for call, (name, fut) in zip(calls, jobs):
+            if fut is None:
+                result: Any = {"error": f"unknown tool: {name}"}
+            elif not fut.done():
+                fut.cancel()
+                tracer.count("tool_timeouts_total", tool=name)
+                result = {"error": f"tool timeout: {name}"}
             else:
-                res = self.llm.chat(msgs)  # type: ignore
-            print(f"[Agent] tool call loop {guard} response: {res}")
-            tc_list = _coerce_tool_calls(res)
-            assistant_msg = {"role": "assistant"}
-            if res.get("content") is not None:
-                assistant_msg["content"] = res.get("content")
-            if tc_list:
-                assistant_msg["tool_calls"] = [
-                    {"id": c.get("id") or "tc1", "type": "function", "function": c.get("function") or {}}
-                    for c in tc_list
-                ]
-            msgs.append(assistant_msg)
-            tool_calls = tc_list
-            guard += 1
+                try:
+                    result = fut.result()
+                except Exception as exc:
+                    result = {"error": f"{name} failed: {exc}"}
+            out.append(self._tool_message(call, name, result))
+        return out
+
+    def _run_tool_calls(self, session: Any, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run every tool call of one LLM turn concurrently, bounded by the tool window."""
+        window, jobs = self._submit_tool_calls(session, calls)
+        futures = [fut for _, fut in jobs if fut is not None]
+        if futures:
+            wait_futures(futures, timeout=window)
+        return self._collect_tool_results(calls, jobs)
+
+    async def _arun_tool_calls(self, session: Any, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        window, jobs = self._submit_tool_calls(session, calls)
+        waiters = [asyncio.wrap_future(fut) for _, fut in jobs if fut is not None]
+        if waiters:
+            done, pending = await asyncio.wait(waiters, timeout=window)
+            # 결과는 원본 future에서 읽으므로 래퍼 쪽 예외는 소비만, 늦은 래퍼는 취소
+            for waiter in done:
+                waiter.exception()
+            for waiter in pending:
+                waiter.cancel()
+        return self._collect_tool_results(calls, jobs)
 
+    def _finish_turn(self, session: Any, res: Dict[str, Any]) -> Dict[str, Any]:
         # 최종 JSON 파싱
         content = res.get("content")
-        print(f"[Agent] 최종 응답: {content}")
+        log.debug("final response: %s", content)
         if not content:
-            print("[Agent] No content in LLM response")
+            log.warning("no content in LLM response: %s", res.get("error") or "empty")
             return self._respond(session, "원하시는 메뉴를 말씀해 주세요.", {"store": session.store}, [])
         try:
             data = json.loads(_strip_json_fence(content))
@@ -281,11 +1034,25 @@ class VoiceOrderAgent:
         actions = data.get("actions") or []
         mem_patch = data.get("memory") or {}
 
+        response = self._complete_turn(session, speak, actions, mem_patch)
+        session.remember_agent(response["reply"])
+        return response
+
+    def _complete_turn(
+        self,
+        session: Any,
+        speak: str,
+        actions: List[Dict[str, Any]],
+        mem_patch: Any,
+    ) -> Dict[str, Any]:
         if isinstance(mem_patch, dict):
             self._apply_memory_patch(session, mem_patch)
 
         ui_actions, ui_delta = self._apply_actions(session, actions)
-        session.remember_agent(speak)
+        clarify = ui_delta.get("clarify")
+        if clarify:
+            # LLM이 메뉴를 골랐다고 말해도 카탈로그에서 확정하지 못했으면 되묻는 말로 바꾼다
+            speak = _clarify_speak(clarify)
         return {
             "reply": speak,
             "ui": {"store": session.store, **ui_delta},
@@ -294,6 +1061,7 @@ class VoiceOrderAgent:
         }
 
     # ------------------------------------------------------------------
+    @tracer.timed("actions.apply")
     def _apply_actions(self, session: Any, actions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         ui_actions: List[Dict[str, Any]] = []
         ui: Dict[str, Any] = {}
@@ -307,10 +1075,18 @@ class VoiceOrderAgent:
             elif t == "SHOW_RECOMMENDATIONS":
                 # 기본 추천 목록을 구성하고, 네이버 리뷰(DDG 경유) 신호로 보강
                 items = a.get("items") or []
+                excluded = {m.name for m in self._excluded_menu(session)}
                 recs = []
-                for it in items[:3]:
+                for it in items:
+                    if len(recs) >= 3:
+                        break
                     name = (it.get("name") or "").strip()
-                    m = self.catalog.find(session.store, name) if name else None
+                    # STT/LLM 표기가 달라도 로컬 매처로 카탈로그 메뉴에 맞춘다
+                    m = self.catalog.resolve(session.store, name) if name else None
+                    if m:
+                        name = m.name
+                    if name in excluded:
+                        continue  # 알레르기/비선호 메뉴는 추천 카드에서 뺀다
                     recs.append({
                         "menu_id": it.get("menu_id") or (getattr(m, "id", None) or name),
                         "name": name,
@@ -324,11 +1100,14 @@ class VoiceOrderAgent:
 
             elif t == "SELECT_MENU_BY_NAME":
                 name = str(a.get("name") or "")
-                m = self.catalog.find(session.store, name)
-                if m:
-                    session.selected_menu = m.name
-                    session.stage = ConversationStage.AWAIT_QUANTITY
-                ui_actions.append({"type": "SELECT_MENU_BY_NAME", "name": name})
+                m = self.catalog.resolve(session.store, name)
+                if not m:
+                    # 어느 메뉴인지 확실하지 않으면 고르지 않고 되묻는다
+                    ui["clarify"] = self._clarify(session, name)
+                    continue
+                session.selected_menu = m.name
+                session.stage = ConversationStage.AWAIT_QUANTITY
+                ui_actions.append({"type": "SELECT_MENU_BY_NAME", "name": m.name})
 
             elif t == "SET_QTY":
                 q = max(1, int(a.get("value", 1)))
@@ -348,23 +1127,44 @@ class VoiceOrderAgent:
 
             elif t == "READ_BACK_SUMMARY":
                 qty = session.quantity or 1
-                item = self.catalog.find(session.store, session.selected_menu or "")
-                total = (item.price if item else 0) * qty
-                ui["summary"] = {"item": session.selected_menu, "qty": qty, "total": total}
+                item = self.catalog.resolve(session.store, session.selected_menu or "")
+                if not item:
+                    ui["clarify"] = self._clarify(session, session.selected_menu or "")
+                    continue
+                ui["summary"] = {"item": item.name, "qty": qty, "total": item.price * qty}
                 ui_actions.append({"type": "READ_BACK_SUMMARY"})
 
             elif t == "ORDER":
                 qty = session.quantity or 1
-                item = self.catalog.find(session.store, session.selected_menu or "")
-                price = (item.price if item else 0) * qty
-                ui["payment"] = {"status": "success", "amount": price,
-                                 "items": [{"name": session.selected_menu, "price": item.price if item else 0, "quantity": qty}]}
+                item = self.catalog.resolve(session.store, session.selected_menu or "")
+                if not item:
+                    # 확정되지 않은 메뉴는 값을 매기거나 주문하지 않는다
+                    ui["clarify"] = self._clarify(session, session.selected_menu or "")
+                    continue
+                ui["payment"] = {"status": "success", "amount": item.price * qty,
+                                 "items": [{"name": item.name, "price": item.price, "quantity": qty}]}
                 session.stage = ConversationStage.ORDER_COMPLETE
                 ui_actions.append({"type": "ORDER"})
 
         ui_actions = [a for a in ui_actions if a.get("type") in UI_ACTION_WHITELIST]
         return ui_actions, ui
 
+    def _clarify(self, session: Any, name: str) -> Dict[str, Any]:
+        """Closest menu names for an unresolved ``name``, for asking which one was meant."""
+        candidates = [c.item.name for c in self.catalog.match(session.store, name, limit=3)] if name else []
+        return {"name": name, "candidates": candidates}
+
+    def _excluded_menu(self, session: Any) -> Tuple[Any, ...]:
+        """Menu items of the session's store to avoid for its profile's allergies/dislikes."""
+        profile = session.profile or {}
+        allergies, dislikes = (
+            [v] if isinstance(v, str) else list(v or []) for v in (profile.get("allergies"), profile.get("dislikes"))
+        )
+        if not session.store or not (allergies or dislikes):
+            return ()
+        mask = self.catalog.exclusion_mask(session.store, allergies, dislikes)
+        return self.catalog.select(session.store, mask) if mask else ()
+
     # ------------------------------------------------------------------
     def _enrich_recommendations_with_reviews(self, session: Any, recs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Use web reviews (Naver-heavy via DuckDuckGo) to refine reasons/order.
@@ -375,7 +1175,9 @@ class VoiceOrderAgent:
         try:
             names = [r.get("name") for r in recs if r.get("name")]
             # Provide menu_names to improve mention detection
-            data = toolmod.reviews(store=session.store, menu_names=names, max_results=8, fetch_pages=False)
+            data = toolmod.reviews(
+                store=session.store, menu_names=names, max_results=toolmod.ENRICH_MAX_RESULTS, fetch_pages=False
+            )
             mentions = data.get("menu_mentions") or []
             # Map normalized name -> count
             norm = lambda s: str(s or "").replace(" ", "").lower()
@@ -405,6 +1207,7 @@ class VoiceOrderAgent:
         store = patch.get("store")
         if isinstance(store, str) and store.strip():
             session.store = store.strip()
+            self.prefetcher.warm(session.store)
 
         stage = patch.get("stage")
         if isinstance(stage, str):
@@ -1,9 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import io
 import os
 from urllib.parse import parse_qs, urlparse
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from . import budget
+from .tracing import get_logger
+
+log = get_logger("llm")
+
+# 요청 하나의 최대 대기 시간. 턴 예산이 걸려 있으면 남은 시간으로 더 줄인다
+LLM_TIMEOUT_S = float(os.getenv("AZURE_OPENAI_TIMEOUT", "30"))
 
 
 class AzureLLM:
@@ -14,6 +23,7 @@ class AzureLLM:
       - AZURE_OPENAI_ENDPOINT
       - AZURE_OPENAI_DEPLOYMENT (model deploy name)
       - AZURE_OPENAI_API_VERSION (default: 2024-08-01-preview)
+      - AZURE_OPENAI_TIMEOUT (seconds per request, default: 30)
     """
 
     def __init__(self) -> None:
@@ -33,6 +43,7 @@ class AzureLLM:
             self.api_version = api_version
 
         self._client = None
+        self._aclient = None
         if self.key and self.endpoint and self.deployment:
             try:
                 from openai import AzureOpenAI  # type: ignore
@@ -42,10 +53,20 @@ class AzureLLM:
                     api_version=self.api_version,
                     azure_endpoint=self.endpoint,
                 )
-                print("Initialized Azure OpenAI client")
+                log.info("Initialized Azure OpenAI client")
             except Exception:
-                print("Failed to initialize Azure OpenAI client")
+                log.warning("Failed to initialize Azure OpenAI client", exc_info=True)
                 self._client = None
+            try:
+                from openai import AsyncAzureOpenAI  # type: ignore
+
+                self._aclient = AsyncAzureOpenAI(
+                    api_key=self.key,
+                    api_version=self.api_version,
+                    azure_endpoint=self.endpoint,
+                )
+            except Exception:
+                self._aclient = None
 
     @property
     def available(self) -> bool:
@@ -54,6 +75,9 @@ class AzureLLM:
     def chat(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None, tool_choice: Optional[str] = None) -> Dict[str, Any]:
         if not self.available:
             return {"error": "LLM not configured"}
+        timeout = budget.clamp(LLM_TIMEOUT_S)
+        if timeout <= 0:
+            return {"error": budget.DEADLINE_ERROR}
         try:
             resp = self._client.chat.completions.create(
                 model=self.deployment,
@@ -61,22 +85,144 @@ class AzureLLM:
                 tools=tools or None,
                 tool_choice=tool_choice or "auto",
                 temperature=0.3,
+                timeout=timeout,
             )
-            choice = resp.choices[0]
-            msg = choice.message
-            print("[llm_openai] LLM response:", msg.content)
-            out: Dict[str, Any] = {"role": msg.role or "assistant", "content": msg.content}
-            if msg.tool_calls:
-                tc = msg.tool_calls[0]
-                out["tool_call"] = {
-                    "id": tc.id,
-                    "name": tc.function.name,
-                    "arguments": tc.function.arguments,
-                }
-            return out
+            return self._parse_response(resp)
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def achat(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None, tool_choice: Optional[str] = None) -> Dict[str, Any]:
+        """Async counterpart of :meth:`chat` backed by ``AsyncAzureOpenAI``.
+
+        Falls back to running the sync client in a worker thread when the async
+        client could not be created, so callers can always ``await`` it.
+        """
+        if not self.available:
+            return {"error": "LLM not configured"}
+        if self._aclient is None:
+            return await asyncio.to_thread(self.chat, messages, tools, tool_choice)
+        timeout = budget.clamp(LLM_TIMEOUT_S)
+        if timeout <= 0:
+            return {"error": budget.DEADLINE_ERROR}
+        try:
+            resp = await self._aclient.chat.completions.create(
+                model=self.deployment,
+                messages=messages,
+                tools=tools or None,
+                tool_choice=tool_choice or "auto",
+                temperature=0.3,
+                timeout=timeout,
+            )
+            return self._parse_response(resp)
         except Exception as e:
             return {"error": str(e)}
 
+    async def astream(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream one completion as ``("delta", text)`` items, then ``("done", message)``.
+
+        ``message`` has the same shape as :meth:`chat` returns, with tool-call
+        fragments reassembled. Without an async client the whole reply is
+        produced by :meth:`achat` and emitted as a single delta.
+        """
+        if not self.available:
+            yield "done", {"error": "LLM not configured"}
+            return
+        if self._aclient is None:
+            res = await self.achat(messages, tools, tool_choice)
+            if res.get("content"):
+                yield "delta", res["content"]
+            yield "done", res
+            return
+        content: List[str] = []
+        calls: Dict[int, Dict[str, Any]] = {}
+        usage: Any = None
+        role = "assistant"
+        timeout = budget.clamp(LLM_TIMEOUT_S)
+        if timeout <= 0:
+            yield "done", {"error": budget.DEADLINE_ERROR}
+            return
+        try:
+            stream = await self._aclient.chat.completions.create(
+                model=self.deployment,
+                messages=messages,
+                tools=tools or None,
+                tool_choice=tool_choice or "auto",
+                temperature=0.3,
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout,
+            )
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                role = getattr(delta, "role", None) or role
+                if delta.content:
+                    content.append(delta.content)
+                    yield "delta", delta.content
+                for tc in delta.tool_calls or []:
+                    slot = calls.setdefault(tc.index, {"id": None, "name": "", "arguments": ""})
+                    if tc.id:
+                        slot["id"] = tc.id
+                    if tc.function is not None:
+                        slot["name"] += tc.function.name or ""
+                        slot["arguments"] += tc.function.arguments or ""
+        except Exception as e:
+            yield "done", {"error": str(e)}
+            return
+
+        text = "".join(content) or None
+        log.debug("LLM streamed response: %s", text)
+        out: Dict[str, Any] = {"role": role, "content": text}
+        if usage is not None:
+            out["usage"] = _usage_dict(usage)
+        if calls:
+            out["tool_calls"] = [
+                {
+                    "id": c["id"],
+                    "type": "function",
+                    "function": {"name": c["name"], "arguments": c["arguments"]},
+                }
+                for _, c in sorted(calls.items())
+            ]
+            first = out["tool_calls"][0]
+            out["tool_call"] = {"id": first["id"], **first["function"]}
+        yield "done", out
+
+    @staticmethod
+    def _parse_response(resp: Any) -> Dict[str, Any]:
+        choice = resp.choices[0]
+        msg = choice.message
+        log.debug("LLM response: %s", msg.content)
+        out: Dict[str, Any] = {"role": msg.role or "assistant", "content": msg.content}
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            out["usage"] = _usage_dict(usage)
+        if msg.tool_calls:
+            # 모델이 한 턴에 여러 도구를 부를 수 있으므로 전부 전달 (병렬 실행은 에이전트 몫)
+            out["tool_calls"] = [
+                {
+                    "id": tc.id,
+                    "type": "function",
+                    "function": {"name": tc.function.name, "arguments": tc.function.arguments},
+                }
+                for tc in msg.tool_calls
+            ]
+            tc = msg.tool_calls[0]
+            out["tool_call"] = {
+                "id": tc.id,
+                "name": tc.function.name,
+                "arguments": tc.function.arguments,
+            }
+        return out
+
 
 class AzureAudioTranscriber:
     """Wrapper to call Azure OpenAI audio transcription (Whisper / GPT-4o-transcribe)."""
@@ -141,6 +287,16 @@ class AzureAudioTranscriber:
             return {"error": str(exc)}
 
 
+def _usage_dict(usage: Any) -> Dict[str, Any]:
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        # Azure/OpenAI 자동 프롬프트 캐시가 재사용한 prefix 토큰 수
+        "cached_tokens": getattr(details, "cached_tokens", None) if details is not None else None,
+    }
+
+
 def _parse_azure_endpoint(url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     if not url:
         return None, None, None
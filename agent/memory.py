@@ -1,27 +1,285 @@
 from __future__ import annotations
 
-from threading import RLock
-from typing import Dict, List, Optional
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from threading import Lock, RLock
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+)
+from weakref import WeakValueDictionary
+
+from .tracing import get_logger
 
 try:
     from voice_mvp.backend import OrderSession  # type: ignore[import-not-found]
 except ModuleNotFoundError:  # pragma: no cover
     from fastapi_app import OrderSession
 
+SESSION_TTL_S = float(os.getenv("AGENT_SESSION_TTL", "1800"))
+MAX_SESSIONS = int(os.getenv("AGENT_MAX_SESSIONS", "10000"))
 
-class Memory:
-    """Session memory storing structured order conversations."""
+log = get_logger("memory")
+
+
+class SessionBackend(Protocol):
+    """Persistent tier behind :class:`Memory` (shared by every worker process)."""
+
+    def load(self, session_id: str, newer_than: float = 0.0) -> Optional[Tuple[float, Dict[str, Any]]]: ...
+
+    def save(self, session_id: str, data: Dict[str, Any], updated_at: float) -> None: ...
+
+    def delete(self, session_id: str) -> None: ...
+
+    def purge(self, older_than: float) -> int: ...
+
+
+class SqliteSessionBackend:
+    """Sessions as JSON rows in sqlite (WAL), so uvicorn workers see each other's turns.
+
+    Rows are written whole with ``INSERT OR REPLACE`` and there is no
+    cross-process lock: if two workers run a turn of the same session at the
+    same time, the last write wins and the other turn is lost. Keep a
+    session on one worker (sticky routing) when that matters.
+    """
+
+    def __init__(self, path: Path, table: str = "sessions") -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._table = table
+        self._lock = RLock()
+        self._conn = sqlite3.connect(str(self._path), check_same_thread=False, timeout=5.0)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} "
+                "(id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self._table}_updated ON {self._table} (updated_at)"
+            )
+            self._conn.commit()
+
+    def load(self, session_id: str, newer_than: float = 0.0) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT updated_at, data FROM {self._table} WHERE id = ? AND updated_at > ?",
+                (session_id, newer_than),
+            ).fetchone()
+        if not row:
+            return None
+        try:
+            return float(row[0]), json.loads(row[1])
+        except Exception:
+            return None
+
+    def save(self, session_id: str, data: Dict[str, Any], updated_at: float) -> None:
+        payload = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} (id, data, updated_at) VALUES (?, ?, ?)",
+                (session_id, payload, updated_at),
+            )
+            self._conn.commit()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self._table} WHERE id = ?", (session_id,))
+            self._conn.commit()
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            cur = self._conn.execute(f"DELETE FROM {self._table} WHERE updated_at < ?", (older_than,))
+            self._conn.commit()
+            return cur.rowcount or 0
+
+
+class _SessionLock:
+    __slots__ = ("thread", "_async", "_loop", "__weakref__")
+
+    def __init__(self) -> None:
+        self.thread = Lock()
+        self._async: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def async_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._async is None or (self._loop is not loop and not self._async.locked()):
+            self._async, self._loop = asyncio.Lock(), loop
+        return self._async
+
+
+async def _acquire_in_thread(lock: Any) -> None:
+    """Block on ``lock`` in a worker thread without polling; safe against cancellation."""
+    acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        # 기다리던 코루틴이 취소돼도 스레드는 결국 락을 잡으므로, 잡는 즉시 풀어 준다
+        acquiring.add_done_callback(lambda f: lock.release() if not f.cancelled() and f.result() else None)
+        raise
+
+
+class SessionLocks:
+    """Per-session mutual exclusion for both worker threads and coroutines.
+
+    Turns of one session run one at a time while different sessions stay fully
+    parallel. Entries live in a ``WeakValueDictionary`` and disappear once no
+    turn holds or waits on them, so idle sessions cost nothing here.
+    """
 
     def __init__(self) -> None:
-        self._sessions: Dict[str, OrderSession] = {}
+        self._guard = Lock()
+        self._locks: "WeakValueDictionary[str, _SessionLock]" = WeakValueDictionary()
+
+    def _entry(self, key: str) -> _SessionLock:
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = _SessionLock()
+            return entry
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        entry = self._entry(key)
+        with entry.thread:
+            yield
+
+    @asynccontextmanager
+    async def ahold(self, key: str) -> AsyncIterator[None]:
+        entry = self._entry(key)
+        # 같은 루프의 코루틴끼리는 asyncio 락으로 줄 세우고,
+        # 동기 handle()을 도는 스레드가 잡고 있을 때만 워커 스레드에서 스레드 락을 기다림
+        async with entry.async_lock():
+            if not entry.thread.acquire(blocking=False):
+                await _acquire_in_thread(entry.thread)
+            try:
+                yield
+            finally:
+                entry.thread.release()
+
+    def __len__(self) -> int:
+        with self._guard:
+            return len(self._locks)
+
+
+class _Slot:
+    __slots__ = ("session", "last_seen", "synced_at")
+
+    def __init__(self, session: OrderSession, last_seen: float, synced_at: float = 0.0) -> None:
+        self.session = session
+        self.last_seen = last_seen
+        self.synced_at = synced_at
+
+
+class Memory:
+    """Session memory storing structured order conversations.
+
+    Sessions live in an LRU capped at ``max_sessions`` and are forgotten after
+    ``idle_ttl`` seconds without a turn. With a ``backend`` every finished turn
+    is written through (see :meth:`save`), evicted sessions are reloaded on
+    demand and a newer copy written by another worker replaces the local one.
+    :attr:`locks` only serialize turns within this process; across workers
+    the backend keeps the last write.
+
+    With a backend, :meth:`get_session` and :meth:`save` do sqlite I/O (and
+    the periodic purge), so async callers run them in a worker thread.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = MAX_SESSIONS,
+        idle_ttl: float = SESSION_TTL_S,
+        backend: Optional[SessionBackend] = None,
+    ) -> None:
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_ttl = float(idle_ttl)
+        self._backend = backend
+        self._sessions: "OrderedDict[str, _Slot]" = OrderedDict()
         self._lock = RLock()
+        self._sweep_every = max(1.0, min(60.0, self.idle_ttl / 4))
+        self._next_sweep = time.time() + self._sweep_every
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+        self.locks = SessionLocks()
+
+    @property
+    def persistent(self) -> bool:
+        return self._backend is not None
+
+    def lock(self, session_id: str) -> ContextManager[None]:
+        """Serialize one turn of ``session_id`` (threads)."""
+        return self.locks.hold(session_id or "default")
+
+    def alock(self, session_id: str) -> AsyncContextManager[None]:
+        """Serialize one turn of ``session_id`` (coroutines)."""
+        return self.locks.ahold(session_id or "default")
 
     def get_session(self, session_id: str) -> OrderSession:
         session_key = session_id or "default"
+        now = time.time()
+        self._maybe_sweep(now)
         with self._lock:
-            if session_key not in self._sessions:
-                self._sessions[session_key] = OrderSession(session_id=session_key)
-            return self._sessions[session_key]
+            slot = self._sessions.get(session_key)
+            if slot is not None and now - slot.last_seen > self.idle_ttl:
+                del self._sessions[session_key]
+                self.evicted_idle += 1
+                slot = None
+            if slot is not None:
+                slot.last_seen = now
+                self._sessions.move_to_end(session_key)
+                if self._backend is None:
+                    return slot.session
+            synced_at = slot.synced_at if slot is not None else 0.0
+
+        # sqlite 조회는 전역 락 밖에서: 다른 세션 요청을 막지 않도록
+        stored = self._load(session_key, newer_than=max(synced_at, now - self.idle_ttl))
+        with self._lock:
+            slot = self._sessions.get(session_key)
+            if stored is not None and (slot is None or stored[0] > slot.synced_at):
+                session = OrderSession.from_dict(stored[1])
+                if slot is None:
+                    slot = self._insert(session_key, session, now)
+                else:
+                    slot.session = session
+                slot.synced_at = stored[0]
+            elif slot is None:
+                slot = self._insert(session_key, OrderSession(session_id=session_key), now)
+            return slot.session
+
+    def save(self, session: OrderSession) -> None:
+        """Mark the end of a turn; writes the session through to the backend."""
+        now = time.time()
+        with self._lock:
+            slot = self._sessions.get(session.session_id)
+            if slot is not None:
+                slot.last_seen = now
+        if self._backend is None:
+            return
+        try:
+            self._backend.save(session.session_id, session.to_dict(), now)
+        except Exception as exc:
+            log.warning("session save failed: %s", exc)
+            return
+        with self._lock:
+            if slot is not None and slot.session is session:
+                slot.synced_at = now
 
     # Backwards compatible helpers -------------------------------------
     def get(self, session_id: str) -> Dict[str, object]:
@@ -31,7 +289,7 @@ class Memory:
             "stage": session.stage.value,
             "selectedMenu": session.selected_menu,
             "quantity": session.quantity,
-            "history": list(session.history),
+            "history": session.history_dicts(),
             "profile": dict(session.profile),
         }
 
@@ -43,19 +301,100 @@ class Memory:
         profile = patch.get("profile")
         if isinstance(profile, dict):
             session.profile.update(profile)
+        self.save(session)
         return self.get(session_id)
 
     def append_history(self, session_id: str, role: str, message: str) -> None:
         session = self.get_session(session_id)
-        session.history.append({"role": role, "message": message})
+        session.remember(role, message)
+        self.save(session)
 
     def clear(self, session_id: str) -> None:
         with self._lock:
             self._sessions.pop(session_id, None)
+        if self._backend is not None:
+            self._backend.delete(session_id)
 
     def all_sessions(self) -> List[OrderSession]:
         with self._lock:
-            return list(self._sessions.values())
+            return [slot.session for slot in self._sessions.values()]
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts plus an approximate deep size of the resident sessions."""
+        with self._lock:
+            sessions = [slot.session for slot in self._sessions.values()]
+        seen: set = set()
+        approx = sum(_approx_size(s, seen) for s in sessions)
+        return {
+            "sessions": len(sessions),
+            "max_sessions": self.max_sessions,
+            "idle_ttl": self.idle_ttl,
+            "history_entries": sum(len(s.history) for s in sessions),
+            "approx_bytes": approx,
+            "evicted_lru": self.evicted_lru,
+            "evicted_idle": self.evicted_idle,
+            "active_locks": len(self.locks),
+            "backend": type(self._backend).__name__ if self._backend is not None else None,
+        }
+
+    # ------------------------------------------------------------------
+    def _insert(self, key: str, session: OrderSession, now: float) -> _Slot:
+        slot = _Slot(session, now)
+        self._sessions[key] = slot
+        while len(self._sessions) > self.max_sessions:
+            # 가장 오래 쓰지 않은 세션부터: 백엔드가 있으면 이미 저장돼 있어 다시 불러올 수 있음
+            self._sessions.popitem(last=False)
+            self.evicted_lru += 1
+        return slot
+
+    def _load(self, key: str, newer_than: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        if self._backend is None:
+            return None
+        try:
+            return self._backend.load(key, newer_than=newer_than)
+        except Exception as exc:
+            log.warning("session load failed: %s", exc)
+            return None
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now < self._next_sweep:
+            return
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + self._sweep_every
+            # LRU 순서 = 마지막 사용 순서이므로 앞에서부터 만료된 것만 걷어냄
+            while self._sessions:
+                key, slot = next(iter(self._sessions.items()))
+                if now - slot.last_seen <= self.idle_ttl:
+                    break
+                del self._sessions[key]
+                self.evicted_idle += 1
+        if self._backend is not None:
+            try:
+                self._backend.purge(now - self.idle_ttl)
+            except Exception:
+                pass
+
+
+def _approx_size(obj: Any, seen: set) -> int:
+    """Rough recursive ``sys.getsizeof`` (shared objects are counted once)."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(_approx_size(k, seen) + _approx_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)) or hasattr(obj, "maxlen"):
+        return size + sum(_approx_size(v, seen) for v in obj)
+    if hasattr(obj, "__dict__"):
+        size += _approx_size(vars(obj), seen)
+    for name in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, name):
+            size += _approx_size(getattr(obj, name), seen)
+    return size
 
 
-__all__ = ["Memory"]
+__all__ = ["Memory", "SessionBackend", "SessionLocks", "SqliteSessionBackend"]
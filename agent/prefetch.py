@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .tracing import get_logger, tracer
+
+# 매장이 정해지는 순간(매장 선택, /api/menu, 음성 연결) 추천에 쓸 데이터를 미리 데워 둔다
+PREFETCH_ENABLED = (os.getenv("AGENT_PREFETCH") or "1").strip().lower() not in ("0", "false", "no", "off")
+# 같은 매장은 이 간격 안에 다시 데우지 않음 (도구 캐시 TTL보다 짧게)
+PREFETCH_INTERVAL_S = float(os.getenv("AGENT_PREFETCH_INTERVAL", "600"))
+PREFETCH_WORKERS = int(os.getenv("AGENT_PREFETCH_WORKERS", "2"))
+
+log = get_logger("prefetch")
+
+WarmTask = Callable[[str], Any]
+
+
+class Prefetcher:
+    """Runs store-level warm-up tasks in the background, at most once per interval.
+
+    ``warm(store)`` is cheap enough to call on every turn: it only submits
+    work when the store was not warmed (or scheduled) within ``interval``
+    seconds. Tasks run on their own small pool without a turn deadline, so
+    live turns never wait on them; a turn that needs the same data while a
+    warm-up is in flight waits for it through the tools' single-flight guard.
+    Store names come from clients, so only stores ``accept`` approves (the
+    agent passes ``catalog.has_menu``) are warmed.
+    """
+
+    def __init__(
+        self,
+        tasks: Optional[List[Tuple[str, WarmTask]]] = None,
+        *,
+        enabled: bool = PREFETCH_ENABLED,
+        interval: float = PREFETCH_INTERVAL_S,
+        workers: int = PREFETCH_WORKERS,
+        max_stores: int = 1024,
+        accept: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        self.enabled = enabled
+        self._accept = accept
+        self.interval = interval
+        self._tasks: List[Tuple[str, WarmTask]] = list(tasks or [])
+        self._max_stores = max_stores
+        self._warmed: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._workers = max(1, workers)
+        self._stats = {"scheduled": 0, "skipped": 0, "rejected": 0, "failed": 0}
+
+    def add(self, name: str, task: WarmTask) -> None:
+        """Register another ``task(store)`` run on every warm-up."""
+        self._tasks.append((name, task))
+
+    def warm(self, store: Optional[str]) -> bool:
+        """Schedule the warm-up of ``store``; returns False when it was skipped."""
+        store = (store or "").strip()
+        if not (self.enabled and store and self._tasks):
+            return False
+        if self._accept is not None and not self._accept(store):
+            # 카탈로그에 없는 매장 이름으로는 웹 수집을 시작하지 않는다
+            with self._lock:
+                self._stats["rejected"] += 1
+            tracer.count("prefetch_total", result="rejected")
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._warmed.get(store)
+            if last is not None and now - last < self.interval:
+                self._stats["skipped"] += 1
+                return False
+            self._warmed[store] = now
+            self._warmed.move_to_end(store)
+            while len(self._warmed) > self._max_stores:
+                self._warmed.popitem(last=False)
+            self._stats["scheduled"] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="prefetch")
+            executor = self._executor
+        tracer.count("prefetch_total", result="scheduled")
+        executor.submit(self._run, store)
+        return True
+
+    def _run(self, store: str) -> None:
+        for name, task in list(self._tasks):
+            started = time.perf_counter()
+            try:
+                task(store)
+            except Exception:
+                with self._lock:
+                    self._stats["failed"] += 1
+                tracer.count("prefetch_total", result="failed")
+                log.warning("prefetch %s failed for %s", name, store, exc_info=True)
+                # 실패한 매장은 다음 호출 때 다시 시도
+                with self._lock:
+                    self._warmed.pop(store, None)
+            finally:
+                tracer.record(f"prefetch.{name}", time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "enabled": self.enabled, "stores": len(self._warmed)}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["Prefetcher", "PREFETCH_ENABLED", "PREFETCH_INTERVAL_S"]
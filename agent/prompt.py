@@ -1,3 +1,18 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Any, Optional, Tuple
+
+from .cache import TTLCache
+
+try:  # Optional: exact token counts when tiktoken is installed
+    import tiktoken  # type: ignore
+except ImportError:  # pragma: no cover - fall back to a rough estimate
+    tiktoken = None  # type: ignore
+
+_ENCODING: Any = None
+
 default_prompt = """
 당신은 LG 시니어 음성 주문 서비스의 점원 에이전트입니다. 고객은 음성으로만 앱을 이용하므로, 당신이 친절하게 안내하고 필요한 앱 조작을 대신 수행해야 합니다. 아래 지침을 철저히 따르세요.
 [주의] 무조건 json 형식으로만 응답하세요. JSON 외 다른 말은 하지 마세요. 응답에 대한 내용은 "speak" 필드에 담아야 합니다.
@@ -115,4 +130,103 @@ default_prompt = """
 위 지침을 항상 지키고, speak + actions (+ memory) JSON만 출력하세요.
 """
 
-__all__ = ["default_prompt"]
+
+def estimate_tokens(text: str) -> int:
+    """Token count for ``text`` (tiktoken if available, otherwise ~2 chars/token)."""
+    global _ENCODING, tiktoken
+    if not text:
+        return 0
+    if _ENCODING is None and tiktoken is not None:
+        try:
+            _ENCODING = tiktoken.get_encoding("o200k_base")
+        except Exception:  # encoding files unavailable (offline)
+            tiktoken = None
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return max(1, len(text) // 2)
+
+
+# 매장 이름은 클라이언트가 보내므로 prefix 캐시는 크기를 묶은 LRU로 둔다
+PROMPT_CACHE_SIZE = int(os.getenv("AGENT_PROMPT_CACHE_SIZE", "256"))
+PROMPT_CACHE_TTL_S = float(os.getenv("AGENT_PROMPT_CACHE_TTL", "3600"))
+
+
+class PromptBuilder:
+    """Per-store cache of the static system-prompt prefix.
+
+    The prefix (지침 → 도구 목록 → 매장 메뉴 → 형식) is rebuilt only when the
+    catalog version of the store changes, and it always comes first in the same
+    order so provider-side prompt caching can reuse it. Only the small
+    ``[상태]`` block is appended per turn.
+    """
+
+    def __init__(self, catalog: Any, tools_text: str, has_tools: bool = True, menu_limit: int = 60) -> None:
+        self._catalog = catalog
+        self._tools_text = tools_text
+        self._has_tools = has_tools
+        self._menu_limit = menu_limit
+        self._cache = TTLCache(maxsize=PROMPT_CACHE_SIZE, ttl=PROMPT_CACHE_TTL_S, name="prompt_prefix")
+
+    def prefix(self, store: str) -> Tuple[str, str, int]:
+        """Return ``(prefix, prefix_hash, prefix_tokens)`` for the store."""
+        key = (store or "").strip()
+        version = self._catalog_version(key)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2], cached[3]
+        text = self._render_prefix(key)
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+        entry = (version, text, digest, estimate_tokens(text))
+        self._cache.set(key, entry)
+        return entry[1], entry[2], entry[3]
+
+    def build(self, store: str, state_block: str) -> str:
+        prefix, _, _ = self.prefix(store)
+        return prefix + "\n\n[상태]\n" + state_block
+
+    def invalidate(self, store: Optional[str] = None) -> None:
+        if store is None:
+            self._cache.clear()
+        else:
+            self._cache.delete(store.strip())
+
+    # ------------------------------------------------------------------
+    def _catalog_version(self, store: str) -> int:
+        version = getattr(self._catalog, "version", None)
+        return int(version(store)) if callable(version) else 0
+
+    def _render_prefix(self, store: str) -> str:
+        # 메뉴 요약(이름/가격/간단 설명) - LLM이 근사 매칭/정규화에 활용하도록 제공
+        menu_items = []
+        try:
+            for m in self._catalog.list(store)[: self._menu_limit]:
+                name = getattr(m, "name", "")
+                price = getattr(m, "price", None)
+                desc = (getattr(m, "desc", "") or "").strip()
+                price_s = f" | {price}원" if isinstance(price, (int, float)) and price is not None else ""
+                if desc:
+                    desc = (desc[:36] + ("…" if len(desc) > 36 else ""))
+                    menu_items.append(f"- {name}{price_s} | {desc}")
+                else:
+                    menu_items.append(f"- {name}{price_s}")
+        except Exception:
+            pass
+        menu_block = "\n".join(menu_items)
+
+        text = (
+            default_prompt.strip()
+            + "\n\n[사용 가능한 도구]\n"
+            + (self._tools_text or "(현재 사용 가능한 도구가 없습니다)")
+            + (f"\n\n[매장 메뉴: {store}]\n" + menu_block if menu_block else "")
+            + "\n\n[형식]\n반드시 JSON만 출력하세요. 코드블록 금지."
+        )
+        # 도구가 전혀 없을 때의 가드: LLM이 답변을 포기하지 않고 재질문하도록 지시
+        if not self._has_tools:
+            text += (
+                "\n\n[도구 없음 안내]\n"
+                "현재 사용할 수 있는 도구가 없어요. 필요한 정보가 부족하면 speak에 매우 짧은 재질문을 넣고, actions는 비워두세요."
+            )
+        return text
+
+
+__all__ = ["default_prompt", "PromptBuilder", "estimate_tokens"]
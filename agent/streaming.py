@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+# 문장 경계: 마침표/물음표/느낌표(연속 포함) 뒤 공백, 또는 줄바꿈
+_SENTENCE_END = re.compile(r"[.?!。…~]+[\"')\]]*\s+|\n+")
+
+
+class SpeakExtractor:
+    """Incrementally pull the top-level ``"speak"`` string out of streamed JSON.
+
+    The model answers with ``{"speak": "...", "actions": [...], ...}``; feeding
+    the raw content deltas to :meth:`feed` returns the newly decoded part of
+    ``speak`` as soon as it arrives, long before ``actions`` is complete.
+    Everything outside the ``speak`` value is only tracked for nesting depth.
+    """
+
+    def __init__(self, key: str = "speak") -> None:
+        self.key = key
+        self.text = ""
+        self.done = False
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._str_buf: List[str] = []
+        self._last_str: Optional[str] = None
+        self._key: Optional[str] = None
+        self._in_value = False
+        self._unicode: Optional[str] = None
+        self._high: Optional[int] = None
+
+    def feed(self, chunk: str) -> str:
+        if self.done or not chunk:
+            return ""
+        out: List[str] = []
+        for ch in chunk:
+            if self._in_value:
+                if self._value_char(ch, out):
+                    break
+            elif self._in_str:
+                self._string_char(ch)
+            else:
+                self._structural_char(ch)
+        delta = "".join(out)
+        self.text += delta
+        return delta
+
+    # ------------------------------------------------------------------
+    def _structural_char(self, ch: str) -> None:
+        if ch == '"':
+            self._in_str = True
+            self._str_buf = []
+            if self._depth == 1 and self._key == self.key:
+                # "speak": 바로 뒤의 문자열 값 → 디코딩 모드
+                self._in_str = False
+                self._in_value = True
+                self._key = None
+        elif ch in "{[":
+            self._depth += 1
+            self._key = None
+        elif ch in "}]":
+            self._depth -= 1
+            self._key = None
+        elif ch == ":" and self._depth == 1:
+            self._key = self._last_str
+        elif ch == ",":
+            self._key = None
+        elif not ch.isspace() and self._depth == 1:
+            # 숫자/불리언 등 문자열이 아닌 값
+            self._key = None
+
+    def _string_char(self, ch: str) -> None:
+        if self._esc:
+            self._esc = False
+        elif ch == "\\":
+            self._esc = True
+        elif ch == '"':
+            self._in_str = False
+            self._last_str = "".join(self._str_buf) if self._depth == 1 else None
+            return
+        if self._depth == 1:
+            self._str_buf.append(ch)
+
+    def _value_char(self, ch: str, out: List[str]) -> bool:
+        """Decode one character of the speak value; True once it is closed."""
+        if self._unicode is not None:
+            self._unicode += ch
+            if len(self._unicode) < 4:
+                return False
+            try:
+                code = int(self._unicode, 16)
+            except ValueError:
+                code = 0xFFFD
+            self._unicode = None
+            if 0xD800 <= code < 0xDC00:
+                self._high = code
+                return False
+            if 0xDC00 <= code < 0xE000 and self._high is not None:
+                code = 0x10000 + ((self._high - 0xD800) << 10) + (code - 0xDC00)
+            self._high = None
+            out.append(chr(code))
+            return False
+        if self._esc:
+            self._esc = False
+            if ch == "u":
+                self._unicode = ""
+            else:
+                out.append(_SIMPLE_ESCAPES.get(ch, ch))
+            return False
+        if ch == "\\":
+            self._esc = True
+            return False
+        if ch == '"':
+            self._in_value = False
+            self.done = True
+            return True
+        out.append(ch)
+        return False
+
+
+class SentenceSplitter:
+    """Group streamed text into sentences so TTS can start on the first one."""
+
+    def __init__(self, min_chars: int = 4) -> None:
+        self.min_chars = min_chars
+        self._buf = ""
+
+    def feed(self, delta: str) -> List[str]:
+        self._buf += delta
+        out: List[str] = []
+        start = 0
+        for m in _SENTENCE_END.finditer(self._buf):
+            piece = self._buf[start:m.end()].strip()
+            if len(piece) < self.min_chars:
+                continue
+            out.append(piece)
+            start = m.end()
+        self._buf = self._buf[start:]
+        return out
+
+    def flush(self) -> List[str]:
+        rest, self._buf = self._buf.strip(), ""
+        return [rest] if rest else []
+
+
+__all__ = ["SpeakExtractor", "SentenceSplitter"]
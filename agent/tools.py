@@ -3,17 +3,32 @@ from __future__ import annotations
 
 import json
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
-from urllib.parse import quote_plus
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+from pathlib import Path
+from urllib.parse import quote_plus, urlparse
 import os
 import requests
+from requests.adapters import HTTPAdapter
+
+from . import budget
+from .cache import SqliteCacheBackend, TTLCache, normalize_key
+from .llm_openai import LLM_TIMEOUT_S
+from .tracing import get_logger, tracer
 
 try:
     from voice_mvp.backend import MenuCatalog  # type: ignore[import-not-found]
 except ModuleNotFoundError:
     from fastapi_app.menus import MenuCatalog  # type: ignore
+from fastapi_app.nutrition import NutritionFact, NutritionTable
+from fastapi_app.reviews import HighlightMatcher, MentionAutomaton, ReviewIndex
+
+log = get_logger("tools")
 
 # ─────────────────────────────────────────────────────────────
 # 실행 환경 공유(카탈로그 인젝션)
@@ -26,6 +41,88 @@ def set_catalog(catalog: MenuCatalog) -> None:
     _CURRENT_CATALOG = catalog
 
 
+# 영양 정보는 로컬 표(data/nutrition.json)에서 읽는다. 웹 검색은 선택적 백필뿐
+#   NUTRITION_PATH로 파일 위치, NUTRITION_BACKFILL=1이면 표에 없는 메뉴를 백그라운드로 검색해 채움
+_NUTRITION: Optional[NutritionTable] = None
+_NUTRITION_LOCK = threading.Lock()
+_NUTRITION_BACKFILL = os.getenv("NUTRITION_BACKFILL", "0") == "1"
+_BACKFILL_SEEN: set = set()
+# 백필은 웹 검색이므로 한 번에 대기할 수 있는 수와 매장 프리페치 한 번에 예약할 수를 묶는다
+_BACKFILL_MAX_PENDING = int(os.getenv("NUTRITION_BACKFILL_PENDING", "16"))
+_BACKFILL_PER_STORE = int(os.getenv("NUTRITION_BACKFILL_PER_STORE", "10"))
+_backfill_pending = 0
+
+
+def set_nutrition(table: NutritionTable) -> None:
+    """서버가 같은 영양 표를 추천 엔진과 공유하도록 주입."""
+    global _NUTRITION
+    _NUTRITION = table
+
+
+def _nutrition_table() -> NutritionTable:
+    global _NUTRITION
+    if _NUTRITION is None:
+        with _NUTRITION_LOCK:
+            if _NUTRITION is None:
+                default = Path(__file__).resolve().parents[1] / "data" / "nutrition.json"
+                _NUTRITION = NutritionTable(Path(os.getenv("NUTRITION_PATH") or default))
+    return _NUTRITION
+
+
+# ─────────────────────────────────────────────────────────────
+# 웹 수집 결과 캐시 (TTL + LRU, 선택적으로 sqlite 영속화)
+#   TOOL_CACHE_PATH=data/tool_cache.sqlite3 처럼 지정하면 재시작 후에도 유지
+# ─────────────────────────────────────────────────────────────
+_CACHE_TTL_S = float(os.getenv("TOOL_CACHE_TTL", "1800"))
+_NEGATIVE_TTL_S = 60.0  # 빈 결과(네트워크 실패 등)는 짧게만 기억
+_CACHE_BACKEND: Optional[SqliteCacheBackend] = None
+if os.getenv("TOOL_CACHE_PATH"):
+    try:
+        _CACHE_BACKEND = SqliteCacheBackend(Path(os.environ["TOOL_CACHE_PATH"]))
+    except Exception:
+        _CACHE_BACKEND = None
+
+_SEARCH_CACHE = TTLCache(maxsize=512, ttl=_CACHE_TTL_S, backend=_CACHE_BACKEND, name="ddg_search")
+_REVIEW_CACHE = TTLCache(maxsize=256, ttl=_CACHE_TTL_S, backend=_CACHE_BACKEND, name="reviews")
+# 추천 보강 단계가 쓰는 리뷰 검색 크기 (프리페치도 같은 캐시 키를 데우도록 공유)
+ENRICH_MAX_RESULTS = 8
+# 웹/LLM을 부르는 도구: 에이전트가 로컬 도구와 다른 워커 풀에서 돌려 느린 수집이 가벼운 도구를 막지 않게 함
+NETWORK_TOOLS = frozenset({"reviews", "recommend"})
+_FOLLOWER_WAIT_S = 10.0
+
+_INFLIGHT: Dict[Hashable, threading.Event] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+@contextmanager
+def _single_flight(key: Hashable) -> Iterator[bool]:
+    """같은 수집이 이미 진행 중이면(예: 프리페치) 끝나길 기다린다.
+
+    ``True``를 받으면 직접 수집하고, ``False``면 다른 스레드의 수집이 끝났거나
+    기다림이 턴 예산을 넘긴 것이므로 캐시를 다시 보고 없을 때만 수집한다.
+    """
+    with _INFLIGHT_LOCK:
+        event = _INFLIGHT.get(key)
+        leader = event is None
+        if leader:
+            event = _INFLIGHT[key] = threading.Event()
+    if not leader:
+        event.wait(budget.clamp(_FOLLOWER_WAIT_S))
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
+        event.set()
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """도구 캐시별 hit/miss 카운터."""
+    return {c.name: c.stats() for c in (_SEARCH_CACHE, _REVIEW_CACHE)}
+
+
 # ─────────────────────────────────────────────────────────────
 # HTTP 유틸 (간단/보수적으로)
 # ─────────────────────────────────────────────────────────────
@@ -35,17 +132,148 @@ _UA = (
     "Chrome/123.0 Safari/537.36"
 )
 
-def _get(url: str, timeout: int = 8) -> Optional[str]:
-    try:
-        r = requests.get(url, headers={"User-Agent": _UA}, timeout=timeout)
+_HTTP_POOL_SIZE = int(os.getenv("TOOL_HTTP_POOL", "16"))
+_FETCH_CONCURRENCY = int(os.getenv("TOOL_FETCH_CONCURRENCY", "8"))
+_PER_HOST_CONCURRENCY = int(os.getenv("TOOL_FETCH_PER_HOST", "4"))
+_PER_HOST_INTERVAL_S = 0.05  # 같은 호스트로 나가는 요청 시작 간격(매너 지연)
+_MIN_FETCH_S = 0.3  # 턴 예산이 이보다 적게 남으면 요청을 보내지 않는다
+# 첫 요청 + 재시도 2번, 지수 백오프 (Retry-After가 있으면 그만큼). 매 시도 전에 남은 예산을 다시 본다
+_FETCH_ATTEMPTS = 3
+_RETRY_BACKOFF_S = 0.3
+_RETRY_STATUS = frozenset((429, 500, 502, 503, 504))
+
+_HTTP_SESSION: Optional[requests.Session] = None
+_HTTP_SESSION_LOCK = threading.Lock()
+_FETCH_SLOTS = threading.BoundedSemaphore(_FETCH_CONCURRENCY)
+_FETCH_EXECUTOR = ThreadPoolExecutor(max_workers=_FETCH_CONCURRENCY, thread_name_prefix="tool-fetch")
+
+
+def _http() -> requests.Session:
+    """keep-alive 커넥션 풀을 쓰는 공유 세션 (재시도는 _get이 턴 예산을 보며 직접 한다)."""
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        with _HTTP_SESSION_LOCK:
+            if _HTTP_SESSION is None:
+                adapter = HTTPAdapter(
+                    pool_connections=_HTTP_POOL_SIZE,
+                    pool_maxsize=_PER_HOST_CONCURRENCY,
+                    max_retries=0,
+                )
+                session = requests.Session()
+                session.headers.update({"User-Agent": _UA})
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _HTTP_SESSION = session
+    return _HTTP_SESSION
+
+
+class _HostGate:
+    """호스트별 동시 요청 수 제한 + 요청 시작 간격 보장."""
+
+    def __init__(self, limit: int, interval: float) -> None:
+        self._limit = max(1, limit)
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_at: Dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, url: str, patience: Optional[float] = None):
+        """``patience`` 초 안에 차례가 오지 않으면 TimeoutError (None이면 무한 대기)."""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            sem = self._slots.setdefault(host, threading.BoundedSemaphore(self._limit))
+        if not sem.acquire(timeout=patience):
+            raise TimeoutError(f"no fetch slot for {host}")
+        try:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_at.get(host, 0.0))
+                if patience is not None and start - now > patience:
+                    raise TimeoutError(f"no fetch slot for {host}")
+                self._next_at[host] = start + self._interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+        finally:
+            sem.release()
+
+
+_HOST_GATE = _HostGate(_PER_HOST_CONCURRENCY, _PER_HOST_INTERVAL_S)
+
+
+def _get(url: str, timeout: float = 8) -> Optional[str]:
+    r: Optional[requests.Response] = None
+    for attempt in range(_FETCH_ATTEMPTS):
+        if attempt:
+            pause = _retry_pause(attempt, r)
+            # 쉬고 나서 한 번 더 보낼 예산이 없으면 재시도하지 않는다
+            if budget.clamp(pause + _MIN_FETCH_S) < pause + _MIN_FETCH_S:
+                tracer.count("budget_skips_total", what="fetch_retry")
+                return None
+            time.sleep(pause)
+        try:
+            r = _get_once(url, timeout)
+        except requests.RequestException:
+            r = None
+            continue
+        except Exception:
+            return None
+        if r is None:
+            return None  # 예산 부족으로 보내지 않음
+        if r.status_code in _RETRY_STATUS:
+            continue
         if r.ok and "text/html" in (r.headers.get("Content-Type") or ""):
             r.encoding = r.apparent_encoding  # 한글 보정
             return r.text
-    except Exception:
         return None
     return None
 
 
+def _get_once(url: str, timeout: float) -> Optional[requests.Response]:
+    # 턴 예산 안에서만 기다림: 남은 시간이 부족하면 요청 자체를 건너뛴다
+    timeout = budget.clamp(timeout)
+    if timeout < _MIN_FETCH_S or not _FETCH_SLOTS.acquire(timeout=budget.remaining()):
+        tracer.count("budget_skips_total", what="fetch")
+        return None
+    try:
+        with _HOST_GATE.slot(url, patience=budget.remaining()):
+            return _http().get(url, timeout=budget.clamp(timeout))
+    finally:
+        _FETCH_SLOTS.release()
+
+
+def _retry_pause(attempt: int, r: Optional[requests.Response]) -> float:
+    pause = _RETRY_BACKOFF_S * (2 ** (attempt - 1))
+    retry_after = (r.headers.get("Retry-After") or "").strip() if r is not None else ""
+    if retry_after.isdigit():
+        pause = max(pause, float(retry_after))
+    return pause
+
+
+def _fetch_many(urls: List[str], timeout: float = 8) -> List[Optional[str]]:
+    """여러 페이지를 동시에 가져온다. 전체 지연은 가장 느린 페이지에 수렴.
+
+    턴 예산이 걸려 있으면 마감까지 도착한 페이지만 돌려주고 나머지는 None.
+    """
+    if not urls:
+        return []
+    futures = [_FETCH_EXECUTOR.submit(budget.bind(_get), u, timeout) for u in urls]
+    out: List[Optional[str]] = []
+    for fut in futures:
+        try:
+            out.append(fut.result(timeout=budget.remaining()))
+        except Exception:
+            fut.cancel()
+            out.append(None)
+    return out
+
+
+def _cut_by_budget() -> bool:
+    """이번 수집이 턴 예산 때문에 잘렸을 수 있는지 (그런 결과는 오래 캐시하지 않음)."""
+    return budget.expired(_MIN_FETCH_S)
+
+
 # ─────────────────────────────────────────────────────────────
 # 1) 리뷰 수집: DuckDuckGo → 네이버/블로그/커뮤니티 링크 모음 → 스니펫 추출
 # ─────────────────────────────────────────────────────────────
@@ -79,44 +307,19 @@ def reviews(store: str, query: Optional[str] = None, max_results: int = 8,
         "sources": [{"title":str, "url":str, "snippet":str}, ...]
       }
     """
-    q = f"{store} 리뷰"
-    if query:
-        q += f" {query}"
-    # 네이버 가중치: site: 네이버 블로그/지도/카페 위주
-    q += " (site:blog.naver.com OR site:m.place.naver.com OR site:pcmap.place.naver.com OR site:cafe.naver.com)"
+    sources, texts = _collect_review_corpus(store, query, max_results, fetch_pages)
 
-    results = _ddg_search(q, max_results=max_results)
-    sources = []
-    texts = []
+    corpus = "\n".join(texts)
 
-    for title, url, snippet in results:
-        sources.append({"title": title, "url": url, "snippet": snippet})
-        base_text = f"{title}\n{snippet}"
-        texts.append(base_text)
-        if fetch_pages:
-            html = _get(url)
-            if html:
-                clean = _strip_html(html)[:2000]
-                if clean:
-                    texts.append(clean)
-        time.sleep(0.15)  # 매너 지연
-
-    # 메뉴 언급 세기
+    # 메뉴 언급 세기: 메뉴 수와 무관하게 말뭉치를 한 번만 훑는다
     mentions = []
     if menu_names:
-        joined = "\n".join(texts).lower()
-        for name in menu_names:
-            n = name.strip()
-            if not n:
-                continue
-            c = joined.count(n.lower().replace(" ", ""))
-            if c > 0:
-                mentions.append({"name": n, "count": c})
+        counts = _mention_automaton(tuple(menu_names)).mentions(corpus)
+        mentions = [{"name": n, "count": c} for n, c in counts.items()]
         mentions.sort(key=lambda x: x["count"], reverse=True)
         mentions = mentions[:10]
 
     # 요약/하이라이트(아주 단순 규칙 기반)
-    corpus = "\n".join(texts)
     highlights = _extract_highlights_ko(corpus)
     summary = _build_summary_from_highlights(store, highlights)
 
@@ -124,12 +327,73 @@ def reviews(store: str, query: Optional[str] = None, max_results: int = 8,
         "summary": summary,
         "highlights": highlights,
         "menu_mentions": mentions,
-        "sources": sources,
+        "sources": list(sources),
     }
 
 
+@lru_cache(maxsize=64)
+def _mention_automaton(names: Tuple[str, ...]) -> MentionAutomaton:
+    return MentionAutomaton(names)
+
+
+def _collect_review_corpus(store: str, query: Optional[str], max_results: int,
+                           fetch_pages: bool) -> Tuple[List[Dict[str, str]], List[str]]:
+    """검색 + (선택) 본문 수집 결과를 (sources, texts)로 반환. 매장/검색어 단위로 캐시."""
+    key = ("reviews", normalize_key(store), normalize_key(query), int(max_results), bool(fetch_pages))
+    cached = _REVIEW_CACHE.get(key)
+    if cached is not None:
+        return cached[0], cached[1]
+    with _single_flight(key) as leader:
+        if not leader:
+            cached = _REVIEW_CACHE.get(key)
+            if cached is not None:
+                return cached[0], cached[1]
+        return _collect_review_corpus_uncached(key, store, query, max_results, fetch_pages)
+
+
+def _collect_review_corpus_uncached(key: Hashable, store: str, query: Optional[str], max_results: int,
+                                    fetch_pages: bool) -> Tuple[List[Dict[str, str]], List[str]]:
+    q = f"{store} 리뷰"
+    if query:
+        q += f" {query}"
+    # 네이버 가중치: site: 네이버 블로그/지도/카페 위주
+    q += " (site:blog.naver.com OR site:m.place.naver.com OR site:pcmap.place.naver.com OR site:cafe.naver.com)"
+
+    results = _ddg_search(q, max_results=max_results)
+    sources = []
+    texts = []
+    pages = _fetch_many([url for _, url, _ in results]) if fetch_pages else [None] * len(results)
+
+    for (title, url, snippet), html in zip(results, pages):
+        sources.append({"title": title, "url": url, "snippet": snippet})
+        base_text = f"{title}\n{snippet}"
+        texts.append(base_text)
+        if html:
+            clean = _strip_html(html)[:2000]
+            if clean:
+                texts.append(clean)
+
+    partial = fetch_pages and None in pages and _cut_by_budget()
+    _REVIEW_CACHE.set(key, (sources, texts), ttl=None if sources and not partial else _NEGATIVE_TTL_S)
+    return sources, texts
+
+
 def _ddg_search(query: str, max_results: int = 8) -> List[Tuple[str, str, str]]:
     """DuckDuckGo HTML 결과를 파싱해 (title, url, snippet) 리스트를 반환."""
+    key = ("ddg", normalize_key(query), int(max_results))
+    cached = _SEARCH_CACHE.get(key)
+    if cached is not None:
+        return [tuple(row) for row in cached]  # type: ignore[misc]
+    out = _ddg_search_uncached(query, max_results)
+    if out:
+        _SEARCH_CACHE.set(key, out)
+    elif not _cut_by_budget():
+        # 예산에 걸려 못 가져온 빈 결과는 기억하지 않는다 (다음 턴에 다시 시도)
+        _SEARCH_CACHE.set(key, out, ttl=_NEGATIVE_TTL_S)
+    return out
+
+
+def _ddg_search_uncached(query: str, max_results: int) -> List[Tuple[str, str, str]]:
     url = f"https://duckduckgo.com/html/?q={quote_plus(query)}"
     html = _get(url)
     if not html:
@@ -150,17 +414,17 @@ def _ddg_search(query: str, max_results: int = 8) -> List[Tuple[str, str, str]]:
 # ─────────────────────────────────────────────────────────────
 # 2) 영양 정보 간이 조회: 검색 스니펫에서 kcal/나트륨/당/단백질 수치 추정
 # ─────────────────────────────────────────────────────────────
-def nutrition(name: str) -> Dict[str, Any]:
+def nutrition(name: str, store: Optional[str] = None) -> Dict[str, Any]:
     """
-    메뉴/제품명으로 kcal/나트륨/당/단백질 수치를 검색 스니펫/페이지에서 추정합니다.
-    신뢰도는 낮을 수 있으며, 정확 표는 'unknown'으로 반환합니다.
+    메뉴/제품명으로 kcal/나트륨/당/단백질과 태그(저염/저당/단백질)를 로컬 영양 표에서 조회합니다.
+    표에 없는 메뉴는 수치를 null로 반환합니다.
 
     TOOL_SPEC={
       "name": "nutrition",
-      "description": "메뉴명으로 kcal/sodium/sugar/protein을 추정해 태그(저염/저당/단백질)를 부여합니다.",
+      "description": "메뉴명으로 kcal/sodium/sugar/protein과 태그(저염/저당/단백질)를 조회합니다.",
       "parameters": {
         "type": "object",
-        "properties": { "name": { "type": "string" } },
+        "properties": { "name": { "type": "string" }, "store": { "type": "string" } },
         "required": ["name"]
       }
     }
@@ -174,45 +438,89 @@ def nutrition(name: str) -> Dict[str, Any]:
         "tags": [str,...]       # ["저염","저당","단백질"] 등 조건부
       }
     """
+    table = _nutrition_table()
+    fact = table.get(name, store)
+    if fact is not None:
+        return {**fact.to_api(), "name": name}
+    if _NUTRITION_BACKFILL:
+        _schedule_backfill(name, store)
+    return NutritionFact(name=name).to_api()
+
+
+def _schedule_backfill(name: str, store: Optional[str]) -> bool:
+    """Queue a web backfill for ``name``; False when already done/queued or the queue is full."""
+    global _backfill_pending
+    key = normalize_key(name).replace(" ", "")
+    with _NUTRITION_LOCK:
+        if key in _BACKFILL_SEEN:
+            return False
+        if _backfill_pending >= _BACKFILL_MAX_PENDING:
+            # 가득 차면 표시하지 않고 넘김: 다음 조회/프리페치 때 다시 예약될 수 있다
+            tracer.count("budget_skips_total", what="backfill")
+            return False
+        _BACKFILL_SEEN.add(key)
+        _backfill_pending += 1
+    _FETCH_EXECUTOR.submit(_run_backfill, name, store)
+    return True
+
+
+def _run_backfill(name: str, store: Optional[str]) -> None:
+    global _backfill_pending
+    try:
+        _backfill_nutrition(name, store)
+    finally:
+        with _NUTRITION_LOCK:
+            _backfill_pending -= 1
+
+
+def _backfill_nutrition(name: str, store: Optional[str]) -> Optional[NutritionFact]:
+    """검색 스니펫에서 수치를 추정해 표에 추가 (신뢰도 낮음: source="web")."""
+    try:
+        fact = _scrape_nutrition(name, store)
+        if not fact.known:
+            return None
+        table = _nutrition_table()
+        table.upsert([fact])
+        if table.path is not None:
+            table.save()
+        return fact
+    except Exception:
+        return None
+
+
+def _scrape_nutrition(name: str, store: Optional[str] = None) -> NutritionFact:
     q = f"{name} 칼로리 나트륨 당 단백질"
     res = _ddg_search(q, max_results=5)
     blob = " ".join([f"{t} {s}" for t, _, s in res])
-
-    kcal = _first_int(re.findall(r"(\d{2,4})\s*kcal", blob))
-    sodium = _first_int(re.findall(r"나트륨\s*([\d,]{2,6})\s*mg", blob))
-    sugar = _first_int(re.findall(r"(당류|당)\s*([\d,]{1,4})\s*g", blob))
-    protein = _first_int(re.findall(r"(단백질)\s*([\d,]{1,4})\s*g", blob))
-    tags = []
-    if sodium is not None and sodium <= 700:
-        tags.append("저염")
-    if sugar is not None and sugar <= 8:
-        tags.append("저당")
-    if protein is not None and protein >= 15:
-        tags.append("단백질")
-
-    return {
+    return NutritionFact.from_dict({
         "name": name,
-        "kcal": kcal,
-        "sodium_mg": sodium,
-        "sugar_g": sugar,
-        "protein_g": protein,
-        "tags": tags,
-    }
+        "store": store or "",
+        "kcal": _first_int(re.findall(r"(\d{2,4})\s*kcal", blob)),
+        "sodium_mg": _first_int(re.findall(r"나트륨\s*([\d,]{2,6})\s*mg", blob)),
+        "sugar_g": _first_int(re.findall(r"(?:당류|당)\s*([\d,]{1,4})\s*g", blob)),
+        "protein_g": _first_int(re.findall(r"단백질\s*([\d,]{1,4})\s*g", blob)),
+        "source": "web",
+    })
 
 
 # ─────────────────────────────────────────────────────────────
 # 3) 카탈로그/결제/장소 (로컬)
 # ─────────────────────────────────────────────────────────────
-def catalog_list(store: str) -> List[Dict[str, Any]]:
+def catalog_list(store: str, allergies: Optional[List[str]] = None,
+                 dislikes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     """
-    매장의 메뉴 카탈로그를 반환합니다.
+    매장의 메뉴 카탈로그를 반환합니다. 알레르기/비선호를 주면 해당 메뉴를 뺀 목록을 반환합니다.
 
     TOOL_SPEC={
       "name": "catalog_list",
-      "description": "해당 매장의 전체 메뉴/가격/설명을 반환합니다.",
+      "description": "해당 매장의 전체 메뉴/가격/설명을 반환합니다. allergies/dislikes를 주면 해당 재료·키워드가 든 메뉴는 제외합니다.",
       "parameters": {
         "type": "object",
-        "properties": {"store": {"type": "string"}},
+        "properties": {
+          "store": {"type": "string"},
+          "allergies": {"type": "array", "items": {"type": "string"}},
+          "dislikes": {"type": "array", "items": {"type": "string"}}
+        },
         "required": ["store"]
       }
     }
@@ -221,8 +529,8 @@ def catalog_list(store: str) -> List[Dict[str, Any]]:
     if not _CURRENT_CATALOG:
         return []
     return [
-        {"id": m.id, "name": m.name, "price": m.price, "desc": getattr(m, "desc", "")}
-        for m in _CURRENT_CATALOG.list(store)
+        {"id": m.id or m.name, "name": m.name, "price": m.price, "desc": getattr(m, "desc", "")}
+        for m in _CURRENT_CATALOG.filter(store, allergies or (), dislikes or ())
     ]
 
 
@@ -249,7 +557,7 @@ def pay(store: str, names: List[str]) -> Dict[str, Any]:
     items = []
     amount = 0
     for n in names or []:
-        m = _CURRENT_CATALOG.find(store, n)
+        m = _CURRENT_CATALOG.resolve(store, n)
         if not m:
             continue
         price = int(m.price or 0)
@@ -279,75 +587,6 @@ def place(store: str) -> Dict[str, Any]:
 # ─────────────────────────────────────────────────────────────
 # 4) 추천 집계(reviews + nutrition + catalog)
 # ─────────────────────────────────────────────────────────────
-# def recommend(store: str, top_n: int = 3, profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-#     """
-#     리뷰 언급과 간단 영양 태그, 선호/비선호/알레르리를 고려해 상위 N개 추천.
-
-#     TOOL_SPEC={
-#       "name": "recommend",
-#       "description": "리뷰/영양/프로필(선호·비선호·알레르기)을 고려해 상위 N개 메뉴를 추천합니다.",
-#       "parameters": {
-#         "type": "object",
-#         "properties": {
-#           "store": {"type": "string"},
-#           "top_n": {"type": "integer", "minimum": 1, "maximum": 5, "default": 3},
-#           "profile": {"type": "object"}
-#         },
-#         "required": ["store"]
-#       }
-#     }
-#     Returns: {"items": [{"name": str, "reason": str}], "debug": {...}}
-#     """
-#     if not _CURRENT_CATALOG:
-#         return {"items": []}
-
-#     try:
-#         prof = profile or {}
-#         prefers = {str(x).lower() for x in (prof.get("prefers") or [])}
-#         dislikes = {str(x).lower() for x in (prof.get("dislikes") or [])}
-#         allergies = {str(x).lower() for x in (prof.get("allergies") or [])}
-
-#         items = _CURRENT_CATALOG.list(store)
-#         names = [m.name for m in items]
-#         rev = reviews(store=store, menu_names=names, max_results=8, fetch_pages=False)
-#         mention_map = {str(x.get("name", "")).replace(" ", "").lower(): int(x.get("count", 0) or 0) for x in (rev.get("menu_mentions") or [])}
-
-#         def score(m) -> float:
-#             s = 0.0
-#             nm = m.name.replace(" ", "").lower()
-#             desc = str(getattr(m, "desc", "")).lower()
-#             # review boost
-#             s += 0.6 * mention_map.get(nm, 0)
-#             # prefers/dislikes
-#             if any(p in desc for p in prefers):
-#                 s += 0.5
-#             if any(d in desc for d in dislikes):
-#                 s -= 0.5
-#             # allergies block (if mentioned in desc)
-#             if any(a in desc for a in allergies):
-#                 s -= 2.0
-#             return s
-
-#         ranked = sorted(items, key=score, reverse=True)
-#         out: List[Dict[str, Any]] = []
-#         for m in ranked:
-#             if len(out) >= int(top_n or 3):
-#                 break
-#             nm = m.name
-#             desc = str(getattr(m, "desc", ""))
-#             mention = mention_map.get(nm.replace(" ", "").lower(), 0)
-#             tag = []
-#             if prefers and any(p in desc.lower() for p in prefers):
-#                 tag.append("선호")
-#             if mention:
-#                 tag.append(f"리뷰 언급 {mention}회")
-#             reason = " · ".join(tag) if tag else (desc[:24] + ("…" if len(desc) > 24 else ""))
-#             out.append({"name": nm, "reason": reason})
-
-#         return {"items": out, "debug": {"mentions": mention_map}}
-#     except Exception:
-#         return {"items": []}
-
 # ─────────────────────────────────────────────────────────────
 # LLM 기반 사랑스러운 구어체 추천 (Azure OpenAI) - 문자열 반환
 # ─────────────────────────────────────────────────────────────
@@ -397,41 +636,43 @@ _USER_MENUS = [
     {"store": "네네치킨", "category": "치킨", "menu": "스노윙치킨", "user": "이수빈"},
 ]
  
-def _classify_rating(r: int) -> str:
-    if r >= 4:
-        return "positive"
-    if r <= 2:
-        return "negative"
-    return "neutral"
- 
+_REVIEW_INDEX: Optional[ReviewIndex] = None
+_REVIEW_INDEX_LOCK = threading.Lock()
+
+
+def _review_index() -> ReviewIndex:
+    """별점 리뷰 집계 인덱스 (처음 쓸 때 한 번 적재, 이후 add로 증분 갱신)."""
+    global _REVIEW_INDEX
+    if _REVIEW_INDEX is None:
+        with _REVIEW_INDEX_LOCK:
+            if _REVIEW_INDEX is None:
+                index = ReviewIndex()
+                index.extend(_MCD_REVIEWS)
+                _REVIEW_INDEX = index
+    return _REVIEW_INDEX
+
+
 def _aggregate_reviews(store: str):
-    rows = [r for r in _MCD_REVIEWS if r["store"] == store]
-    by_menu = {}
-    for r in rows:
-        m = r["menu"]
-        bucket = by_menu.setdefault(m, {"menu": m, "ratings": [], "positive": 0, "neutral": 0, "negative": 0, "samples": []})
-        bucket["ratings"].append(r["rating"])
-        sent = _classify_rating(r["rating"])
-        bucket[sent] += 1
-        if len(bucket["samples"]) < 2:
-            bucket["samples"].append(r["review"])
-    menus = []
-    for m, info in by_menu.items():
-        avg = sum(info["ratings"]) / len(info["ratings"])
-        info["avg_rating"] = round(avg, 2)
-        diff = info["positive"] - info["negative"]
-        info["score"] = diff * 2 + avg * 0.3
-        del info["ratings"]
-        menus.append(info)
-    menus.sort(key=lambda x: (-x["score"], -x["avg_rating"], -x["positive"]))
-    overall = {
-        "count": len(rows),
-        "positive": sum(1 for r in rows if _classify_rating(r["rating"]) == "positive"),
-        "neutral": sum(1 for r in rows if _classify_rating(r["rating"]) == "neutral"),
-        "negative": sum(1 for r in rows if _classify_rating(r["rating"]) == "negative"),
-        "menus": menus[:20]
-    }
-    return overall
+    return _review_index().aggregate(store)
+
+
+def warm_store(store: str) -> None:
+    """추천 턴이 쓸 데이터를 미리 채운다 (프리페치 작업).
+
+    - 추천 보강과 같은 키의 리뷰 말뭉치 (웹 검색)
+    - 별점 리뷰 집계
+    - 영양 표에 없는 메뉴의 백필 예약 (NUTRITION_BACKFILL=1일 때만, 한 번에 최대 _BACKFILL_PER_STORE개)
+    """
+    _collect_review_corpus(store, None, ENRICH_MAX_RESULTS, False)
+    _aggregate_reviews(store)
+    if _NUTRITION_BACKFILL and _CURRENT_CATALOG is not None:
+        table = _nutrition_table()
+        scheduled = 0
+        for item in _CURRENT_CATALOG.list(store):
+            if scheduled >= _BACKFILL_PER_STORE:
+                break
+            if table.get(item.name, store) is None and _schedule_backfill(item.name, store):
+                scheduled += 1
  
 def _fallback_text(store: str, top_items, tone: str = "customer") -> str:
     if not top_items:
@@ -543,10 +784,15 @@ def recommend(store: str, user: Optional[str] = None, top_n: int = 3,
             azure_key = os.getenv("AZURE_OPENAI_KEY")
             api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
             deployment = model or os.getenv("AZURE_OPENAI_DEPLOYMENT") or "gpt-4o-mini"
+            # 턴 예산 안에서만: 창이 닫힌 뒤에도 워커를 붙잡지 않도록 시간 제한을 걸고 재시도는 하지 않는다
+            timeout = budget.clamp(LLM_TIMEOUT_S)
+            if timeout < _MIN_FETCH_S:
+                raise TimeoutError("turn budget exhausted")
             client = AzureOpenAI(
                 api_key=azure_key,
                 api_version=api_version,
                 azure_endpoint=azure_endpoint,
+                max_retries=0 if budget.remaining() is not None else 2,
             )
             resp = client.chat.completions.create(
                 model=deployment,
@@ -554,9 +800,10 @@ def recommend(store: str, user: Optional[str] = None, top_n: int = 3,
                 temperature=0.4,
                 max_tokens=420,
                 top_p=0.9,
+                timeout=timeout,
             )
             text = (resp.choices[0].message.content or "").strip()
-            print(f"[recommend] : {text}")
+            log.debug("recommend: %s", text)
             # 형식 방어: JSON/목록/기호 제거
             if text.startswith("{") or text.startswith("["):
                 text = re.sub(r"[{}\[\]]", " ", text)
@@ -694,7 +941,7 @@ def _first_int(groups: List[str]) -> Optional[int]:
             continue
     return None
 
-_HIGHLIGHT_PATTERNS = [
+_HIGHLIGHTS = HighlightMatcher([
     (r"친절|서비스", "친절한 서비스"),
     (r"부드럽|연하다", "부드러운 식감"),
     (r"가성비|가격", "가격 만족"),
@@ -702,15 +949,10 @@ _HIGHLIGHT_PATTERNS = [
     (r"대기|줄|혼잡", "대기 있을 수 있음"),
     (r"맵다|매콤|자극", "자극 있는 맛"),
     (r"깔끔|청결", "매장 깔끔"),
-]
+])
 
 def _extract_highlights_ko(corpus: str) -> List[str]:
-    corpus = corpus or ""
-    found: List[str] = []
-    for pat, label in _HIGHLIGHT_PATTERNS:
-        if re.search(pat, corpus):
-            found.append(label)
-    return found[:6]
+    return _HIGHLIGHTS.labels(corpus or "", limit=6)
 
 def _build_summary_from_highlights(store: str, hl: List[str]) -> str:
     if not hl:
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import contextvars
+import functools
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+# ---------------------------------------------------------------------------
+# Logging: 레벨은 AGENT_LOG_LEVEL, 턴 단위 info 로그는 AGENT_LOG_SAMPLE 비율만 남김
+# ---------------------------------------------------------------------------
+LOG_LEVEL = (os.getenv("AGENT_LOG_LEVEL") or "INFO").upper()
+LOG_SAMPLE = float(os.getenv("AGENT_LOG_SAMPLE", "1.0"))
+
+
+class SampleFilter(logging.Filter):
+    """Drops records logged with ``extra={"sampled": True}`` except a ``rate`` fraction."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False) or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the ``voice`` hierarchy; the first call configures the root handler."""
+    root = logging.getLogger("voice")
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+        handler.addFilter(SampleFilter(LOG_SAMPLE))
+        root.addHandler(handler)
+        root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+        root.propagate = False
+    return logging.getLogger(f"voice.{name}")
+
+
+SAMPLED = {"sampled": True}
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _Summary:
+    """Count/sum plus a window of recent samples for p50/p95/p99."""
+
+    __slots__ = ("count", "total", "window")
+
+    def __init__(self, window: int) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.window: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.window.append(value)
+
+    def quantiles(self) -> Dict[float, float]:
+        ordered = sorted(self.window)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        last = len(ordered) - 1
+        return {q: ordered[min(last, int(round(q * last)))] for q in QUANTILES}
+
+
+@dataclass
+class Trace:
+    """Spans of one request, used for the ``Server-Timing`` header."""
+
+    route: str
+    started: float = field(default_factory=time.perf_counter)
+    spans: List[Tuple[str, float]] = field(default_factory=list)
+    tokens: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans.append((name, seconds))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """``name;dur=ms`` per span kind (summed), then ``total``."""
+        totals: Dict[str, Tuple[float, int]] = {}
+        for name, seconds in self.spans:
+            acc, n = totals.get(name, (0.0, 0))
+            totals[name] = (acc + seconds, n + 1)
+        parts = [
+            f'{name.replace(".", "-")};dur={acc * 1000:.1f}' + (f';desc="x{n}"' if n > 1 else "")
+            for name, (acc, n) in totals.items()
+        ]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_CURRENT: "contextvars.ContextVar[Optional[Trace]]" = contextvars.ContextVar("voice_trace", default=None)
+
+
+class Tracer:
+    """Process-wide span timings, counters and Prometheus text export.
+
+    ``span(name)`` times a block (sync or inside a coroutine), feeds the
+    ``<prefix>_span_seconds{span=...}`` summary and, when a request trace is
+    active (:meth:`trace`), appends to it for the per-request timing header.
+    """
+
+    def __init__(self, prefix: str = "voice", window: int = 2048) -> None:
+        self.prefix = prefix
+        self._window = window
+        self._summaries: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], _Summary] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._lock = Lock()
+
+    # ------------------------------------------------------------------
+    @contextmanager
+    def trace(self, route: str) -> Iterator[Trace]:
+        trace = Trace(route)
+        token = _CURRENT.set(trace)
+        try:
+            yield trace
+        finally:
+            _CURRENT.reset(token)
+            self.observe("request_seconds", trace.elapsed(), route=trace.route)
+
+    @staticmethod
+    def current() -> Optional[Trace]:
+        return _CURRENT.get()
+
+    @contextmanager
+    def span(self, name: str, trace: Optional[Trace] = None) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0, trace)
+
+    def timed(self, name: str) -> Callable[[F], F]:
+        """Decorator form of :meth:`span` for plain (sync) functions."""
+
+        def deco(fn: F) -> F:
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.span(name):
+                    return fn(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return deco
+
+    def record(self, name: str, seconds: float, trace: Optional[Trace] = None) -> None:
+        """Record a finished span (e.g. measured on a worker thread without the context)."""
+        self.observe("span_seconds", seconds, span=name)
+        trace = trace or _CURRENT.get()
+        if trace is not None:
+            trace.add(name, seconds)
+
+    def observe(self, metric: str, value: float, **labels: str) -> None:
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = _Summary(self._window)
+            summary.observe(value)
+
+    def count(self, metric: str, value: float = 1.0, **labels: str) -> None:
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def tokens(self, usage: Optional[Dict[str, Any]]) -> None:
+        """Count prompt/completion/cached tokens of one LLM reply."""
+        trace = _CURRENT.get()
+        for field_name in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+            n = int((usage or {}).get(field_name) or 0)
+            if n:
+                kind = field_name[: -len("_tokens")]
+                self.count("tokens_total", n, kind=kind)
+                if trace is not None:
+                    trace.tokens[kind] = trace.tokens.get(kind, 0) + n
+
+    # ------------------------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        """Quantiles in milliseconds per span plus counters (for JSON stats)."""
+        with self._lock:
+            spans = {
+                dict(labels).get("span") or dict(labels).get("route") or metric: {
+                    "count": s.count,
+                    **{f"p{int(q * 100)}_ms": round(v * 1000, 2) for q, v in s.quantiles().items()},
+                }
+                for (metric, labels), s in self._summaries.items()
+            }
+            counters = {
+                metric + "".join(f"[{v}]" for _, v in labels): value
+                for (metric, labels), value in self._counters.items()
+            }
+        return {"spans": spans, "counters": counters}
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            summaries = sorted(self._summaries.items())
+            counters = sorted(self._counters.items())
+        typed = set()
+        for (metric, labels), s in summaries:
+            name = f"{self.prefix}_{metric}"
+            if name not in typed:
+                lines.append(f"# TYPE {name} summary")
+                typed.add(name)
+            for q, v in s.quantiles().items():
+                lines.append(f"{name}{_labels(labels + (('quantile', str(q)),))} {v:.6f}")
+            lines.append(f"{name}_sum{_labels(labels)} {s.total:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {s.count}")
+        for (metric, labels), value in counters:
+            name = f"{self.prefix}_{metric}"
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._summaries.clear()
+            self._counters.clear()
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    def esc(value: str) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels) + "}"
+
+
+tracer = Tracer()
+
+
+__all__ = ["Tracer", "Trace", "tracer", "get_logger", "SampleFilter", "SAMPLED"]
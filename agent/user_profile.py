@@ -1,19 +1,30 @@
 from __future__ import annotations
 
+import atexit
+import heapq
 import json
+import os
+import sqlite3
+import threading
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
 from threading import RLock
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence
+
+from .cache import TTLCache
+from .tracing import get_logger
+
+log = get_logger("profile")
 
 
 @dataclass
 class SingleUserRecord:
     profile: Dict[str, Any] = field(default_factory=dict)
-    history: List[Dict[str, Any]] = field(default_factory=list)
+    history: Sequence[Dict[str, Any]] = field(default_factory=list)
 
     def to_dict(self) -> Dict[str, Any]:
-        return {"profile": self.profile, "history": self.history}
+        return {"profile": self.profile, "history": list(self.history)}
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "SingleUserRecord":
@@ -23,59 +34,434 @@ class SingleUserRecord:
         )
 
 
+@dataclass
+class OrderDigest:
+    """Incrementally maintained summary of a user's orders.
+
+    Replaces shipping the full order history into every agent turn: counts per
+    store and per (store, item) plus the last few orders, updated in O(1) per
+    recorded order.
+    """
+
+    total: int = 0
+    stores: Dict[str, int] = field(default_factory=dict)
+    items: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    recent: List[Dict[str, Any]] = field(default_factory=list)
+    recent_limit: int = 5
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        store = str(entry.get("store") or "")
+        item = str(entry.get("item") or "")
+        qty = int(entry.get("quantity") or 1)
+        self.total += 1
+        self.stores[store] = self.stores.get(store, 0) + 1
+        per_store = self.items.setdefault(store, {})
+        per_store[item] = per_store.get(item, 0) + qty
+        self.recent.append({"store": store, "item": item, "quantity": qty})
+        if len(self.recent) > self.recent_limit:
+            del self.recent[: len(self.recent) - self.recent_limit]
+
+    def favorites(self, store: Optional[str] = None, k: int = 3) -> List[Dict[str, Any]]:
+        if store:
+            counts = self.items.get(store) or {}
+        else:
+            counts = {}
+            for per_store in self.items.values():
+                for item, n in per_store.items():
+                    counts[item] = counts.get(item, 0) + n
+        top = heapq.nlargest(k, counts.items(), key=lambda kv: kv[1])
+        return [{"item": item, "count": n} for item, n in top]
+
+    def summary(self, store: Optional[str] = None) -> Dict[str, Any]:
+        """Compact view handed to the agent (favorites at ``store`` when it has any)."""
+        favorites = self.favorites(store) if store and store in self.items else self.favorites()
+        top_stores = heapq.nlargest(3, self.stores.items(), key=lambda kv: kv[1])
+        return {
+            "total": self.total,
+            "favorites": favorites,
+            "stores": [{"store": name, "count": n} for name, n in top_stores],
+            "recent": list(self.recent[-3:]),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"total": self.total, "stores": self.stores, "items": self.items, "recent": self.recent}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OrderDigest":
+        return cls(
+            total=int(data.get("total") or 0),
+            stores=dict(data.get("stores") or {}),
+            items={k: dict(v) for k, v in (data.get("items") or {}).items()},
+            recent=list(data.get("recent") or []),
+        )
+
+    @classmethod
+    def from_history(cls, history: Sequence[Dict[str, Any]]) -> "OrderDigest":
+        digest = cls()
+        for entry in history:
+            digest.add(entry)
+        return digest
+
+
+def merge_profile(profile: Dict[str, Any], patch: Dict[str, Any]) -> None:
+    """Apply a profile patch in place; list-valued traits are unioned."""
+    for k, v in (patch or {}).items():
+        if k in ("allergies", "diseases", "prefers", "dislikes"):
+            prev = list(profile.get(k) or [])
+            profile[k] = list({*prev, *(v or [])})
+        else:
+            profile[k] = v
+
+
 class SingleUserProfileStore:
-    """Simple JSON-backed store for a single user's profile + history.
+    """JSON snapshot + append-only JSONL journal for a single user's profile + history.
 
     This matches the app flow where the app is dedicated to one user/device.
+    Writes append one journal line (O(1) regardless of history length); a
+    background thread fsyncs the journal in batches and folds it back into
+    the snapshot once it grows past ``compact_after`` lines. Readers share an
+    immutable snapshot that is rebuilt only after a write (copy-on-write), so
+    the returned record must be treated as read-only.
     """
 
-    def __init__(self, path: Path) -> None:
+    def __init__(
+        self,
+        path: Path,
+        *,
+        flush_interval: float = 0.5,
+        compact_after: int = 500,
+    ) -> None:
         self._path = path
+        self._journal_path = path.with_name(path.stem + ".journal.jsonl")
         self._lock = RLock()
-        self._record = SingleUserRecord()
+        self._profile: Dict[str, Any] = {}
+        self._history: List[Dict[str, Any]] = []
+        self._snapshot: Optional[SingleUserRecord] = None
+        self._profile_snapshot: Optional[Dict[str, Any]] = None
+        self._digest = OrderDigest()
+        self._seq = 0
+        self._journal_lines = 0
+        self._dirty = False
+        self.compact_after = max(1, int(compact_after))
         self._load()
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
+        self._stop = threading.Event()
+        self._flush_interval = flush_interval
+        self._flusher = threading.Thread(target=self._flush_loop, name="profile-journal", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
 
     def _load(self) -> None:
         if not self._path.exists():
             self._path.parent.mkdir(parents=True, exist_ok=True)
-            self._path.write_text(json.dumps(self._record.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+            self._write_snapshot()
+        else:
+            try:
+                raw = json.loads(self._path.read_text(encoding="utf-8"))
+                self._profile = dict(raw.get("profile") or {})
+                self._history = list(raw.get("history") or [])
+                self._seq = int(raw.get("seq") or 0)
+            except Exception:
+                # keep defaults if corrupted
+                self._profile, self._history, self._seq = {}, [], 0
+        self._replay()
+        self._digest = OrderDigest.from_history(self._history)
+
+    def _replay(self) -> None:
+        if not self._journal_path.exists():
             return
-        try:
-            raw = json.loads(self._path.read_text(encoding="utf-8"))
-            self._record = SingleUserRecord.from_dict(raw)
-        except Exception:
-            # keep defaults if corrupted
-            self._record = SingleUserRecord()
+        good_end = 0
+        with open(self._journal_path, "rb") as fh:
+            for line in fh:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("partial line")
+                    op = json.loads(line)
+                except ValueError:
+                    break  # 마지막 줄이 기록 도중 끊긴 경우
+                good_end += len(line)
+                self._journal_lines += 1
+                seq = int(op.get("seq") or 0)
+                if seq <= self._seq:
+                    continue  # 이미 스냅샷에 반영됨 (압축 도중 중단된 경우)
+                self._apply(op)
+                self._seq = seq
+        if good_end < self._journal_path.stat().st_size:
+            # 끊긴 꼬리를 잘라 내야 이후 기록이 같은 줄에 이어 붙지 않음
+            with open(self._journal_path, "r+b") as fh:
+                fh.truncate(good_end)
+
+    def _apply(self, op: Dict[str, Any]) -> None:
+        if op.get("op") == "profile":
+            merge_profile(self._profile, op.get("patch") or {})
+            self._profile_snapshot = None
+        elif op.get("op") == "order":
+            entry = op.get("entry") or {}
+            self._history.append(entry)
+            self._digest.add(entry)
 
-    def _save(self) -> None:
+    def _append(self, op: Dict[str, Any]) -> None:
+        # caller holds the lock
+        self._seq += 1
+        op["seq"] = self._seq
+        self._apply(op)
+        self._journal.write(json.dumps(op, ensure_ascii=False) + "\n")
+        self._journal_lines += 1
+        self._dirty = True
+        self._snapshot = None
+
+    def _write_snapshot(self) -> None:
+        data = {"profile": self._profile, "history": self._history, "seq": self._seq}
         tmp = self._path.with_suffix(self._path.suffix + ".tmp")
-        tmp.write_text(json.dumps(self._record.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps(data, ensure_ascii=False, indent=2))
+            fh.flush()
+            os.fsync(fh.fileno())
         tmp.replace(self._path)
 
+    # ------------------------------------------------------------------
     def get(self) -> SingleUserRecord:
         with self._lock:
-            return SingleUserRecord.from_dict(self._record.to_dict())
+            if self._snapshot is None:
+                self._snapshot = SingleUserRecord(profile=dict(self._profile), history=tuple(self._history))
+            return self._snapshot
 
     def upsert_profile(self, patch: Dict[str, Any]) -> SingleUserRecord:
         with self._lock:
-            for k, v in (patch or {}).items():
-                if k in ("allergies", "diseases", "prefers", "dislikes"):
-                    prev = list(self._record.profile.get(k) or [])
-                    merged = list({*prev, *(v or [])})
-                    self._record.profile[k] = merged
-                else:
-                    self._record.profile[k] = v
-            self._save()
-            return SingleUserRecord.from_dict(self._record.to_dict())
-
-    def add_order(self, *, store: str, item: str, quantity: int) -> SingleUserRecord:
+            self._append({"op": "profile", "patch": dict(patch or {})})
+            return self.get()
+
+    def add_order(self, *, store: str, item: str, quantity: int) -> Dict[str, Any]:
+        """Record one order and return the stored entry (no snapshot is built)."""
+        entry = {"store": store, "item": item, "quantity": int(quantity)}
+        with self._lock:
+            self._append({"op": "order", "entry": entry})
+        return entry
+
+    def profile(self) -> Dict[str, Any]:
+        """Read-only profile snapshot; unlike :meth:`get` it ignores order writes."""
+        with self._lock:
+            if self._profile_snapshot is None:
+                self._profile_snapshot = dict(self._profile)
+            return self._profile_snapshot
+
+    def history(self) -> Sequence[Dict[str, Any]]:
+        return self.get().history
+
+    def digest(self, store: Optional[str] = None) -> Dict[str, Any]:
+        """Compact order summary for the agent (see :class:`OrderDigest`)."""
+        with self._lock:
+            return self._digest.summary(store)
+
+    # ------------------------------------------------------------------
+    def flush(self) -> None:
+        """Push buffered journal lines to disk (one fsync per batch)."""
+        with self._lock:
+            if not self._dirty or self._journal.closed:
+                return
+            self._journal.flush()
+            self._dirty = False
+            fd = self._journal.fileno()
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+
+    def compact(self) -> None:
+        """Fold the journal into the snapshot file and start a fresh journal."""
+        with self._lock:
+            if self._journal.closed:
+                return
+            self._journal.flush()
+            self._write_snapshot()
+            # 스냅샷이 먼저 교체되므로 여기서 중단돼도 seq로 중복 적용을 막음
+            self._journal.close()
+            self._journal = open(self._journal_path, "w", encoding="utf-8")
+            self._journal_lines = 0
+            self._dirty = False
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
+        with self._lock:
+            if not self._journal.closed:
+                self._journal.close()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self._flush_interval):
+            try:
+                self.flush()
+                if self._journal_lines >= self.compact_after:
+                    self.compact()
+            except Exception as exc:  # pragma: no cover - disk errors
+                log.warning("profile journal flush failed: %s", exc)
+
+
+class MultiUserProfileStore:
+    """sqlite-backed profiles + order history for many users (one backend, many kiosks).
+
+    Orders are indexed on ``(user_id, store, id)`` so "recent orders for a user
+    at a store" is an index range scan; profiles of recently seen users stay
+    in a bounded TTL/LRU cache (other workers' edits show up within ``cache_ttl``).
+    """
+
+    def __init__(self, path: Path, *, cache_size: int = 1024, cache_ttl: float = 60.0) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = RLock()
+        self._conn = sqlite3.connect(str(self._path), check_same_thread=False, timeout=5.0)
+        self._profiles = TTLCache(maxsize=cache_size, ttl=cache_ttl, name="user_profiles")
+        self._digests = TTLCache(maxsize=cache_size, ttl=cache_ttl, name="user_digests")
+        with self._lock:
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id TEXT PRIMARY KEY,
+                    profile TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS orders (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    store TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    ts REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS orders_user ON orders (user_id, id);
+                CREATE INDEX IF NOT EXISTS orders_user_store ON orders (user_id, store, id);
+                CREATE TABLE IF NOT EXISTS order_digests (
+                    user_id TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL
+                );
+                """
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    def get_profile(self, user_id: str) -> Dict[str, Any]:
+        """Profile dict for ``user_id`` (shared cached object: treat as read-only)."""
+        cached = self._profiles.get(user_id)
+        if cached is not None:
+            return cached
+        with self._lock:
+            row = self._conn.execute("SELECT profile FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        try:
+            profile = json.loads(row[0]) if row else {}
+        except ValueError:
+            profile = {}
+        self._profiles.set(user_id, profile)
+        return profile
+
+    def upsert_profile(self, user_id: str, patch: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT profile FROM users WHERE user_id = ?", (user_id,)).fetchone()
+            profile = json.loads(row[0]) if row else {}
+            merge_profile(profile, patch or {})
+            self._conn.execute(
+                "INSERT OR REPLACE INTO users (user_id, profile, updated_at) VALUES (?, ?, ?)",
+                (user_id, json.dumps(profile, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+        self._profiles.set(user_id, profile)
+        return profile
+
+    def add_order(self, user_id: str, *, store: str, item: str, quantity: int) -> Dict[str, Any]:
         entry = {"store": store, "item": item, "quantity": int(quantity)}
         with self._lock:
-            self._record.history.append(entry)
-            self._save()
-            return SingleUserRecord.from_dict(self._record.to_dict())
+            # 요약은 주문과 같은 트랜잭션에서 갱신 (읽기-수정-쓰기지만 크기는 메뉴 수에 비례)
+            digest = self._load_digest(user_id)
+            self._conn.execute(
+                "INSERT INTO orders (user_id, store, item, quantity, ts) VALUES (?, ?, ?, ?, ?)",
+                (user_id, store, item, int(quantity), time.time()),
+            )
+            digest.add(entry)
+            self._store_digest(user_id, digest)
+            self._conn.commit()
+        self._digests.set(user_id, digest)
+        return entry
+
+    def digest(self, user_id: str, store: Optional[str] = None) -> Dict[str, Any]:
+        """Compact order summary for the agent (see :class:`OrderDigest`)."""
+        cached = self._digests.get(user_id)
+        if cached is None:
+            with self._lock:
+                cached = self._load_digest(user_id)
+            self._digests.set(user_id, cached)
+        with self._lock:
+            return cached.summary(store)
 
-    def history(self) -> List[Dict[str, Any]]:
+    def _load_digest(self, user_id: str) -> OrderDigest:
+        # caller holds the lock
+        row = self._conn.execute("SELECT digest FROM order_digests WHERE user_id = ?", (user_id,)).fetchone()
+        if row:
+            try:
+                return OrderDigest.from_dict(json.loads(row[0]))
+            except ValueError:
+                pass
+        # 요약이 없던 기존 데이터: 주문 기록에서 한 번만 재구성
+        rows = self._conn.execute(
+            "SELECT store, item, quantity FROM orders WHERE user_id = ? ORDER BY id", (user_id,)
+        ).fetchall()
+        return OrderDigest.from_history([{"store": r[0], "item": r[1], "quantity": r[2]} for r in rows])
+
+    def _store_digest(self, user_id: str, digest: OrderDigest) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO order_digests (user_id, digest) VALUES (?, ?)",
+            (user_id, json.dumps(digest.to_dict(), ensure_ascii=False)),
+        )
+
+    def recent_orders(self, user_id: str, store: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Newest-first orders of ``user_id`` (optionally at one ``store``)."""
+        if store:
+            sql = ("SELECT store, item, quantity FROM orders WHERE user_id = ? AND store = ? "
+                   "ORDER BY id DESC LIMIT ?")
+            args: tuple = (user_id, store, int(limit))
+        else:
+            sql = "SELECT store, item, quantity FROM orders WHERE user_id = ? ORDER BY id DESC LIMIT ?"
+            args = (user_id, int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [{"store": r[0], "item": r[1], "quantity": r[2]} for r in rows]
+
+    def history(self, user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Oldest-first order history (same shape as ``SingleUserProfileStore.history``)."""
+        return list(reversed(self.recent_orders(user_id, limit=limit)))
+
+    def import_json(self, path: Path) -> int:
+        """One-off import of ``{userId: {"profile": ..., "history": [...]}}`` if the db is empty."""
+        try:
+            raw = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return 0
+        if not isinstance(raw, dict) or not raw:
+            return 0
         with self._lock:
-            return list(self._record.history)
+            if self._conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+                return 0
+            for user_id, data in raw.items():
+                data = data if isinstance(data, dict) else {}
+                history = [o for o in data.get("history") or [] if isinstance(o, dict)]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO users (user_id, profile, updated_at) VALUES (?, ?, ?)",
+                    (str(user_id), json.dumps(data.get("profile") or {}, ensure_ascii=False), time.time()),
+                )
+                self._conn.executemany(
+                    "INSERT INTO orders (user_id, store, item, quantity, ts) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (str(user_id), str(o.get("store") or ""), str(o.get("item") or ""),
+                         int(o.get("quantity") or 1), time.time())
+                        for o in history
+                    ],
+                )
+                self._store_digest(str(user_id), OrderDigest.from_history(history))
+            self._conn.commit()
+        return len(raw)
 
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            users = self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+            orders = self._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+        return {"users": users, "orders": orders, "cache": self._profiles.stats()}
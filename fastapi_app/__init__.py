@@ -1,19 +1,27 @@
 """Domain services for the senior voice ordering backend."""
 
+from .matching import MatchCandidate, MenuMatcher
 from .menus import MenuCatalog, MenuItem
+from .nutrition import NutritionFact, NutritionTable
 from .reviews import ReviewBundle, ReviewService
-from .recommendations import RecommendationEngine
-from .speech import AzureSpeechService, SpeechResult
+from .recommendations import RecommendationEngine, ScoreWeights
+from .speech import AzureSpeechService, FakeStreamingRecognizer, SpeechResult
 from .state import ConversationStage, OrderSession
 
 __all__ = [
     "MenuCatalog",
     "MenuItem",
+    "MenuMatcher",
+    "MatchCandidate",
+    "NutritionFact",
+    "NutritionTable",
     "ReviewBundle",
     "ReviewService",
     "RecommendationEngine",
+    "ScoreWeights",
     "AzureSpeechService",
     "SpeechResult",
+    "FakeStreamingRecognizer",
     "ConversationStage",
     "OrderSession",
 ]
@@ -1,25 +1,41 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import os
 import random
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from fastapi import Body, FastAPI, HTTPException, File, UploadFile
+from fastapi import Body, FastAPI, HTTPException, File, Query, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.datastructures import MutableHeaders
 
 # ensure local imports work when running as a module
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
 from agent import VoiceOrderAgent, build_agent
-from fastapi_app.speech import AzureSpeechService
+from agent.core import llm_cache_stats
+from fastapi_app.speech import (
+    AzureSpeechService,
+    FakeStreamingRecognizer,
+    SpeechEventHandler,
+    StreamingRecognizer,
+)
 from fastapi_app.menus import MenuItem
+from fastapi_app.nutrition import NutritionTable
+from fastapi_app.recommendations import RecommendationEngine
+from fastapi_app.reviews import ReviewService
+from agent import tools as agent_tools
 from agent.llm_openai import AzureAudioTranscriber
-from agent.user_profile import SingleUserProfileStore
+from agent.tracing import SAMPLED, get_logger, tracer
+from agent.user_profile import MultiUserProfileStore, SingleUserProfileStore
 
 app = FastAPI(title="Senior Voice Agent API", version="2.0.0")
 app.add_middleware(
@@ -27,11 +43,55 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+log = get_logger("api")
+
+
+class ServerTimingMiddleware:
+    """Trace every HTTP request; spans recorded so far go out as ``Server-Timing``.
+
+    Plain ASGI (not ``@app.middleware``) so the trace stays open until the last
+    body chunk: for SSE the header covers work before the first byte, while
+    ``voice_request_seconds`` covers the whole stream.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with tracer.trace("unmatched") as trace:
+
+            async def send_with_timing(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    route = scope.get("route")
+                    trace.route = getattr(route, "path", None) or "unmatched"  # 경로 템플릿으로 라벨 수 제한
+                    MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+
+app.add_middleware(ServerTimingMiddleware)
 
 agent: VoiceOrderAgent = build_agent()
 catalog = agent.catalog
-single_user = SingleUserProfileStore(Path(__file__).resolve().parents[1] / "data" / "user_profile.json")
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+# userId 없이 들어오는 요청(전용 단말)은 단일 사용자 파일, userId가 있으면 다중 사용자 DB
+single_user = SingleUserProfileStore(DATA_DIR / "user_profile.json")
+users = MultiUserProfileStore(
+    Path(os.getenv("USER_DB_PATH") or DATA_DIR / "users.sqlite3"),
+    cache_size=int(os.getenv("USER_PROFILE_CACHE", "1024")),
+)
+users.import_json(DATA_DIR / "users.json")
+review_service = ReviewService()
+nutrition = NutritionTable(Path(os.getenv("NUTRITION_PATH") or DATA_DIR / "nutrition.json"))
+agent_tools.set_nutrition(nutrition)  # nutrition 도구도 같은 표를 읽는다
+recommender = RecommendationEngine(catalog, review_service, nutrition=nutrition)
+agent.prefetcher.add("scores", recommender.warm)
 speech_service = AzureSpeechService()
 transcriber = AzureAudioTranscriber()
 
@@ -122,6 +182,24 @@ def health() -> Dict[str, Any]:
     return {"status": "ok", "time": datetime.utcnow().isoformat() + "Z"}
 
 
+@app.get("/agent/stats")
+def agent_stats() -> Dict[str, Any]:
+    return {
+        "sessions": agent.memory.stats(),
+        "routes": agent.route_stats(),
+        "users": users.stats(),
+        "latency": tracer.snapshot(),
+        "llm_cache": llm_cache_stats(),
+        "prefetch": agent.prefetcher.stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of span/request latency summaries and counters."""
+    return PlainTextResponse(tracer.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/profile/upsert")
 def upsert_profile(profile: UserProfile) -> Dict[str, Any]:
     agent.memory.update(profile.sessionId, {"profile": profile.dict(exclude_none=True)})
@@ -131,27 +209,43 @@ def upsert_profile(profile: UserProfile) -> Dict[str, Any]:
 # ---------------- User profile/history endpoints ----------------
 @app.post("/user/profile/upsert")
 def user_profile_upsert(payload: Dict[str, Any] = Body(default_factory=dict)) -> Dict[str, Any]:
-    patch = payload.get("profile") or payload or {}
+    user_id = payload.get("userId")
+    patch = payload.get("profile") or {k: v for k, v in (payload or {}).items() if k != "userId"}
+    if user_id:
+        profile = users.upsert_profile(str(user_id), patch)
+        return {"ok": True, "user": {"profile": profile, "history": users.history(str(user_id))}}
     rec = single_user.upsert_profile(patch)
     return {"ok": True, "user": rec.to_dict()}
 
 
 @app.get("/user/profile")
-def user_profile_get() -> Dict[str, Any]:
+def user_profile_get(userId: Optional[str] = None) -> Dict[str, Any]:
+    if userId:
+        return {"profile": users.get_profile(userId), "history": users.history(userId)}
     rec = single_user.get()
     return rec.to_dict()
 
 
 @app.get("/user/history")
-def user_history_get() -> Dict[str, Any]:
+def user_history_get(userId: Optional[str] = None, store: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+    if userId:
+        return {"history": list(reversed(users.recent_orders(userId, store=store, limit=limit)))}
     return {"history": single_user.history()}
 
 
 @app.get("/api/menu")
 def get_menu(store: str) -> Dict[str, Any]:
+    # 메뉴 화면이 뜨면 곧 추천을 물을 가능성이 높으므로 미리 데워 둔다
+    agent.prefetcher.warm(store)
     return _menu_response(store)
 
 
+@app.get("/api/menu/match")
+def match_menu(store: str, q: str, limit: int = 3) -> Dict[str, Any]:
+    candidates = catalog.match(store, q, limit=max(1, min(limit, 10)))
+    return {"store": store, "query": q, "candidates": [c.to_api() for c in candidates]}
+
+
 @app.post("/api/menu/import")
 def import_menu(body: MenuImportBody) -> Dict[str, Any]:
     if not body.menu:
@@ -175,6 +269,16 @@ def get_reviews(store: str) -> Dict[str, Any]:
     return {"store": store, "summary": "리뷰 서비스 비활성화", "highlights": []}
 
 
+@app.get("/api/recommendations")
+def get_recommendations(
+    store: str,
+    userId: Optional[str] = None,
+    limit: int = Query(3, ge=1, le=20),
+) -> Dict[str, Any]:
+    # 리뷰/영양 태그/알레르기/주문 이력으로 점수를 매긴 로컬 추천 (LLM 호출 없음)
+    items = recommender.recommend(store, _merged_profile(None, userId, store), limit=limit)
+    return {"store": store, "items": [item.to_api() for item in items]}
+
 
 @app.post("/api/pay")
 def mock_pay(payload: Dict[str, Any] = Body(default_factory=dict)) -> Dict[str, Any]:
@@ -199,45 +303,97 @@ def mock_pay(payload: Dict[str, Any] = Body(default_factory=dict)) -> Dict[str,
     }
 
 
-@app.post("/agent/chat")
-def agent_chat(req: AgentChatRequest) -> Dict[str, Any]:
-    # merge profile: stored + request
-    merged_profile: Optional[Dict[str, Any]] = None
-    # merge single-user stored profile
-    rec = single_user.get()
-    merged_profile = dict(rec.profile)
+def _merged_profile(
+    profile: Optional[UserProfile] = None,
+    user_id: Optional[str] = None,
+    store: Optional[str] = None,
+) -> Dict[str, Any]:
+    # merge stored profile (per user, or the single-user file) + request.
+    # 주문 이력 전체 대신 누적 요약(자주 시킨 메뉴/최근 주문)만 넘김
+    if user_id:
+        merged_profile = dict(users.get_profile(user_id))
+        merged_profile["orders"] = users.digest(user_id, store)
+    else:
+        merged_profile = dict(single_user.profile())
+        merged_profile["orders"] = single_user.digest(store)
+    if profile:
+        patch = profile.dict(exclude_none=True)
+        merged_profile = {**merged_profile, **patch}
+    return merged_profile
+
+
+async def _record_order(response: Dict[str, Any], user_id: Optional[str] = None) -> None:
+    # record order in history when ORDER action present; read the ordered items
+    # from the response itself so a concurrent turn of the same session can't
+    # change what gets recorded
     try:
-        # include recent history so the agent tools can read it
-        merged_profile["history"] = single_user.history()
+        if not any(a.get("type") == "ORDER" for a in (response.get("actions") or [])):
+            return
+        ui = response.get("ui") or {}
+        store = ui.get("store")
+        for item in (ui.get("payment") or {}).get("items") or []:
+            if not (store and item.get("name")):
+                continue
+            qty = item.get("quantity") or 1
+            if user_id:
+                await run_in_threadpool(users.add_order, user_id, store=store, item=item["name"], quantity=qty)
+            else:
+                await run_in_threadpool(single_user.add_order, store=store, item=item["name"], quantity=qty)
     except Exception:
         pass
-    if req.profile:
-        patch = req.profile.dict(exclude_none=True)
-        merged_profile = {**(merged_profile or {}), **patch}
-    response = agent.handle(
+
+
+@app.post("/agent/chat")
+async def agent_chat(req: AgentChatRequest) -> Dict[str, Any]:
+    profile = await run_in_threadpool(_merged_profile, req.profile, req.userId, req.store)
+    response = await agent.handle_async(
         session_id=req.sessionId,
         message=req.message,
         store=req.store,
         selected_names=req.selectedNames,
-        profile=merged_profile,
+        profile=profile,
     )
-    print(f"[agent_chat] session={req.sessionId} message={req.message} response={response}")
-    # record order in history when ORDER action present
-    try:
-        if any(a.get("type") == "ORDER" for a in (response.get("actions") or [])):
-            session = agent.memory.get_session(req.sessionId)
-            if session.selected_menu and session.store:
-                qty = session.quantity or 1
-                single_user.add_order(store=session.store, item=session.selected_menu, quantity=qty)
-    except Exception:
-        pass
+    log.info("agent_chat session=%s reply=%s", req.sessionId, response.get("reply"), extra=SAMPLED)
+    log.debug("agent_chat session=%s message=%s response=%s", req.sessionId, req.message, response)
+    await _record_order(response, req.userId)
     return response
 
 
+@app.post("/agent/chat/stream")
+async def agent_chat_stream(req: AgentChatRequest) -> StreamingResponse:
+    """Server-Sent Events version of ``/agent/chat``.
+
+    Emits ``speak`` (text delta) and ``sentence`` (complete sentence for TTS)
+    events while the model is generating, then one ``final`` event with the
+    usual ``reply``/``ui``/``actions``/``state`` payload.
+    """
+    profile = await run_in_threadpool(_merged_profile, req.profile, req.userId, req.store)
+
+    async def _events() -> AsyncIterator[str]:
+        async for event in agent.handle_stream(
+            session_id=req.sessionId,
+            message=req.message,
+            store=req.store,
+            selected_names=req.selectedNames,
+            profile=profile,
+        ):
+            if event["event"] == "final":
+                log.info("agent_chat_stream session=%s reply=%s", req.sessionId, event["data"].get("reply"), extra=SAMPLED)
+                log.debug("agent_chat_stream session=%s message=%s response=%s", req.sessionId, req.message, event["data"])
+                await _record_order(event["data"], req.userId)
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/api/agent")
-def agent_chat_legacy(req: AgentChatRequest) -> Dict[str, Any]:
+async def agent_chat_legacy(req: AgentChatRequest) -> Dict[str, Any]:
     """Backward compatible endpoint consumed by the existing UI proxy."""
-    return agent_chat(req)
+    return await agent_chat(req)
 
 
 @app.post("/api/samsung-pay")
@@ -296,5 +452,128 @@ async def audio_transcribe(file: UploadFile = File(...)) -> Dict[str, Any]:
     raise HTTPException(status_code=503, detail="Audio transcription not configured")
 
 
+# ---------------------------------------------------------------------------
+# Streaming speech-to-text
+# ---------------------------------------------------------------------------
+STT_STREAM_FAKE = os.getenv("SPEECH_STREAM_FAKE", "0") == "1"
+STT_SAMPLE_RATE = int(os.getenv("SPEECH_STREAM_RATE", "16000"))
+
+
+def _open_recognizer(on_event: SpeechEventHandler) -> Optional[StreamingRecognizer]:
+    if STT_STREAM_FAKE:
+        return FakeStreamingRecognizer(on_event)
+    return speech_service.open_stream(on_event, sample_rate=STT_SAMPLE_RATE)
+
+
+@app.websocket("/ws/audio")
+async def audio_stream(
+    ws: WebSocket,
+    sessionId: str = "default",
+    store: Optional[str] = None,
+    handoff: bool = Query(True, alias="agent"),
+    userId: Optional[str] = None,
+) -> None:
+    """Continuous recognition over one WebSocket.
+
+    Binary frames are audio chunks (16-bit mono PCM) pushed into a long-lived
+    recognizer; a text frame ``{"type": "stop"}`` ends the stream. The server
+    sends ``partial``/``final`` transcripts and, when ``agent`` is on, hands
+    every final transcript to the agent and forwards its stream events as
+    ``{"type": "agent", "event": ..., "data": ...}`` while audio keeps flowing.
+    """
+    await ws.accept()
+    # 어르신이 말하는 동안 추천 데이터를 데워 첫 추천 턴이 웹 수집을 기다리지 않게
+    agent.prefetcher.warm(store)
+    loop = asyncio.get_running_loop()
+    events: "asyncio.Queue[Tuple[str, Optional[str]]]" = asyncio.Queue()
+
+    def on_event(kind: str, text: Optional[str]) -> None:
+        # SDK 콜백 스레드 → 이벤트 루프
+        loop.call_soon_threadsafe(events.put_nowait, (kind, text))
+
+    try:
+        recognizer = await run_in_threadpool(_open_recognizer, on_event)
+    except Exception as exc:
+        log.warning("audio_stream recognizer failed: %s", exc)
+        recognizer = None
+    if recognizer is None:
+        await ws.send_json({"type": "error", "message": "Streaming transcription not configured"})
+        await ws.close(code=1011)
+        return
+
+    async def pump() -> None:
+        try:
+            while True:
+                msg = await ws.receive()
+                if msg["type"] == "websocket.disconnect":
+                    break
+                if msg.get("bytes"):
+                    recognizer.write(msg["bytes"])
+                elif msg.get("text"):
+                    try:
+                        control = json.loads(msg["text"])
+                    except ValueError:
+                        continue
+                    if isinstance(control, dict) and control.get("type") in ("stop", "end"):
+                        break
+        finally:
+            await run_in_threadpool(recognizer.close)
+
+    # 에이전트 응답은 별도 태스크에서 순서대로 처리: 답하는 동안에도 전사 결과는 계속 보낸다
+    turns: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+    send_lock = asyncio.Lock()
+
+    async def send(payload: Dict[str, Any]) -> None:
+        async with send_lock:
+            await ws.send_json(payload)
+
+    async def hand_off() -> None:
+        while True:
+            text = await turns.get()
+            if text is None:
+                break
+            try:
+                profile = await run_in_threadpool(_merged_profile, None, userId, store)
+                async for event in agent.handle_stream(
+                    session_id=sessionId, message=text, store=store, profile=profile
+                ):
+                    if event["event"] == "final":
+                        await _record_order(event["data"], userId)
+                    await send({"type": "agent", "event": event["event"], "data": event["data"]})
+            except WebSocketDisconnect:
+                break
+            except Exception:
+                log.exception("audio_stream agent turn failed (session=%s)", sessionId)
+
+    reader = asyncio.create_task(pump())
+    agent_task = asyncio.create_task(hand_off()) if handoff else None
+    try:
+        while True:
+            kind, text = await events.get()
+            if kind == "end":
+                break
+            if kind == "partial":
+                await send({"type": "partial", "text": text})
+            elif kind == "error":
+                await send({"type": "error", "message": text})
+            elif kind == "final" and text:
+                await send({"type": "final", "text": text})
+                if agent_task is not None:
+                    turns.put_nowait(text)
+        if agent_task is not None:
+            # 말이 끝나도 이미 넘긴 발화의 답은 마저 보낸다
+            turns.put_nowait(None)
+            await agent_task
+        await send({"type": "end"})
+        await ws.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        reader.cancel()
+        if agent_task is not None:
+            agent_task.cancel()
+        await run_in_threadpool(getattr(recognizer, "stop", recognizer.close))
+
+
 # Entry for local dev
 # uvicorn voice_mvp.fastapi_app.main:app --reload --port 8000
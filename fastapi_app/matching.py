@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import heapq
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .menus import MenuItem
+
+# ---------------------------------------------------------------------------
+# Hangul helpers
+# ---------------------------------------------------------------------------
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONG = ("", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ",
+         "ㄿ", "ㅀ", "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ")
+# STT가 자주 헷갈리는 모음은 하나로 접어서 비교 (애/에, 얘/예, 왜/외/웨)
+_PHONETIC_FOLD = str.maketrans({"ㅐ": "ㅔ", "ㅒ": "ㅖ", "ㅙ": "ㅞ", "ㅚ": "ㅞ"})
+_NON_WORD = re.compile(r"[^0-9a-z가-힣ㄱ-ㆎ]+")
+_SIZE_SUFFIX = re.compile(r"\s+(?:[SMLsml]|\d+\s*(?:조각|피스|개))$")
+# 긴 발화는 trigram을 많이 공유하는 후보만 편집 거리로 검증 (짧은 발화는 trie 전체 탐색)
+_EDIT_SHORTLIST = 24
+_TRIE_MAX_JAMO = 5
+# 퍼지 일치로 메뉴를 확정하려면 2등보다 이만큼은 앞서야 함 (가격/주문에 쓰이므로 애매하면 되묻는다)
+_RESOLVE_MARGIN = 0.1
+# 메뉴명 앞뒤에 붙는 말(수량/존댓말/조사)은 퍼지 매칭 전에 떼어 낸다 (match_key 이후 기준)
+_LEAD_FILLER = re.compile(r"^(?:그럼|저는|나는|저기요|저기|음|어)+")
+_TAIL_FILLER = re.compile(
+    r"(?:(?:\d{1,2}|한|두|세|네|열)(?:개|잔|세트|인분|그릇|봉지)|하나|둘|셋|넷|다섯|여섯|일곱|여덟|아홉"
+    r"|주세요|주시고|줘요|줘|할게요|할께요|할래요|시킬게요|먹을게요|부탁해요|부탁합니다"
+    r"|큰걸|작은걸|걸|이요|요|으로|로|만|좀)$"
+)
+
+# 매장과 무관하게 통용되는 줄임말/다른 표기 → 메뉴명에 들어가는 표현
+DEFAULT_ALIASES: Dict[str, str] = {
+    "감튀": "후렌치 후라이",
+    "감자튀김": "후렌치 후라이",
+    "프렌치프라이": "후렌치 후라이",
+    "프렌치후라이": "후렌치 후라이",
+    "콜라": "코카콜라",
+    "사이다": "스프라이트",
+    "아아": "아이스 아메리카노",
+    "너겟": "맥너겟",
+    "맥플": "맥플러리",
+    "핫쵸코": "핫초코",
+}
+
+
+def match_key(text: str) -> str:
+    """Lower-case and drop spaces/punctuation; keeps Hangul, digits and latin."""
+    return _NON_WORD.sub("", str(text or "").lower())
+
+
+def decompose(text: str) -> str:
+    """Split Hangul syllables into (phonetically folded) compatibility jamo."""
+    out: List[str] = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(_CHO[code // 588])
+            out.append(_JUNG[(code % 588) // 28])
+            jong = _JONG[code % 28]
+            if jong:
+                out.append(jong)
+        else:
+            out.append(ch)
+    return "".join(out).translate(_PHONETIC_FOLD)
+
+
+def strip_fillers(key: str) -> str:
+    """Drop counts, polite endings and particles around the menu name ("빅맥하나주세요" → "빅맥").
+
+    Works on :func:`match_key` output; returns ``key`` itself when nothing would be left.
+    """
+    core = _LEAD_FILLER.sub("", key)
+    while True:
+        stripped = _TAIL_FILLER.sub("", core)
+        if stripped == core:
+            break
+        core = stripped
+    return core or key
+
+
+def _ngrams(jamo: str, n: int = 3) -> Set[str]:
+    if len(jamo) <= n:
+        return {jamo} if jamo else set()
+    return {jamo[i:i + n] for i in range(len(jamo) - n + 1)}
+
+
+# ---------------------------------------------------------------------------
+# Matching structures
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True)
+class MatchCandidate:
+    item: "MenuItem"
+    score: float
+    method: str
+
+    def to_api(self) -> Dict[str, object]:
+        return {"name": self.item.name, "score": round(self.score, 3), "method": self.method}
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminals")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.terminals: List[int] = []
+
+
+class MenuMatcher:
+    """Local resolver from noisy STT text to catalogue items.
+
+    Built once per store snapshot. Combines exact/alias lookups, substring
+    containment (utterances such as "빅맥 두 개 주세요"), bounded edit
+    distance over a jamo trie and a jamo-trigram index for the rest.
+    Substring checks are dictionary lookups, and the fuzzy passes run on the
+    filler-stripped utterance only when no exact/alias/containment hit
+    already covers it.
+    """
+
+    def __init__(self, items: Iterable["MenuItem"], aliases: Optional[Mapping[str, str]] = None) -> None:
+        self._items: Tuple["MenuItem", ...] = tuple(items)
+        self._keys: List[str] = [match_key(it.name) for it in self._items]
+        # "코카콜라 M", "맥너겟 6조각" 처럼 사이즈/수량 꼬리를 뗀 부르는 이름
+        self._base_keys: List[str] = [match_key(_SIZE_SUFFIX.sub("", it.name)) for it in self._items]
+        self._by_key: Dict[str, int] = {}
+        for idx, key in enumerate(self._keys):
+            if key:
+                self._by_key.setdefault(key, idx)
+        self._by_base: Dict[str, int] = {}
+        for idx, key in enumerate(self._base_keys):
+            if key and key != self._keys[idx]:
+                self._by_base.setdefault(key, idx)
+
+        # 매장 별칭은 메뉴명으로 바로, 공용 별칭은 문구 치환 후 다시 매칭
+        self._aliases: Dict[str, int] = {}
+        for alias, target in (aliases or {}).items():
+            idx = self._by_key.get(match_key(target))
+            if idx is not None and match_key(alias):
+                self._aliases[match_key(alias)] = idx
+        self._expansions: List[Tuple[str, str]] = sorted(
+            ((match_key(a), match_key(t)) for a, t in DEFAULT_ALIASES.items()),
+            key=lambda pair: -len(pair[0]),
+        )
+
+        # 포함 검사용 색인: 메뉴명(전체/부르는 이름) → 항목, 메뉴명의 부분 문자열 → 항목
+        self._names: Dict[str, List[int]] = {}
+        self._partials: Dict[str, List[int]] = {}
+        for idx, key in enumerate(self._keys):
+            if not self._base_keys[idx]:
+                continue
+            for name in {key, self._base_keys[idx]}:
+                self._names.setdefault(name, []).append(idx)
+            subs = {key[i:j] for i in range(len(key)) for j in range(i + 2, len(key) + 1)}
+            for sub in subs:
+                self._partials.setdefault(sub, []).append(idx)
+        self._name_lengths: Tuple[int, ...] = tuple(sorted({len(n) for n in self._names}))
+
+        self._jamo: List[str] = [decompose(k) for k in self._keys]
+        self._base_jamo: List[str] = [decompose(k) for k in self._base_keys]
+        self._root = _TrieNode()
+        self._max_len = 0
+        self._grams: Dict[str, List[int]] = {}
+        self._gram_counts: List[int] = []
+        for idx, jamo in enumerate(self._jamo):
+            for variant in {jamo, self._base_jamo[idx]}:
+                node = self._root
+                for ch in variant:
+                    node = node.children.setdefault(ch, _TrieNode())
+                node.terminals.append(idx)
+                self._max_len = max(self._max_len, len(variant))
+            grams = _ngrams(jamo)
+            self._gram_counts.append(len(grams))
+            for g in grams:
+                self._grams.setdefault(g, []).append(idx)
+
+    # ------------------------------------------------------------------
+    def match(self, text: str, limit: int = 3) -> List[MatchCandidate]:
+        query = match_key(text)
+        if not query or not self._items:
+            return []
+        best: Dict[int, Tuple[float, str]] = {}
+
+        def offer(idx: int, score: float, method: str) -> None:
+            if score > best.get(idx, (0.0, ""))[0]:
+                best[idx] = (score, method)
+
+        idx = self._by_key.get(query)
+        if idx is not None:
+            offer(idx, 1.0, "exact")
+        idx = self._by_base.get(query)
+        if idx is not None:
+            offer(idx, 0.98, "exact")
+        idx = self._aliases.get(query)
+        if idx is not None:
+            offer(idx, 0.97, "alias")
+
+        expanded = query
+        for alias, target in self._expansions:
+            if alias in expanded and target not in expanded:
+                expanded = expanded.replace(alias, target)
+        if expanded != query:
+            idx = self._by_key.get(expanded, self._by_base.get(expanded))
+            if idx is not None:
+                offer(idx, 0.96, "alias")
+
+        core = strip_fillers(expanded)
+        # 발화 안에 메뉴명이 통째로 들어 있음: 긴 이름일수록 우선
+        contained: Dict[int, int] = {}
+        n = len(expanded)
+        for start in range(n):
+            for size in self._name_lengths:
+                if start + size > n:
+                    break
+                for idx in self._names.get(expanded[start:start + size], ()):
+                    if size > contained.get(idx, 0):
+                        contained[idx] = size
+        for idx, size in contained.items():
+            offer(idx, 0.9 + 0.09 * size / n, "contains")
+        if len(core) >= 2:
+            for idx in self._partials.get(core, ()):
+                if idx not in contained:
+                    offer(idx, 0.55 + 0.35 * len(core) / len(self._base_keys[idx]), "partial")
+
+        # 정확/별칭 일치나 핵심어 전체를 덮는 포함 일치가 있으면 퍼지 검색은 건너뜀
+        if any(method in ("exact", "alias") for _, method in best.values()) or any(
+            size >= len(core) for size in contained.values()
+        ):
+            return self._ranked(best, limit)
+
+        qj = decompose(core)
+        qgrams = _ngrams(qj)
+        shared: Dict[int, int] = {}
+        for g in qgrams:
+            for idx in self._grams.get(g, ()):
+                shared[idx] = shared.get(idx, 0) + 1
+
+        # 거리 max_dist 안의 메뉴는 trigram을 적어도 하나 공유하므로 공유가 많은 후보만 확인
+        shortlist = heapq.nlargest(_EDIT_SHORTLIST, shared, key=shared.__getitem__)
+        max_dist = min(3, max(1, len(qj) // 5))
+        if len(qj) <= _TRIE_MAX_JAMO:
+            edits = self._trie_search(qj, max_dist)
+        else:
+            edits = []
+            # q-gram 보조정리: 편집 1번은 trigram을 최대 3개 깨뜨리므로 공유 수가 모자라면 거리 계산 생략
+            need = len(qgrams) - 3 * max_dist
+            for idx in shortlist:
+                if shared[idx] < need:
+                    continue
+                dist = min(_bounded_levenshtein(qj, v, max_dist) for v in {self._jamo[idx], self._base_jamo[idx]})
+                if dist <= max_dist:
+                    edits.append((idx, dist))
+        for idx, dist in edits:
+            denom = max(len(qj), len(self._jamo[idx])) or 1
+            offer(idx, min(0.95, 0.95 * (1.0 - dist / denom) + 0.05), "edit")
+
+        for idx in shortlist:
+            dice = 2.0 * shared[idx] / (len(qgrams) + self._gram_counts[idx])
+            offer(idx, 0.9 * dice, "ngram")
+
+        return self._ranked(best, limit)
+
+    def _ranked(self, best: Dict[int, Tuple[float, str]], limit: int) -> List[MatchCandidate]:
+        ranked = sorted(best.items(), key=lambda kv: (-kv[1][0], len(self._keys[kv[0]])))
+        return [MatchCandidate(self._items[i], score, method) for i, (score, method) in ranked[:max(1, limit)]]
+
+    def best(self, text: str, min_score: float = 0.75, min_margin: float = _RESOLVE_MARGIN) -> Optional["MenuItem"]:
+        """The single item ``text`` clearly refers to, or ``None`` when unsure.
+
+        Exact/alias hits are taken as is; any other hit must also beat the
+        runner-up by ``min_margin`` ("불고기" is as close to 더블 불고기 버거
+        as to 불고기 버거, so it resolves to neither).
+        """
+        found = self.match(text, limit=2)
+        if not found or found[0].score < min_score:
+            return None
+        top = found[0]
+        if top.method in ("exact", "alias") or len(found) < 2 or top.score - found[1].score >= min_margin:
+            return top.item
+        return None
+
+    # ------------------------------------------------------------------
+    def _trie_search(self, word: str, max_dist: int) -> List[Tuple[int, int]]:
+        """Levenshtein search over the jamo trie.
+
+        Only the diagonal band ``|depth - col| <= max_dist`` is evaluated per
+        node and branches whose band exceeds ``max_dist`` are pruned, so the
+        cost stays proportional to the matching prefixes, not the catalogue.
+        """
+        n = len(word)
+        if n - max_dist > self._max_len:
+            return []
+        results: List[Tuple[int, int]] = []
+        inf = max_dist + 1
+        first_row = [col if col <= max_dist else inf for col in range(n + 1)]
+        stack: List[Tuple[_TrieNode, str, int, List[int]]] = [
+            (child, ch, 1, first_row) for ch, child in self._root.children.items()
+        ]
+        while stack:
+            node, ch, depth, prev = stack.pop()
+            row = [inf] * (n + 1)
+            row[0] = depth if depth <= max_dist else inf
+            lo = max(1, depth - max_dist)
+            hi = min(n, depth + max_dist)
+            best = row[0]
+            for col in range(lo, hi + 1):
+                cost = 0 if word[col - 1] == ch else 1
+                val = min(row[col - 1] + 1, prev[col] + 1, prev[col - 1] + cost)
+                if val > inf:
+                    val = inf
+                row[col] = val
+                if val < best:
+                    best = val
+            if node.terminals and row[n] <= max_dist:
+                results.extend((idx, row[n]) for idx in node.terminals)
+            if best <= max_dist:
+                stack.extend((child, nxt, depth + 1, row) for nxt, child in node.children.items())
+        return results
+
+
+def _bounded_levenshtein(a: str, b: str, max_dist: int) -> int:
+    """Edit distance of ``a`` and ``b``, or ``max_dist + 1`` once it is certainly larger."""
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    inf = max_dist + 1
+    prev = [col if col <= max_dist else inf for col in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        row = [inf] * (len(b) + 1)
+        row[0] = i if i <= max_dist else inf
+        lo, hi = max(1, i - max_dist), min(len(b), i + max_dist)
+        best = row[0]
+        for j in range(lo, hi + 1):
+            val = min(row[j - 1] + 1, prev[j] + 1, prev[j - 1] + (ca != b[j - 1]))
+            row[j] = val if val < inf else inf
+            if row[j] < best:
+                best = row[j]
+        if best > max_dist:
+            return inf
+        prev = row
+    return prev[len(b)]
+
+
+__all__ = ["MenuMatcher", "MatchCandidate", "DEFAULT_ALIASES", "decompose", "match_key"]
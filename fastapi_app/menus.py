@@ -4,7 +4,10 @@ import json
 from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from threading import RLock
-from typing import Dict, Iterable, List, Optional
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .matching import MatchCandidate, MenuMatcher
 
 
 @dataclass
@@ -17,10 +20,13 @@ class MenuItem:
     image: Optional[str] = None
     tags: List[str] = field(default_factory=list)
     allergens: List[str] = field(default_factory=list)
+    id: Optional[str] = None
 
     def to_api(self) -> Dict[str, object]:
         data = asdict(self)
         data["description"] = data.pop("desc", "")
+        if data.get("id") is None:
+            data.pop("id", None)
         return data
 
     @classmethod
@@ -32,15 +38,120 @@ class MenuItem:
             image=(data.get("image") or data.get("img") or None),
             tags=list(data.get("tags", []) or []),
             allergens=list(data.get("allergens", []) or []),
+            id=(str(data.get("id") or data.get("menu_id") or "").strip() or None),
+        )
+
+
+def normalize_name(name: str) -> str:
+    """Key used for name lookups: whitespace removed, lower-cased."""
+    return "".join(str(name or "").split()).lower()
+
+
+@dataclass(frozen=True)
+class _StoreIndex:
+    """Immutable per-store snapshot with precomputed lookup tables."""
+
+    items: Tuple[MenuItem, ...] = ()
+    featured: Optional[MenuItem] = None
+    by_name: Mapping[str, MenuItem] = field(default_factory=dict)
+    by_id: Mapping[str, MenuItem] = field(default_factory=dict)
+    by_tag: Mapping[str, Tuple[MenuItem, ...]] = field(default_factory=dict)
+    by_allergen: Mapping[str, Tuple[MenuItem, ...]] = field(default_factory=dict)
+    matcher: MenuMatcher = field(default_factory=lambda: MenuMatcher(()))
+    version: int = 0
+    # 알레르기/태그 필터용 비트마스크: 토큰 id는 카탈로그 전체에서 공유
+    allergen_masks: Tuple[int, ...] = ()
+    tag_masks: Tuple[int, ...] = ()
+    items_by_token: Mapping[int, int] = field(default_factory=dict)  # 토큰 id → 품목 비트셋
+    texts: Tuple[str, ...] = ()
+    _terms: Dict[str, int] = field(default_factory=dict, compare=False)
+
+    @classmethod
+    def build(
+        cls,
+        items: Iterable[MenuItem],
+        featured: Optional[MenuItem],
+        aliases: Optional[Mapping[str, str]] = None,
+        version: int = 0,
+        vocab: Optional[Dict[str, int]] = None,
+    ) -> "_StoreIndex":
+        snapshot = tuple(items)
+        vocab = {} if vocab is None else vocab
+        by_name: Dict[str, MenuItem] = {}
+        by_id: Dict[str, MenuItem] = {}
+        by_tag: Dict[str, List[MenuItem]] = {}
+        by_allergen: Dict[str, List[MenuItem]] = {}
+        allergen_masks: List[int] = []
+        tag_masks: List[int] = []
+        items_by_token: Dict[int, int] = {}
+        texts: List[str] = []
+        for i, item in enumerate(snapshot):
+            key = normalize_name(item.name)
+            by_name.setdefault(key, item)
+            by_id.setdefault(item.id or key, item)
+            masks = [0, 0]
+            for slot, (tokens, bucket) in enumerate(((item.allergens, by_allergen), (item.tags, by_tag))):
+                for token in tokens:
+                    token_key = normalize_name(token)
+                    if not token_key:
+                        continue
+                    bucket.setdefault(token_key, []).append(item)
+                    tid = vocab.setdefault(token_key, len(vocab))
+                    masks[slot] |= 1 << tid
+                    items_by_token[tid] = items_by_token.get(tid, 0) | (1 << i)
+            allergen_masks.append(masks[0])
+            tag_masks.append(masks[1])
+            texts.append(key + " " + normalize_name(item.desc))
+        return cls(
+            items=snapshot,
+            featured=featured,
+            by_name=MappingProxyType(by_name),
+            by_id=MappingProxyType(by_id),
+            by_tag=MappingProxyType({k: tuple(v) for k, v in by_tag.items()}),
+            by_allergen=MappingProxyType({k: tuple(v) for k, v in by_allergen.items()}),
+            matcher=MenuMatcher(snapshot, aliases),
+            version=version,
+            allergen_masks=tuple(allergen_masks),
+            tag_masks=tuple(tag_masks),
+            items_by_token=MappingProxyType(items_by_token),
+            texts=tuple(texts),
         )
 
+    @property
+    def everything(self) -> int:
+        return (1 << len(self.items)) - 1
+
+    def term(self, word: str) -> int:
+        """Bitset of items whose name/description contains ``word`` (memoised)."""
+        key = normalize_name(word)
+        bits = self._terms.get(key)
+        if bits is None:
+            bits = 0
+            if key:
+                for i, text in enumerate(self.texts):
+                    if key in text:
+                        bits |= 1 << i
+            if len(self._terms) >= 256:
+                self._terms.clear()
+            self._terms[key] = bits
+        return bits
+
+
+_EMPTY_INDEX = _StoreIndex()
+
 
 class MenuCatalog:
-    """Thread-safe in-memory catalogue that powers the API and agent."""
+    """Thread-safe in-memory catalogue that powers the API and agent.
+
+    Each store is held as an immutable :class:`_StoreIndex` that ``upsert``
+    rebuilds and swaps in one assignment, so reads never take the lock.
+    """
 
     def __init__(self) -> None:
-        self._menus: Dict[str, List[MenuItem]] = {}
-        self._featured: Dict[str, MenuItem] = {}
+        self._stores: Dict[str, _StoreIndex] = {}
+        self._aliases: Dict[str, Dict[str, str]] = {}
+        self._vocab: Dict[str, int] = {}  # 알레르기/태그 토큰 → 비트 id (추가만 됨)
+        self._version = 0
         self._lock = RLock()
 
     # ------------------------------------------------------------------
@@ -56,6 +167,8 @@ class MenuCatalog:
         featured = None
         if isinstance(payload.get("featured"), dict):
             featured = MenuItem.from_dict(payload["featured"])
+        if isinstance(payload.get("aliases"), dict):
+            self._aliases[store] = {str(k): str(v) for k, v in payload["aliases"].items()}
         self.upsert(store=store, menu=menu_items, featured=featured)
 
     # ------------------------------------------------------------------
@@ -65,34 +178,141 @@ class MenuCatalog:
             raise ValueError("store name required")
         items = [item for item in menu if item.name]
         with self._lock:
-            self._menus[store_key] = items
             if featured and featured.name:
-                self._featured[store_key] = featured
+                chosen: Optional[MenuItem] = featured
             elif items:
-                self._featured[store_key] = items[0]
+                chosen = items[0]
+            else:
+                chosen = self._index(store_key).featured
+            self._version += 1
+            self._stores[store_key] = _StoreIndex.build(
+                items, chosen, self._aliases.get(store_key), self._version, self._vocab
+            )
 
-    # ------------------------------------------------------------------
-    def list(self, store: str) -> List[MenuItem]:
+    def set_aliases(self, store: str, aliases: Mapping[str, str]) -> None:
+        """Register store-specific spoken aliases (alias → menu name) and reindex."""
+        store_key = store.strip()
         with self._lock:
-            return list(self._menus.get(store.strip(), []))
+            self._aliases[store_key] = {str(k): str(v) for k, v in aliases.items()}
+            current = self._stores.get(store_key)
+            if current is not None:
+                self._version += 1
+                self._stores[store_key] = _StoreIndex.build(
+                    current.items, current.featured, self._aliases[store_key], self._version, self._vocab
+                )
+
+    # ------------------------------------------------------------------
+    def _index(self, store: str) -> _StoreIndex:
+        return self._stores.get(store.strip(), _EMPTY_INDEX)
+
+    def version(self, store: str) -> int:
+        """Changes whenever the store's menu is re-indexed (0 = unknown store)."""
+        return self._index(store).version
+
+    def list(self, store: str) -> Tuple[MenuItem, ...]:
+        return self._index(store).items
 
     def featured(self, store: str) -> Optional[MenuItem]:
-        with self._lock:
-            return self._featured.get(store.strip())
+        return self._index(store).featured
 
     def find(self, store: str, name: str) -> Optional[MenuItem]:
-        needle = name.replace(" ", "").lower()
-        for item in self.list(store):
-            if item.name.replace(" ", "").lower() == needle:
-                return item
-        return None
+        return self._index(store).by_name.get(normalize_name(name))
+
+    def match(self, store: str, text: str, limit: int = 3) -> List[MatchCandidate]:
+        """Ranked fuzzy candidates for a spoken/typed menu name."""
+        return self._index(store).matcher.match(text, limit=limit)
+
+    def resolve(self, store: str, name: str, min_score: float = 0.75) -> Optional[MenuItem]:
+        """Exact lookup first, then the local fuzzy matcher (no LLM needed).
+
+        Returns ``None`` when the fuzzy hit is not clearly ahead of the next
+        candidate, so callers ask instead of pricing a guessed item.
+        """
+        if not name:
+            return None
+        index = self._index(store)
+        return index.by_name.get(normalize_name(name)) or index.matcher.best(name, min_score=min_score)
+
+    def get(self, store: str, menu_id: str) -> Optional[MenuItem]:
+        index = self._index(store)
+        return index.by_id.get(menu_id) or index.by_id.get(normalize_name(menu_id))
+
+    def by_tag(self, store: str, tag: str) -> Tuple[MenuItem, ...]:
+        return self._index(store).by_tag.get(normalize_name(tag), ())
+
+    def by_allergen(self, store: str, allergen: str) -> Tuple[MenuItem, ...]:
+        return self._index(store).by_allergen.get(normalize_name(allergen), ())
+
+    # ------------------------------------------------------------------
+    # 알레르기/비선호 필터: 품목 비트셋 연산 한 번으로 거른다
+    def token_mask(self, tokens: Iterable[str]) -> int:
+        """Bitmask of allergen/tag ids for ``tokens`` (unknown tokens are ignored)."""
+        mask = 0
+        for token in tokens:
+            tid = self._vocab.get(normalize_name(token))
+            if tid is not None:
+                mask |= 1 << tid
+        return mask
+
+    def allergen_masks(self, store: str) -> Tuple[int, ...]:
+        """Per-item allergen bitmasks, aligned with :meth:`list`."""
+        return self._index(store).allergen_masks
+
+    def tag_masks(self, store: str) -> Tuple[int, ...]:
+        """Per-item tag bitmasks, aligned with :meth:`list`."""
+        return self._index(store).tag_masks
+
+    def exclusion_mask(self, store: str, allergies: Iterable[str] = (), dislikes: Iterable[str] = ()) -> int:
+        """Bitset over :meth:`list` of items to avoid for this user.
+
+        An allergy excludes items carrying that allergen; a dislike excludes
+        items tagged with it or whose name/description mentions it.
+        """
+        index = self._index(store)
+        blocked = 0
+        for allergen in allergies:
+            tid = self._vocab.get(normalize_name(allergen))
+            if tid is not None:
+                blocked |= index.items_by_token.get(tid, 0)
+        return (blocked | self.matching(store, dislikes)) & index.everything
+
+    def matching(self, store: str, words: Iterable[str]) -> int:
+        """Bitset over :meth:`list` of items tagged with or mentioning any of ``words``."""
+        index = self._index(store)
+        bits = 0
+        for word in words:
+            tid = self._vocab.get(normalize_name(word))
+            if tid is not None:
+                bits |= index.items_by_token.get(tid, 0)
+            bits |= index.term(word)
+        return bits
+
+    def select(self, store: str, bits: int) -> Tuple[MenuItem, ...]:
+        """Items whose positions are set in ``bits``, in catalog order."""
+        items = self._index(store).items
+        out: List[MenuItem] = []
+        while bits:
+            low = bits & -bits
+            i = low.bit_length() - 1
+            if i >= len(items):
+                break
+            out.append(items[i])
+            bits ^= low
+        return tuple(out)
+
+    def filter(self, store: str, allergies: Iterable[str] = (), dislikes: Iterable[str] = ()) -> Tuple[MenuItem, ...]:
+        """Menu of ``store`` without the items excluded for these allergies/dislikes."""
+        index = self._index(store)
+        blocked = self.exclusion_mask(store, allergies, dislikes)
+        if not blocked:
+            return index.items
+        return self.select(store, index.everything & ~blocked)
 
     def has_menu(self, store: str) -> bool:
-        return bool(self.list(store))
+        return bool(self._index(store).items)
 
     def stores(self) -> List[str]:
-        with self._lock:
-            return list(self._menus.keys())
+        return list(self._stores.keys())
 
 
-__all__ = ["MenuCatalog", "MenuItem"]
+__all__ = ["MenuCatalog", "MenuItem", "normalize_name"]
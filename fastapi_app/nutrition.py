@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import RLock
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .menus import normalize_name
+
+# 태그 기준 (1회 제공량)
+LOW_SODIUM_MG = 700
+LOW_SUGAR_G = 8
+HIGH_PROTEIN_G = 15
+NUTRITION_TAGS = ("저염", "저당", "단백질")
+
+
+def nutrition_tags(sodium_mg: Optional[int], sugar_g: Optional[int], protein_g: Optional[int]) -> Tuple[str, ...]:
+    tags = []
+    if sodium_mg is not None and sodium_mg <= LOW_SODIUM_MG:
+        tags.append("저염")
+    if sugar_g is not None and sugar_g <= LOW_SUGAR_G:
+        tags.append("저당")
+    if protein_g is not None and protein_g >= HIGH_PROTEIN_G:
+        tags.append("단백질")
+    return tuple(tags)
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(float(str(value).replace(",", "")))
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class NutritionFact:
+    """Per-serving nutrition of one menu item; ``tags`` is derived at load."""
+
+    name: str
+    store: str = ""
+    kcal: Optional[int] = None
+    sodium_mg: Optional[int] = None
+    sugar_g: Optional[int] = None
+    protein_g: Optional[int] = None
+    tags: Tuple[str, ...] = ()
+    source: str = "table"
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any], store: str = "") -> "NutritionFact":
+        sodium = _int_or_none(data.get("sodium_mg"))
+        sugar = _int_or_none(data.get("sugar_g"))
+        protein = _int_or_none(data.get("protein_g"))
+        extra = tuple(str(t) for t in data.get("tags") or [] if str(t) not in NUTRITION_TAGS)
+        return cls(
+            name=str(data.get("name", "")).strip(),
+            store=str(data.get("store") or store or "").strip(),
+            kcal=_int_or_none(data.get("kcal")),
+            sodium_mg=sodium,
+            sugar_g=sugar,
+            protein_g=protein,
+            tags=nutrition_tags(sodium, sugar, protein) + extra,
+            source=str(data.get("source") or "table"),
+        )
+
+    @property
+    def known(self) -> bool:
+        return any(v is not None for v in (self.kcal, self.sodium_mg, self.sugar_g, self.protein_g))
+
+    def to_api(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kcal": self.kcal,
+            "sodium_mg": self.sodium_mg,
+            "sugar_g": self.sugar_g,
+            "protein_g": self.protein_g,
+            "tags": list(self.tags),
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        data = {k: v for k, v in self.to_api().items() if k != "tags" and v is not None}
+        if self.store:
+            data["store"] = self.store
+        if self.source != "table":
+            data["source"] = self.source
+        return data
+
+
+@dataclass(frozen=True)
+class _Index:
+    by_key: Mapping[Tuple[str, str], NutritionFact] = field(default_factory=dict)
+    by_name: Mapping[str, NutritionFact] = field(default_factory=dict)
+    version: int = 0
+
+
+class NutritionTable:
+    """In-memory nutrition lookup loaded from ``data/nutrition.json``.
+
+    Keys are ``(store, normalized name)``; a name missing for the store falls
+    back to the same name in any store (chains share menus). Both maps are
+    immutable snapshots that writers rebuild and swap, so lookups never lock.
+    ``upsert`` is how a (slow) web backfill adds rows; ``save`` persists them.
+
+    File format::
+
+        {"store": "맥도날드", "items": [{"name": "빅맥", "kcal": 582, "sodium_mg": 937, ...}]}
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = Path(path) if path else None
+        self._index = _Index()
+        self._lock = RLock()
+        if self.path is not None:
+            self.load(self.path)
+
+    # ------------------------------------------------------------------
+    def load(self, path: Path) -> int:
+        path = Path(path)
+        if not path.exists():
+            return 0
+        with path.open("r", encoding="utf-8") as fh:
+            payload = json.load(fh)
+        if isinstance(payload, list):
+            payload = {"items": payload}
+        store = str(payload.get("store") or "")
+        facts = [NutritionFact.from_dict(row, store) for row in payload.get("items") or [] if isinstance(row, dict)]
+        self.upsert(facts)
+        return len(facts)
+
+    def save(self, path: Optional[Path] = None) -> None:
+        target = Path(path or self.path or "")
+        if not str(target):
+            raise ValueError("no path to save the nutrition table to")
+        rows = sorted(self._index.by_key.values(), key=lambda f: (f.store, f.name))
+        payload = {"items": [f.to_record() for f in rows]}
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as fh:
+            json.dump(payload, fh, ensure_ascii=False, indent=2)
+            fh.write("\n")
+        os.replace(tmp, target)
+
+    def upsert(self, facts: Iterable[NutritionFact]) -> None:
+        with self._lock:
+            data = dict(self._index.by_key)
+            for fact in facts:
+                key = normalize_name(fact.name)
+                if not key:
+                    continue
+                data[(normalize_name(fact.store), key)] = fact
+            by_name: Dict[str, NutritionFact] = {}
+            for (store, key), fact in sorted(data.items(), key=lambda kv: kv[0][0] != ""):
+                by_name.setdefault(key, fact)  # 매장 없는 행 우선
+            self._index = _Index(MappingProxyType(data), MappingProxyType(by_name), self._index.version + 1)
+
+    # ------------------------------------------------------------------
+    @property
+    def version(self) -> int:
+        return self._index.version
+
+    def get(self, name: str, store: Optional[str] = None) -> Optional[NutritionFact]:
+        index = self._index
+        key = normalize_name(name)
+        fact = index.by_key.get((normalize_name(store), key)) if store else None
+        return fact or index.by_name.get(key)
+
+    def tags(self, name: str, store: Optional[str] = None) -> Tuple[str, ...]:
+        fact = self.get(name, store)
+        return fact.tags if fact else ()
+
+    def missing(self, names: Iterable[str], store: Optional[str] = None) -> List[str]:
+        return [n for n in names if self.get(n, store) is None]
+
+    def __len__(self) -> int:
+        return len(self._index.by_key)
+
+
+__all__ = ["NutritionFact", "NutritionTable", "NUTRITION_TAGS", "nutrition_tags"]
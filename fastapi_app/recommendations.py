@@ -1,56 +1,372 @@
 from __future__ import annotations
 
-from typing import Dict, List
+import bisect
+import heapq
+import itertools
+import math
+from dataclasses import dataclass
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
-from .menus import MenuCatalog, MenuItem
-from .reviews import ReviewService
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy 없이도 동작 (순수 파이썬 경로)
+    np = None  # type: ignore[assignment]
+
+from .menus import MenuCatalog, MenuItem, normalize_name
+from .nutrition import NUTRITION_TAGS, NutritionTable
+from .reviews import MentionAutomaton, ReviewBundle, ReviewService
+
+# 리뷰 문장의 긍/부정 단서 (공백 제거·소문자 기준)
+_POSITIVE = ("맛있", "좋", "부드럽", "친절", "깔끔", "촉촉", "바삭", "만족", "최고", "따뜻", "든든")
+_NEGATIVE = ("별로", "짜요", "짜서", "짰", "느끼", "퍽퍽", "비려", "비리", "아쉬", "불편", "식었")
+
+# 리뷰 전반의 분위기 → 그 분위기에 맞는 메뉴명 단서 (예: 부드럽다는 평이 많으면 죽/스프)
+_THEMES: Mapping[str, Tuple[str, ...]] = {
+    "부드럽": ("죽", "스프", "수프", "계란", "두부"),
+    "담백": ("정식", "구이", "백반", "국밥"),
+    "속편": ("죽", "국", "탕"),
+}
+
+# 지병 → 우선할 영양 태그
+DISEASE_TAGS: Mapping[str, Tuple[str, ...]] = {
+    "고혈압": ("저염",),
+    "당뇨": ("저당",),
+    "고지혈증": ("저지방",),
+    "신장질환": ("저염",),
+    "치아": ("부드러움",),
+}
+
+
+@dataclass(frozen=True)
+class ScoreWeights:
+    """Linear weights of the recommendation score."""
+
+    mention: float = 2.0  # log1p(리뷰 언급 수)
+    sentiment: float = 1.0  # 언급된 리뷰의 평균 긍/부정 (-1..1)
+    theme: float = 1.0  # 리뷰 분위기와 맞는 메뉴
+    nutrition: float = 1.0  # 지병/선호에 맞는 영양 태그 1개당
+    prefer: float = 1.5  # 선호 키워드 일치
+    history: float = 1.5  # log1p(이 매장에서 주문한 횟수)
+
+
+def _pack(masks: Sequence[int], bits: int) -> Any:
+    """Python int bitmasks → (n, words) uint64 array."""
+    words = max(1, (bits + 63) // 64)
+    out = np.zeros((len(masks), words), dtype=np.uint64)
+    for i, mask in enumerate(masks):
+        for w in range(words):
+            out[i, w] = (mask >> (64 * w)) & 0xFFFFFFFFFFFFFFFF
+    return out
+
+
+def _bits(bitset: int, n: int) -> Any:
+    """Item bitset from the catalog → length-``n`` bool column."""
+    if np is None:
+        return [bool(bitset >> i & 1) for i in range(n)]
+    raw = np.frombuffer(bitset.to_bytes((n + 7) // 8 or 1, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:n].astype(bool)
+
+
+def _popcount(x: Any) -> Any:
+    """Per-element popcount of a uint64 array (SWAR, no numpy>=2 dependency)."""
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def _nutrition_mask(tags: Iterable[str]) -> int:
+    mask = 0
+    for tag in tags:
+        if tag in NUTRITION_TAGS:
+            mask |= 1 << NUTRITION_TAGS.index(tag)
+    return mask
+
+
+def _review_polarity(text: str) -> int:
+    pos = sum(1 for w in _POSITIVE if w in text)
+    neg = sum(1 for w in _NEGATIVE if w in text)
+    return (pos > neg) - (neg > pos)
+
+
+@dataclass
+class _Features:
+    """Per-store feature table, rebuilt only when the menu or reviews change.
+
+    Everything that depends on the store alone (review mentions, sentiment,
+    themes) is folded into ``base`` at build time; a request only adds the
+    profile-dependent columns and takes the top-k.
+    """
+
+    key: Tuple[Any, ...]
+    store: str
+    items: Tuple[MenuItem, ...]
+    index: Dict[str, int]
+    mentions: Any
+    base: Any
+    tag_masks: Any  # 카탈로그의 품목별 태그 비트마스크 (NumPy면 uint64 워드 배열)
+    tag_bits: int
+    nutri_masks: Any  # 영양 태그(NUTRITION_TAGS 순서) 비트마스크: 영양 표 + 메뉴 태그
+
+    @classmethod
+    def build(cls, key: Tuple[Any, ...], store: str, menus: MenuCatalog, bundle: ReviewBundle,
+              weights: ScoreWeights, nutrition: Optional[NutritionTable] = None) -> "_Features":
+        items = menus.list(store)
+        nutri = [
+            _nutrition_mask(tuple(item.tags) + (nutrition.tags(item.name, store) if nutrition else ()))
+            for item in items
+        ]
+        tag_masks = menus.tag_masks(store)
+        tag_bits = max((m.bit_length() for m in tag_masks), default=0)
+        names = [normalize_name(item.name) for item in items]
+        reviews = [normalize_name(r) for r in bundle.reviews]
+        blob = " ".join(reviews + [normalize_name(bundle.summary)])
+
+        # 메뉴명 자동자 한 번으로 말뭉치 전체 언급 수와 리뷰별 언급(감성 집계용)을 구한다
+        automaton = MentionAutomaton(names)
+        counts = automaton.mentions(blob)
+        polarity_sum: Dict[str, float] = {}
+        polarity_hits: Dict[str, int] = {}
+        for review in reviews:
+            found = automaton.mentions(review)
+            if not found:
+                continue
+            p = _review_polarity(review)
+            for name in found:
+                polarity_sum[name] = polarity_sum.get(name, 0.0) + p
+                polarity_hits[name] = polarity_hits.get(name, 0) + 1
+
+        hot = [cues for word, cues in _THEMES.items() if word in blob]
+        mentions = [float(counts.get(name, 0)) for name in names]
+        sentiment = [polarity_sum.get(name, 0.0) / polarity_hits[name] if name in polarity_hits else 0.0
+                     for name in names]
+        theme = [float(sum(1 for cues in hot if any(c in name for c in cues))) for name in names]
+        index = {n: i for i, n in reversed(list(enumerate(names)))}
+        if np is not None:
+            m = np.asarray(mentions, dtype=np.float64)
+            base = (weights.mention * np.log1p(m)
+                    + weights.sentiment * np.asarray(sentiment, dtype=np.float64)
+                    + weights.theme * np.asarray(theme, dtype=np.float64))
+            return cls(key=key, store=store, items=items, index=index, mentions=m, base=base,
+                       tag_masks=_pack(tag_masks, tag_bits), tag_bits=tag_bits,
+                       nutri_masks=np.asarray(nutri, dtype=np.uint64))
+        base_py = [weights.mention * math.log1p(mentions[i]) + weights.sentiment * sentiment[i]
+                   + weights.theme * theme[i] for i in range(len(items))]
+        return cls(key=key, store=store, items=items, index=index, mentions=mentions, base=base_py,
+                   tag_masks=tag_masks, tag_bits=tag_bits, nutri_masks=nutri)
+
+
+@dataclass(frozen=True)
+class _Query:
+    """Profile fields the scorer needs, normalised once per request."""
+
+    allergies: Tuple[str, ...] = ()
+    dislikes: Tuple[str, ...] = ()
+    prefers: Tuple[str, ...] = ()
+    wanted_tags: Tuple[str, ...] = ()
+    history: Tuple[Tuple[str, int], ...] = ()
+
+    @classmethod
+    def from_profile(cls, profile: Optional[Mapping[str, Any]]) -> "_Query":
+        if not profile:
+            return cls()
+
+        def strings(key: str) -> Tuple[str, ...]:
+            values = profile.get(key) or []
+            if isinstance(values, str):
+                values = [values]
+            return tuple(str(v) for v in values if str(v).strip())
+
+        prefers = strings("prefers")
+        wanted = list(prefers)
+        for disease in strings("diseases"):
+            wanted.extend(DISEASE_TAGS.get(disease.strip(), ()))
+        history: List[Tuple[str, int]] = []
+        orders = profile.get("orders")
+        if isinstance(orders, Mapping):
+            for fav in orders.get("favorites") or []:
+                if isinstance(fav, Mapping) and fav.get("item"):
+                    history.append((normalize_name(str(fav["item"])), int(fav.get("count") or 0)))
+        return cls(
+            allergies=strings("allergies"),
+            dislikes=strings("dislikes"),
+            prefers=prefers,
+            wanted_tags=tuple(wanted),
+            history=tuple(history),
+        )
 
 
 class RecommendationEngine:
-    """Lightweight recommender focusing on senior-friendly suggestions."""
+    """Lightweight recommender focusing on senior-friendly suggestions.
 
-    def __init__(self, menus: MenuCatalog, reviews: ReviewService) -> None:
+    Per-item features (review mentions, sentiment, menu tags and nutrition
+    tags from the optional :class:`NutritionTable`) are packed into NumPy
+    arrays once per store/menu version, so a request is a handful of
+    vectorised ops plus an ``argpartition`` top-k. Allergy/dislike
+    exclusion is the catalog's item bitset (:meth:`MenuCatalog.exclusion_mask`).
+    Without NumPy the same features are scored in plain Python.
+    """
+
+    def __init__(
+        self,
+        menus: MenuCatalog,
+        reviews: ReviewService,
+        weights: Optional[ScoreWeights] = None,
+        nutrition: Optional[NutritionTable] = None,
+    ) -> None:
         self._menus = menus
         self._reviews = reviews
+        self._nutrition = nutrition
+        self.weights = weights or ScoreWeights()
+        self._tables: Dict[str, _Features] = {}
+        self._lock = RLock()
+
+    # ------------------------------------------------------------------
+    def _features(self, store: str) -> Optional[_Features]:
+        items = self._menus.list(store)
+        if not items:
+            return None
+        bundle = self._reviews.get(store)
+        key = (self._menus.version(store), id(bundle), len(bundle.reviews), len(bundle.summary),
+               self._nutrition.version if self._nutrition else 0)
+        table = self._tables.get(store)
+        if table is not None and table.key == key:
+            return table
+        with self._lock:
+            table = self._tables.get(store)
+            if table is None or table.key != key:
+                table = _Features.build(key, store, self._menus, bundle, self.weights, self._nutrition)
+                self._tables[store] = table
+        return table
+
+    def warm(self, store: str) -> None:
+        """Build the store's feature table ahead of the first request."""
+        self._features(store)
+
+    def scores(self, store: str, profile: Optional[Mapping[str, Any]] = None) -> Tuple[Tuple[MenuItem, ...], Any]:
+        """All items of ``store`` with their scores (``-inf`` = excluded by allergy/dislike)."""
+        return self._scores(store, _Query.from_profile(profile))
+
+    def _scores(self, store: str, query: _Query) -> Tuple[Tuple[MenuItem, ...], Any]:
+        table = self._features(store)
+        if table is None:
+            return (), []
+        if np is None:
+            return table.items, self._score_py(table, query)
+        return table.items, self._score_np(table, query)
+
+    def _score_np(self, table: _Features, query: _Query) -> Any:
+        w = self.weights
+        n = len(table.items)
+        score = table.base.copy()
+        wanted = self._menus.token_mask(t for t in query.wanted_tags if t not in NUTRITION_TAGS)
+        if wanted and table.tag_bits:
+            q = _pack([wanted], table.tag_bits)
+            score += w.nutrition * _popcount(table.tag_masks & q).sum(axis=1)
+        wanted_nutri = _nutrition_mask(query.wanted_tags)
+        if wanted_nutri:
+            score += w.nutrition * _popcount(table.nutri_masks & np.uint64(wanted_nutri))
+        for word in query.prefers:
+            score += w.prefer * _bits(self._menus.matching(table.store, (word,)), n)
+        for name, count in query.history:
+            i = table.index.get(name)
+            if i is not None:
+                score[i] += w.history * math.log1p(count)
+
+        blocked = self._menus.exclusion_mask(table.store, query.allergies, query.dislikes)
+        # 전부 걸러지면 필터 없이 점수만으로 고른다 (기존 동작)
+        if blocked and blocked != (1 << n) - 1:
+            score[_bits(blocked, n)] = -np.inf
+        return score
 
+    def _score_py(self, table: _Features, query: _Query) -> List[float]:
+        w = self.weights
+        n = len(table.items)
+        score = list(table.base)
+        wanted = self._menus.token_mask(t for t in query.wanted_tags if t not in NUTRITION_TAGS)
+        wanted_nutri = _nutrition_mask(query.wanted_tags)
+        history = {table.index[name]: c for name, c in query.history if name in table.index}
+        prefer = [self._menus.matching(table.store, (word,)) for word in query.prefers]
+        for i in range(n):
+            if wanted:
+                score[i] += w.nutrition * bin(table.tag_masks[i] & wanted).count("1")
+            if wanted_nutri:
+                score[i] += w.nutrition * bin(table.nutri_masks[i] & wanted_nutri).count("1")
+            score[i] += w.prefer * sum(bits >> i & 1 for bits in prefer)
+            if i in history:
+                score[i] += w.history * math.log1p(history[i])
+        blocked = self._menus.exclusion_mask(table.store, query.allergies, query.dislikes)
+        if blocked and blocked != (1 << n) - 1:
+            score = [-math.inf if blocked >> i & 1 else s for i, s in enumerate(score)]
+        return score
+
+    # ------------------------------------------------------------------
     def recommend(
         self,
         store: str,
         profile: Dict[str, object] | None = None,
         limit: int = 3,
     ) -> List[MenuItem]:
-        menu = self._menus.list(store)
-        if not menu:
+        items, score = self.scores(store, profile)
+        if not items:
             return []
-        allergies = set()
-        dislikes = set()
-        if profile:
-            allergies = {str(a) for a in profile.get("allergies", [])}
-            dislikes = {str(a) for a in profile.get("dislikes", [])}
-        filtered: List[MenuItem] = []
-        for item in menu:
-            if allergies and (allergies & set(item.allergens)):
-                continue
-            if dislikes and any(d in item.name for d in dislikes):
-                continue
-            filtered.append(item)
-        if not filtered:
-            filtered = menu
+        return [items[i] for i in top_k(score, limit)]
 
-        bundle = self._reviews.get(store)
-        text_blob = " ".join(bundle.reviews + [bundle.summary])
-        scored = []
-        for item in filtered:
-            score = 0
-            if item.name and item.name in text_blob:
-                score += 2
-            if "부드럽" in text_blob and ("죽" in item.name or "스프" in item.name):
-                score += 1
-            if "담백" in text_blob and ("정식" in item.name or "구이" in item.name):
-                score += 1
-            scored.append((score, item))
-        scored.sort(key=lambda tup: tup[0], reverse=True)
-        return [itm for _, itm in scored[:limit]] or filtered[:limit]
-
-
-__all__ = ["RecommendationEngine"]
+    def recommend_across(
+        self,
+        stores: Sequence[str],
+        profile: Dict[str, object] | None = None,
+        limit: int = 3,
+    ) -> List[Tuple[str, MenuItem]]:
+        """Best ``limit`` items over several stores, ranked on one score scale."""
+        owners: List[Tuple[str, Tuple[MenuItem, ...]]] = []
+        parts: List[Any] = []
+        query = _Query.from_profile(profile)
+        for store in stores:
+            items, score = self._scores(store, query)
+            if items:
+                owners.append((store, items))
+                parts.append(score)
+        if not parts:
+            return []
+        if np is not None:
+            flat = np.concatenate(parts)
+        else:
+            flat = [s for part in parts for s in part]
+        offsets = list(itertools.accumulate(len(items) for _, items in owners))
+        out: List[Tuple[str, MenuItem]] = []
+        for i in top_k(flat, limit):
+            j = bisect.bisect_right(offsets, i)
+            start = offsets[j - 1] if j else 0
+            out.append((owners[j][0], owners[j][1][i - start]))
+        return out
+
+    def invalidate(self, store: Optional[str] = None) -> None:
+        with self._lock:
+            if store is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(store, None)
+
+
+def top_k(score: Any, k: int) -> List[int]:
+    """Indices of the ``k`` best finite scores, best first (ties keep catalog order)."""
+    if k <= 0:
+        return []
+    if np is not None:
+        score = np.asarray(score, dtype=np.float64)
+        n = score.shape[0]
+        if k < n:
+            # k번째 점수와 같은 후보를 모두 남겨야 동점이 카탈로그 순서로 갈린다 (argpartition은 임의로 자름)
+            kth = np.partition(score, n - k)[n - k]
+            cand = np.flatnonzero(score >= kth)
+        else:
+            cand = np.arange(n)
+        cand = cand[np.lexsort((cand, -score[cand]))][:k]
+        return [int(i) for i in cand if np.isfinite(score[i])]
+    ranked = heapq.nsmallest(k, range(len(score)), key=lambda i: (-score[i], i))
+    return [i for i in ranked if math.isfinite(score[i])]
+
+
+__all__ = ["RecommendationEngine", "ScoreWeights", "top_k"]
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import re
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .menus import normalize_name
 
 
 @dataclass
@@ -65,4 +70,195 @@ class ReviewService:
         self._data[bundle.store] = bundle
 
 
-__all__ = ["ReviewService", "ReviewBundle"]
+class MentionAutomaton:
+    """Aho–Corasick automaton over normalised menu names.
+
+    :meth:`count` walks the text once and reports every (possibly
+    overlapping) occurrence of every name, so the cost does not grow with the
+    number of menu items. Names and text are compared via
+    :func:`normalize_name` (spaces removed, lower-cased).
+    """
+
+    __slots__ = ("names", "_goto", "_fail", "_out")
+
+    def __init__(self, names: Iterable[str]) -> None:
+        keys: Dict[str, str] = {}
+        for name in names:
+            key = normalize_name(name)
+            if key and key not in keys:
+                keys[key] = str(name).strip()
+        self.names: Tuple[str, ...] = tuple(keys.values())
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[int, ...]] = [()]
+        for idx, key in enumerate(keys):
+            state = 0
+            for ch in key:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] += (idx,)
+        # 실패 링크: BFS 순서로 더 얕은 상태가 먼저 확정된다
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def count(self, text: str) -> List[int]:
+        """Occurrences of each of :attr:`names` in ``text`` (same order)."""
+        counts = [0] * len(self.names)
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in normalize_name(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx in out[state]:
+                counts[idx] += 1
+        return counts
+
+    def mentions(self, text: str) -> Dict[str, int]:
+        """``{name: count}`` for the names that occur at least once."""
+        return {self.names[i]: c for i, c in enumerate(self.count(text)) if c}
+
+
+class HighlightMatcher:
+    """Keyword-pattern → label table compiled into one alternation.
+
+    ``labels(text)`` is a single ``finditer`` pass; labels come back in table
+    order no matter where they appear in the text.
+    """
+
+    def __init__(self, patterns: Sequence[Tuple[str, str]]) -> None:
+        self._labels = tuple(label for _, label in patterns)
+        self._regex = re.compile("|".join(f"(?P<h{i}>{pat})" for i, (pat, _) in enumerate(patterns)))
+
+    def labels(self, text: str, limit: int = 6) -> List[str]:
+        hit = set()
+        for m in self._regex.finditer(text or ""):
+            hit.add(int(m.lastgroup[1:]))  # type: ignore[index]
+            if len(hit) == len(self._labels):
+                break
+        return [self._labels[i] for i in sorted(hit)][:limit]
+
+
+def classify_rating(rating: float) -> str:
+    if rating >= 4:
+        return "positive"
+    if rating <= 2:
+        return "negative"
+    return "neutral"
+
+
+@dataclass
+class _MenuStats:
+    count: int = 0
+    rating_sum: float = 0.0
+    positive: int = 0
+    neutral: int = 0
+    negative: int = 0
+    samples: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _StoreStats:
+    menus: Dict[str, _MenuStats] = field(default_factory=dict)
+    sentiment: Dict[str, int] = field(default_factory=lambda: {"positive": 0, "neutral": 0, "negative": 0})
+    mentions: Dict[str, int] = field(default_factory=dict)
+    automaton: Optional[MentionAutomaton] = None
+    summary: Optional[Dict[str, Any]] = None  # aggregate() 결과 캐시, add 시 무효화
+
+
+class ReviewIndex:
+    """Per-store review aggregates updated incrementally as reviews arrive.
+
+    Rated reviews feed per-menu sentiment counters; free-text reviews are
+    scanned once by the store's :class:`MentionAutomaton` (set with
+    :meth:`set_menu`). :meth:`aggregate` is cached until the next ``add``.
+    """
+
+    def __init__(self, sample_limit: int = 2, top_menus: int = 20) -> None:
+        self._stores: Dict[str, _StoreStats] = {}
+        self._sample_limit = sample_limit
+        self._top_menus = top_menus
+        self._lock = RLock()
+
+    def set_menu(self, store: str, names: Iterable[str]) -> None:
+        """Menu names counted in review text added from now on."""
+        with self._lock:
+            self._stores.setdefault(store, _StoreStats()).automaton = MentionAutomaton(names)
+
+    def add(self, store: str, text: str = "", menu: Optional[str] = None, rating: Optional[float] = None) -> None:
+        with self._lock:
+            stats = self._stores.setdefault(store, _StoreStats())
+            stats.summary = None
+            if rating is not None:
+                sentiment = classify_rating(rating)
+                stats.sentiment[sentiment] += 1
+                if menu:
+                    bucket = stats.menus.setdefault(menu, _MenuStats())
+                    bucket.count += 1
+                    bucket.rating_sum += float(rating)
+                    setattr(bucket, sentiment, getattr(bucket, sentiment) + 1)
+                    if text and len(bucket.samples) < self._sample_limit:
+                        bucket.samples.append(text)
+            if text and stats.automaton is not None:
+                for name, c in stats.automaton.mentions(text).items():
+                    stats.mentions[name] = stats.mentions.get(name, 0) + c
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Add ``{"store", "menu", "rating", "review"}`` rows."""
+        for row in rows:
+            self.add(str(row.get("store", "")), str(row.get("review") or ""), row.get("menu"), row.get("rating"))
+
+    def mentions(self, store: str) -> Dict[str, int]:
+        stats = self._stores.get(store)
+        return dict(stats.mentions) if stats else {}
+
+    def aggregate(self, store: str) -> Dict[str, Any]:
+        """Rated-review summary: overall sentiment counts and menus ranked by score.
+
+        A menu's ``score`` is ``(positive - negative) * 2 + avg_rating * 0.3``.
+        """
+        with self._lock:
+            stats = self._stores.get(store)
+            if stats is None:
+                return {"count": 0, "positive": 0, "neutral": 0, "negative": 0, "menus": []}
+            if stats.summary is None:
+                menus = []
+                for name, b in stats.menus.items():
+                    avg = b.rating_sum / b.count
+                    menus.append({
+                        "menu": name, "positive": b.positive, "neutral": b.neutral, "negative": b.negative,
+                        "samples": list(b.samples), "avg_rating": round(avg, 2),
+                        "score": (b.positive - b.negative) * 2 + avg * 0.3,
+                    })
+                menus.sort(key=lambda x: (-x["score"], -x["avg_rating"], -x["positive"]))
+                stats.summary = {"count": sum(stats.sentiment.values()), **stats.sentiment,
+                                 "menus": menus[: self._top_menus]}
+            summary = stats.summary
+        # 호출자가 고쳐도 캐시가 오염되지 않도록 얕은 복사
+        return {**summary, "menus": [dict(m, samples=list(m["samples"])) for m in summary["menus"]]}
+
+
+__all__ = [
+    "ReviewService",
+    "ReviewBundle",
+    "ReviewIndex",
+    "MentionAutomaton",
+    "HighlightMatcher",
+    "classify_rating",
+]
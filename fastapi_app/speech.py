@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import codecs
 import os
+import threading
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Protocol
 
 try:  # External dependency; keep optional for tests
     import azure.cognitiveservices.speech as speechsdk  # type: ignore
@@ -82,5 +84,140 @@ class AzureSpeechService:
             return SpeechResult(text=None, raw=payload, error="Recognition canceled")
         return SpeechResult(text=None, raw=payload, error="Unknown recognition result")
 
+    def open_stream(self, on_event: "SpeechEventHandler", sample_rate: int = 16000) -> Optional["AzureStreamingRecognizer"]:
+        """Start continuous recognition over a long-lived push stream."""
+        if not self.available:
+            return None
+        recognizer = AzureStreamingRecognizer(self._config, on_event, sample_rate=sample_rate)
+        recognizer.start()
+        return recognizer
+
+
+# ---------------------------------------------------------------------------
+# Streaming recognition
+# ---------------------------------------------------------------------------
+# on_event(kind, text): kind ∈ {"partial", "final", "error", "end"}
+SpeechEventHandler = Callable[[str, Optional[str]], None]
+
+
+class StreamingRecognizer(Protocol):
+    def write(self, chunk: bytes) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class AzureStreamingRecognizer:
+    """Continuous Azure recognition fed chunk by chunk (16-bit mono PCM).
+
+    SDK callbacks fire on SDK threads; ``on_event`` must be thread-safe.
+    """
+
+    def __init__(self, config: Any, on_event: SpeechEventHandler, sample_rate: int = 16000) -> None:
+        assert speechsdk is not None  # for type checkers
+        self._on_event = on_event
+        fmt = speechsdk.audio.AudioStreamFormat(samples_per_second=sample_rate, bits_per_sample=16, channels=1)
+        self._stream = speechsdk.audio.PushAudioInputStream(stream_format=fmt)
+        audio_config = speechsdk.audio.AudioConfig(stream=self._stream)
+        self._recognizer = speechsdk.SpeechRecognizer(speech_config=config, audio_config=audio_config)
+        self._closed = False
+
+        self._recognizer.recognizing.connect(lambda evt: on_event("partial", evt.result.text))
+        self._recognizer.recognized.connect(self._on_recognized)
+        self._recognizer.canceled.connect(self._on_canceled)
+        self._recognizer.session_stopped.connect(lambda evt: on_event("end", None))
+
+    def start(self) -> None:
+        self._recognizer.start_continuous_recognition_async().get()
+
+    def write(self, chunk: bytes) -> None:
+        if chunk and not self._closed:
+            self._stream.write(chunk)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        # 스트림을 닫으면 남은 오디오까지 인식한 뒤 session_stopped가 온다
+        self._stream.close()
+
+    def stop(self) -> None:
+        self.close()
+        try:
+            self._recognizer.stop_continuous_recognition_async().get()
+        except Exception:  # pragma: no cover - network/runtime errors
+            pass
+
+    def _on_recognized(self, evt: Any) -> None:
+        result = evt.result
+        if result.reason == speechsdk.ResultReason.RecognizedSpeech and result.text:
+            self._on_event("final", result.text)
+
+    def _on_canceled(self, evt: Any) -> None:
+        details = evt.cancellation_details if hasattr(evt, "cancellation_details") else evt
+        if getattr(details, "reason", None) == speechsdk.CancellationReason.Error:
+            self._on_event("error", getattr(details, "error_details", None) or "Recognition canceled")
+        self._on_event("end", None)
+
+
+class FakeStreamingRecognizer:
+    """Local stand-in for :class:`AzureStreamingRecognizer` (tests/dev without Azure).
+
+    Chunks are decoded as UTF-8 text instead of audio: every chunk emits a
+    ``partial`` with the utterance so far, a newline ends an utterance with a
+    ``final`` and :meth:`close` flushes the rest and emits ``end``. With a
+    fixed ``transcript`` each chunk reveals a bit more of it instead.
+    """
+
+    def __init__(self, on_event: SpeechEventHandler, transcript: Optional[str] = None, step: int = 2) -> None:
+        self._on_event = on_event
+        self._transcript = transcript
+        self._step = max(1, step)
+        self._shown = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._text = ""
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def write(self, chunk: bytes) -> None:
+        with self._lock:
+            if self._closed or not chunk:
+                return
+            if self._transcript is not None:
+                self._shown = min(len(self._transcript), self._shown + self._step)
+                self._on_event("partial", self._transcript[: self._shown])
+                return
+            # 청크 경계에서 잘린 멀티바이트 문자는 디코더가 다음 청크와 이어 붙임
+            for ch in self._decoder.decode(chunk):
+                if ch == "\n":
+                    self._emit_final()
+                else:
+                    self._text += ch
+            if self._text.strip():
+                self._on_event("partial", self._text.strip())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._transcript is not None:
+                self._text, self._transcript = self._transcript, None
+            self._emit_final()
+            self._on_event("end", None)
+
+    stop = close
+
+    def _emit_final(self) -> None:
+        text, self._text = self._text.strip(), ""
+        if text:
+            self._on_event("final", text)
+
 
-__all__ = ["AzureSpeechService", "SpeechResult"]
+__all__ = [
+    "AzureSpeechService",
+    "SpeechResult",
+    "SpeechEventHandler",
+    "StreamingRecognizer",
+    "AzureStreamingRecognizer",
+    "FakeStreamingRecognizer",
+]
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import os
+import sys
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 에이전트는 최근 몇 턴만 읽으므로 대화 기록은 링 버퍼처럼 최근 N개만 유지
+HISTORY_LIMIT = int(os.getenv("AGENT_HISTORY_LIMIT", "20"))
 
 
 class ConversationStage(str, Enum):
@@ -15,24 +19,116 @@ class ConversationStage(str, Enum):
     ORDER_COMPLETE = "order_complete"
 
 
-@dataclass
+_ROLES = {role: sys.intern(role) for role in ("user", "assistant", "system", "tool")}
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    # 매장명/메뉴명은 종류가 적어 세션끼리 같은 문자열 객체를 공유
+    return sys.intern(value) if isinstance(value, str) and len(value) <= 64 else value
+
+
 class OrderSession:
-    session_id: str
-    stage: ConversationStage = ConversationStage.NEED_STORE
-    store: str = ""
-    selected_menu: Optional[str] = None
-    quantity: Optional[int] = None
-    recommendations: List[str] = field(default_factory=list)
-    profile: Dict[str, object] = field(default_factory=dict)
-    last_agent_message: str = ""
-    history: List[Dict[str, str]] = field(default_factory=list)
+    """One kiosk conversation, laid out to keep idle sessions small.
+
+    ``__slots__`` instead of a per-instance ``__dict__``; history is a bounded
+    ring of ``(role, message)`` tuples with interned roles; store/menu names
+    are interned; the profile dict is only allocated once it is written to.
+    """
+
+    __slots__ = (
+        "session_id",
+        "stage",
+        "_store",
+        "_selected_menu",
+        "quantity",
+        "_recommendations",
+        "_profile",
+        "last_agent_message",
+        "_history",
+    )
+
+    history_limit: int = HISTORY_LIMIT
+
+    def __init__(
+        self,
+        session_id: str,
+        stage: ConversationStage = ConversationStage.NEED_STORE,
+        store: str = "",
+        selected_menu: Optional[str] = None,
+        quantity: Optional[int] = None,
+        recommendations: Iterable[str] = (),
+        profile: Optional[Dict[str, object]] = None,
+        last_agent_message: str = "",
+        history: Iterable[Tuple[str, str]] = (),
+    ) -> None:
+        self.session_id = session_id
+        self.stage = stage
+        self.store = store
+        self.selected_menu = selected_menu
+        self.quantity = quantity
+        self.recommendations = recommendations
+        self._profile: Optional[Dict[str, object]] = dict(profile) if profile else None
+        self.last_agent_message = last_agent_message
+        self._history: Tuple[Tuple[str, str], ...] = ()
+        for role, message in history:
+            self.remember(role, message)
+
+    # ------------------------------------------------------------------
+    @property
+    def store(self) -> str:
+        return self._store
+
+    @store.setter
+    def store(self, value: str) -> None:
+        self._store = _intern(value or "")
+
+    @property
+    def selected_menu(self) -> Optional[str]:
+        return self._selected_menu
+
+    @selected_menu.setter
+    def selected_menu(self, value: Optional[str]) -> None:
+        self._selected_menu = _intern(value)
+
+    @property
+    def recommendations(self) -> List[str]:
+        return list(self._recommendations)
+
+    @recommendations.setter
+    def recommendations(self, value: Iterable[str]) -> None:
+        self._recommendations: Tuple[str, ...] = tuple(_intern(v) for v in value or ())
+
+    @property
+    def profile(self) -> Dict[str, object]:
+        if self._profile is None:
+            self._profile = {}
+        return self._profile
+
+    @property
+    def history(self) -> Tuple[Tuple[str, str], ...]:
+        """``(role, message)`` pairs, oldest first, at most ``history_limit``."""
+        return self._history
+
+    def recent(self, n: int) -> List[Tuple[str, str]]:
+        return list(self._history[-n:]) if n > 0 else []
+
+    def history_dicts(self) -> List[Dict[str, str]]:
+        return [{"role": role, "message": message} for role, message in self.history]
 
     def remember_agent(self, message: str) -> None:
         self.last_agent_message = message
-        self.history.append({"role": "assistant", "message": message})
+        self.remember("assistant", message)
 
     def remember_user(self, message: str) -> None:
-        self.history.append({"role": "user", "message": message})
+        self.remember("user", message)
+
+    def remember(self, role: str, message: str) -> None:
+        # 짧은 기록에서는 deque(고정 64칸 블록)보다 튜플을 새로 만드는 편이 훨씬 작다
+        entry = (_ROLES.get(role) or sys.intern(str(role)), message)
+        history = self._history + (entry,)
+        if len(history) > self.history_limit:
+            history = history[-self.history_limit:]
+        self._history = history
 
     def as_state(self) -> Dict[str, object]:
         return {
@@ -43,5 +139,47 @@ class OrderSession:
             "recommendations": self.recommendations,
         }
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-JSON snapshot used by persistent session stores."""
+        return {
+            "session_id": self.session_id,
+            "stage": self.stage.value,
+            "store": self.store,
+            "selected_menu": self.selected_menu,
+            "quantity": self.quantity,
+            "recommendations": list(self._recommendations),
+            "profile": dict(self._profile or {}),
+            "last_agent_message": self.last_agent_message,
+            "history": self.history_dicts(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OrderSession":
+        try:
+            stage = ConversationStage(data.get("stage"))
+        except ValueError:
+            stage = ConversationStage.NEED_STORE
+        session = cls(
+            session_id=str(data.get("session_id") or "default"),
+            stage=stage,
+            store=str(data.get("store") or ""),
+            selected_menu=data.get("selected_menu"),
+            quantity=data.get("quantity"),
+            recommendations=[str(r) for r in data.get("recommendations") or []],
+            profile=data.get("profile") or None,
+            last_agent_message=str(data.get("last_agent_message") or ""),
+        )
+        for turn in data.get("history") or []:
+            if isinstance(turn, dict):
+                session.remember(str(turn.get("role")), str(turn.get("message")))
+        return session
+
+    def __repr__(self) -> str:
+        return (
+            f"OrderSession(session_id={self.session_id!r}, stage={self.stage.value!r}, "
+            f"store={self.store!r}, selected_menu={self.selected_menu!r}, quantity={self.quantity!r}, "
+            f"history={len(self.history)})"
+        )
+
 
 __all__ = ["OrderSession", "ConversationStage"]
@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""Load test: replay multi-turn senior ordering scripts against the in-process app.
+
+The FastAPI app runs in this process (httpx ASGI transport, no server) with
+deterministic stand-ins for every external dependency:
+
+- ``ScriptedLLM`` replaces ``AzureLLM``: keyword-driven tool calls (reviews,
+  catalog_list, nutrition), then a final JSON answer; latency is
+  ``--llm-latency`` ± ``--llm-jitter`` seconds per call (streamed in chunks
+  for the SSE route).
+- ``FakeSpeechService`` / ``FakeTranscriber`` replace Azure Speech and the
+  audio transcription model: the uploaded "audio" is the UTF-8 utterance.
+- ``FakeWeb`` replaces the HTTP fetcher behind the DuckDuckGo HTML search with
+  canned result pages (``--web-latency`` per request).
+
+Virtual users each replay ordering scripts (a mix of fast-path and LLM turns)
+``--iterations`` times at ``--users`` concurrency. The report covers
+throughput, per-endpoint latency percentiles, time to the first spoken
+sentence (``--stream``), the agent's own span breakdown (/agent/stats) and
+resident memory per session. ``--micro`` adds per-call timings of MenuCatalog
+and the tools. ``--json`` saves the numbers; ``--baseline`` compares against
+a saved run and exits 1 when a p95 (or micro timing) regresses beyond
+``--tolerance``.
+
+    python tools/bench_agent_load.py --users 50 --iterations 4
+    python tools/bench_agent_load.py --stream --audio --micro --json bench.json
+    python tools/bench_agent_load.py --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+STORE = "맥도날드"
+
+# 손님 한 명이 주문을 끝내기까지의 발화. {menu}는 가상 사용자마다 고정된 메뉴로 채움
+SCRIPTS: Dict[str, List[str]] = {
+    "direct": ["빅맥 하나 주세요", "두 개요", "네 주문할게요"],
+    "browse": ["안녕하세요 뭐가 맛있어요?", "부드러운 메뉴 추천해 주세요", "{menu}로 할게요", "하나요", "주문할게요"],
+    "change": ["치즈버거 주세요", "아니 불고기 버거로 바꿔 주세요", "세 개", "하나 빼 주세요", "네 주문할게요"],
+    "nutrition": ["짜지 않은 메뉴 뭐 있어요?", "에그 맥머핀 칼로리 얼마예요?", "그걸로 하나 주세요", "주문할게요"],
+}
+
+_RECOMMEND_RE = re.compile(r"추천|뭐가|뭐 있|맛있|좋아")
+_NUTRITION_RE = re.compile(r"칼로리|영양|짜지|나트륨|당")
+_STORE_RE = re.compile(r"매장: ([^|\n]+)")
+_ORDER_RE = re.compile(r"주문할게|주문해")
+_COUNTS = {"하나": 1, "한 개": 1, "두 개": 2, "세 개": 3, "네 개": 4}
+_SNIPPET_WORDS = ["맛있어요", "부드러워요", "짜요", "양이 많아요", "최고예요", "별로였어요", "담백해요"]
+
+
+# ---------------------------------------------------------------------------
+# Fakes
+# ---------------------------------------------------------------------------
+class _Latency:
+    """Seeded gaussian latency shared by threads and coroutines."""
+
+    def __init__(self, mean: float, jitter: float, seed: int) -> None:
+        self.mean, self.jitter = mean, jitter
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> float:
+        if self.mean <= 0:
+            return 0.0
+        with self._lock:
+            return max(0.0, self._rnd.gauss(self.mean, self.jitter))
+
+
+class ScriptedLLM:
+    """Deterministic ``AzureLLM`` stand-in (chat / achat / astream)."""
+
+    available = True
+
+    def __init__(self, menu_names: List[str], latency: _Latency, chunk: int = 12) -> None:
+        from agent.prompt import estimate_tokens
+
+        self._estimate = estimate_tokens
+        # 긴 이름부터 찾아야 "불고기 버거"가 "더블 불고기 버거" 안에서 먼저 걸리지 않음
+        self.menu = sorted(menu_names, key=len, reverse=True)
+        self.latency = latency
+        self.chunk = chunk
+        self.calls = 0
+
+    # --- policy ----------------------------------------------------------
+    def _reply(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self.calls += 1
+        user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        found = _STORE_RE.search(messages[0].get("content") or "")
+        store = found.group(1).strip() if found else STORE
+        if messages[-1].get("role") == "user":
+            calls = self._tool_calls(user, store)
+            if calls:
+                return self._message(None, messages, calls)
+        return self._message(json.dumps(self._answer(user, messages), ensure_ascii=False), messages)
+
+    def _tool_calls(self, user: str, store: str) -> List[Dict[str, Any]]:
+        calls: List[Tuple[str, Dict[str, Any]]] = []
+        if _RECOMMEND_RE.search(user):
+            calls += [("reviews", {"store": store}), ("catalog_list", {"store": store})]
+        if _NUTRITION_RE.search(user):
+            name = self._menu_in(user)
+            calls.append(("nutrition", {"name": name, "store": store}) if name else ("catalog_list", {"store": store}))
+        return [
+            {"id": f"call-{i}", "type": "function", "function": {"name": n, "arguments": json.dumps(a, ensure_ascii=False)}}
+            for i, (n, a) in enumerate(calls)
+        ]
+
+    def _answer(self, user: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if _ORDER_RE.search(user):
+            return {"speak": "주문을 접수해 두었어요. 더 도와드릴까요?", "actions": [{"type": "ORDER"}]}
+        qty = next((n for word, n in _COUNTS.items() if word in user), None)
+        if qty is not None and "빼" in user:
+            return {"speak": "하나 덜어 드릴게요.", "actions": [{"type": "DECREMENT_QTY"}, {"type": "READ_BACK_SUMMARY"}]}
+        name = self._menu_in(user)
+        if qty is not None and not name:
+            return {"speak": f"{qty}개로 할게요.", "actions": [{"type": "SET_QTY", "value": qty}, {"type": "READ_BACK_SUMMARY"}]}
+        if name:
+            return {
+                "speak": f"{name} 좋은 선택이에요. 몇 개 드릴까요?",
+                "actions": [{"type": "SELECT_MENU_BY_NAME", "name": name}],
+            }
+        listed: List[str] = []
+        for m in messages:
+            if m.get("role") == "tool" and m.get("name") == "catalog_list":
+                try:
+                    listed = [row["name"] for row in json.loads(m.get("content") or "[]")][:3]
+                except (ValueError, KeyError, TypeError):
+                    listed = []
+        if listed:
+            return {
+                "speak": f"{', '.join(listed)}를 권해 드려요. 천천히 골라 보세요.",
+                "actions": [{"type": "SHOW_RECOMMENDATIONS", "items": [{"name": n} for n in listed]}],
+            }
+        return {"speak": "네, 천천히 말씀해 주세요. 무엇을 드릴까요?", "actions": []}
+
+    def _menu_in(self, text: str) -> Optional[str]:
+        compact = text.replace(" ", "")
+        return next((n for n in self.menu if n.replace(" ", "") in compact), None)
+
+    def _message(self, content: Optional[str], messages: List[Dict[str, Any]],
+                 tool_calls: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        prompt = sum(self._estimate(str(m.get("content") or "")) for m in messages)
+        out: Dict[str, Any] = {
+            "role": "assistant",
+            "content": content,
+            "usage": {
+                "prompt_tokens": prompt,
+                "completion_tokens": self._estimate(content or json.dumps(tool_calls or [])),
+                "cached_tokens": self._estimate(str(messages[0].get("content") or "")),
+            },
+        }
+        if tool_calls:
+            out["tool_calls"] = tool_calls
+            out["tool_call"] = {"id": tool_calls[0]["id"], **tool_calls[0]["function"]}
+        return out
+
+    # --- AzureLLM surface ------------------------------------------------
+    def chat(self, messages, tools=None, tool_choice=None):
+        time.sleep(self.latency.draw())
+        return self._reply(messages)
+
+    async def achat(self, messages, tools=None, tool_choice=None):
+        await asyncio.sleep(self.latency.draw())
+        return self._reply(messages)
+
+    async def astream(self, messages, tools=None, tool_choice=None) -> AsyncIterator[Tuple[str, Any]]:
+        total = self.latency.draw()
+        res = self._reply(messages)
+        text = res.get("content") or ""
+        pieces = [text[i:i + self.chunk] for i in range(0, len(text), self.chunk)]
+        # 첫 토큰까지 지연의 대부분, 나머지는 조각마다 나눠서
+        await asyncio.sleep(total * 0.6)
+        for piece in pieces:
+            await asyncio.sleep(total * 0.4 / max(1, len(pieces)))
+            yield "delta", piece
+        yield "done", res
+
+
+class FakeSpeechService:
+    """``AzureSpeechService`` stand-in: the uploaded bytes are the utterance."""
+
+    available = True
+
+    def __init__(self, latency: _Latency) -> None:
+        self.latency = latency
+
+    def transcribe(self, audio: bytes):
+        from fastapi_app.speech import SpeechResult
+
+        time.sleep(self.latency.draw())
+        return SpeechResult(text=audio.decode("utf-8", "replace").strip(), raw={"fake": True})
+
+    def open_stream(self, on_event, sample_rate: int = 16000):
+        from fastapi_app.speech import FakeStreamingRecognizer
+
+        return FakeStreamingRecognizer(on_event)
+
+
+class FakeTranscriber:
+    """``AzureAudioTranscriber`` stand-in (used when the speech service is off)."""
+
+    available = True
+
+    def __init__(self, latency: _Latency) -> None:
+        self.latency = latency
+
+    def transcribe(self, audio: bytes, filename: str = "audio.wav", mime_type: str = "audio/wav") -> Dict[str, Any]:
+        time.sleep(self.latency.draw())
+        return {"text": audio.decode("utf-8", "replace").strip(), "raw": {"fake": True, "filename": filename}}
+
+
+class FakeWeb:
+    """Replaces ``agent.tools._get``: canned DuckDuckGo HTML, stable per query."""
+
+    def __init__(self, menu_names: List[str], latency: _Latency, results: int = 8) -> None:
+        self.menu = menu_names
+        self.latency = latency
+        self.results = results
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str, timeout: int = 8) -> Optional[str]:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency.draw())
+        rnd = random.Random(zlib.crc32(url.encode("utf-8")))
+        if "duckduckgo.com" not in url:
+            return f"<html><body><p>{' '.join(rnd.choice(self.menu) + ' ' + rnd.choice(_SNIPPET_WORDS) for _ in range(6))}</p></body></html>"
+        rows = []
+        for i in range(self.results):
+            a, b = rnd.sample(self.menu, 2)
+            rows.append(
+                f'<div class="result"><a rel="nofollow" class="result__a" href="https://blog.example.com/{i}">'
+                f"{STORE} 후기 {i}</a><a class=\"result__snippet\" href=\"#\">{a} {rnd.choice(_SNIPPET_WORDS)}. "
+                f"{b}도 {rnd.choice(_SNIPPET_WORDS)} 별점 {rnd.randint(1, 5)}점</a></div>"
+            )
+        return "<html><body>" + "".join(rows) + "</body></html>"
+
+
+# ---------------------------------------------------------------------------
+# App setup
+# ---------------------------------------------------------------------------
+def load_app(args, workdir: Path):
+    """Import ``fastapi_app.main`` with every external dependency faked."""
+    for key in list(os.environ):
+        if key.startswith(("AZURE_", "AUDIO_OPENAI_", "SPEECH_")) or key in ("AGENT_SESSION_DB", "TOOL_CACHE_PATH"):
+            os.environ.pop(key)
+    os.environ["USER_DB_PATH"] = str(workdir / "users.sqlite3")
+    os.environ["NUTRITION_BACKFILL"] = "0"
+    os.environ.setdefault("AGENT_LOG_LEVEL", "WARNING")
+
+    import fastapi_app.main as app_main
+    from agent import tools as toolmod
+
+    names = [m.name for m in app_main.catalog.list(STORE)]
+    llm = ScriptedLLM(names, _Latency(args.llm_latency, args.llm_jitter, args.seed))
+    web = FakeWeb(names, _Latency(args.web_latency, args.web_latency / 4, args.seed + 1))
+    stt = _Latency(args.stt_latency, args.stt_latency / 4, args.seed + 2)
+
+    app_main.agent.llm = llm
+    app_main.speech_service = FakeSpeechService(stt) if args.stt == "speech" else _Unavailable()
+    app_main.transcriber = FakeTranscriber(stt)
+    toolmod._get = web.get  # _ddg_search / _fetch_many 모두 이 함수를 거침
+    if not args.fast_path:
+        from agent import core
+
+        core.FAST_PATH_ENABLED = False
+    return app_main, llm, web
+
+
+class _Unavailable:
+    available = False
+
+
+# ---------------------------------------------------------------------------
+# Load
+# ---------------------------------------------------------------------------
+class Results:
+    def __init__(self) -> None:
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.turns = 0
+        self.orders = 0
+
+    def add(self, endpoint: str, seconds: float, ok: bool) -> None:
+        self.latency[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+
+async def stream_turn(app: Any, payload: Dict[str, Any]) -> Tuple[int, Optional[float], Dict[str, Any]]:
+    """POST to the SSE route straight through ASGI (httpx's transport buffers the body).
+
+    Returns ``(status, seconds to first "sentence" event, final payload)``.
+    """
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/agent/chat/stream", "raw_path": b"/agent/chat/stream",
+        "query_string": b"", "root_path": "", "client": ("bench", 0), "server": ("bench", 80),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    }
+    sent = False
+    done = asyncio.Event()
+    t0 = time.perf_counter()
+    first: Optional[float] = None
+    status = 0
+    buf = b""
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status, first, buf
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body") or b""
+            if first is None and b"event: sentence" in chunk:
+                first = time.perf_counter() - t0
+            buf += chunk
+            if not message.get("more_body"):
+                done.set()
+
+    await app(scope, receive, send)
+    final: Dict[str, Any] = {}
+    for block in buf.decode("utf-8").split("\n\n"):
+        if block.startswith("event: final"):
+            final = json.loads(block.split("data: ", 1)[1])
+    return status, first, final
+
+
+async def run_user(client: Any, app: Any, idx: int, args, menu: List[str], results: Results) -> None:
+    names = sorted(SCRIPTS)
+    rnd = random.Random(args.seed * 1000 + idx)
+    favourite = rnd.choice(menu)
+    for it in range(args.iterations):
+        script = SCRIPTS[names[(idx + it) % len(names)]]
+        session_id, user_id = f"bench-{idx}-{it}", f"bench-user-{idx % args.profiles}"
+        for line in script:
+            text = line.format(menu=favourite)
+            if args.audio:
+                t0 = time.perf_counter()
+                r = await client.post("/api/audio/transcribe", files={"file": ("turn.wav", text.encode("utf-8"), "audio/wav")})
+                results.add("stt", time.perf_counter() - t0, r.status_code == 200)
+                if r.status_code == 200:
+                    text = r.json().get("text") or text
+            payload = {"sessionId": session_id, "message": text, "store": STORE, "userId": user_id}
+            t0 = time.perf_counter()
+            if args.stream:
+                status, first, final = await stream_turn(app, payload)
+                results.add("chat_stream", time.perf_counter() - t0, status == 200 and bool(final))
+                if first is not None:
+                    results.add("first_sentence", first, True)
+            else:
+                r = await client.post("/agent/chat", json=payload)
+                final = r.json() if r.status_code == 200 else {}
+                results.add("chat", time.perf_counter() - t0, r.status_code == 200)
+            results.turns += 1
+            results.orders += any(a.get("type") == "ORDER" for a in final.get("actions") or [])
+            if args.think > 0:
+                await asyncio.sleep(rnd.uniform(0, 2 * args.think))
+
+
+async def run_load(app_main, args) -> Dict[str, Any]:
+    import httpx
+    from agent.tracing import tracer
+
+    menu = [m.name for m in app_main.catalog.list(STORE)]
+    transport = httpx.ASGITransport(app=app_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        # 워밍업: 프롬프트 prefix/특징 테이블/검색 캐시를 채운 뒤 지표 초기화
+        warm = argparse.Namespace(**{**vars(args), "iterations": len(SCRIPTS), "think": 0})
+        await run_user(client, app_main.app, -1, warm, menu, Results())
+        tracer.reset()
+
+        results = Results()
+        if args.tracemalloc:
+            tracemalloc.start()
+        sessions_before = app_main.agent.memory.stats()["sessions"]
+        t0 = time.perf_counter()
+        await asyncio.gather(*(run_user(client, app_main.app, i, args, menu, results) for i in range(args.users)))
+        elapsed = time.perf_counter() - t0
+        traced = tracemalloc.get_traced_memory()[0] if args.tracemalloc else None
+        if args.tracemalloc:
+            tracemalloc.stop()
+        stats = (await client.get("/agent/stats")).json()
+
+    sessions = max(1, stats["sessions"]["sessions"] - sessions_before)
+    return {
+        "config": {k: getattr(args, k) for k in (
+            "users", "iterations", "stream", "audio", "fast_path", "llm_latency", "web_latency", "seed")},
+        "elapsed_s": round(elapsed, 3),
+        "turns": results.turns,
+        "orders": results.orders,
+        "throughput_turns_s": round(results.turns / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {ep: summarize(v) for ep, v in sorted(results.latency.items())},
+        "errors": dict(results.errors),
+        "spans_ms": stats.get("latency", {}).get("spans", {}),
+        "routes": stats.get("routes", {}),
+        "llm_cache": stats.get("llm_cache", {}),
+        "memory": {
+            "sessions": stats["sessions"]["sessions"],
+            "approx_bytes_per_session": stats["sessions"]["approx_bytes"] // max(1, stats["sessions"]["sessions"]),
+            "traced_bytes_per_session": traced // sessions if traced is not None else None,
+        },
+    }
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def pct(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Micro benchmarks (no HTTP, no agent loop)
+# ---------------------------------------------------------------------------
+def run_micro(app_main, repeat: int) -> Dict[str, float]:
+    from agent import tools as toolmod
+
+    catalog = app_main.catalog
+    names = [m.name for m in catalog.list(STORE)]
+    cases = {
+        "catalog.resolve": lambda i: catalog.resolve(STORE, names[i % len(names)]),
+        "catalog.match": lambda i: catalog.match(STORE, "불고기 버거 두 개 주세요"),
+        "catalog.filter": lambda i: catalog.filter(STORE, ["우유"], ["매운"]),
+        "tools.catalog_list": lambda i: toolmod.catalog_list(STORE, ["우유"]),
+        "tools.reviews": lambda i: toolmod.reviews(STORE, menu_names=names),
+        "tools.nutrition": lambda i: toolmod.nutrition(names[i % len(names)], STORE),
+        "agent.handle(fast path)": lambda i: app_main.agent.handle(f"micro-{i % 50}", "빅맥 하나 주세요", store=STORE),
+    }
+    out = {}
+    for label, fn in cases.items():
+        fn(0)  # 캐시/인덱스 워밍업
+        t0 = time.perf_counter()
+        for i in range(repeat):
+            fn(i)
+        out[label] = round((time.perf_counter() - t0) / repeat * 1e6, 2)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Report / baseline
+# ---------------------------------------------------------------------------
+def report(result: Dict[str, Any], llm: ScriptedLLM, web: FakeWeb) -> None:
+    cfg = result["config"]
+    print(f"users={cfg['users']} iterations={cfg['iterations']} stream={cfg['stream']} audio={cfg['audio']} "
+          f"fast_path={cfg['fast_path']} llm_latency={cfg['llm_latency']}s web_latency={cfg['web_latency']}s")
+    print(f"{result['turns']} turns ({result['orders']} orders) in {result['elapsed_s']:.2f}s "
+          f"-> {result['throughput_turns_s']:.1f} turns/s; fake LLM calls={llm.calls} web fetches={web.calls}")
+    print(f"{'endpoint':>16} {'count':>6} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)")
+    for ep, s in result["latency_ms"].items():
+        print(f"{ep:>16} {s['count']:>6} {s['mean']:>8.1f} {s['p50']:>8.1f} {s['p95']:>8.1f} {s['p99']:>8.1f} {s['max']:>8.1f}")
+    if result["errors"]:
+        print("errors:", result["errors"])
+    spans = sorted(result["spans_ms"].items(), key=lambda kv: -kv[1].get("p95_ms", 0))[:10]
+    if spans:
+        print("slowest spans (p50/p95 ms):", ", ".join(f"{k} {v['p50_ms']}/{v['p95_ms']}" for k, v in spans))
+    print("routes:", result["routes"])
+    cache = result.get("llm_cache") or {}
+    if cache.get("enabled"):
+        print(f"llm response cache: hits={cache['hits']} misses={cache['misses']} hit_rate={cache['hit_rate']}")
+    mem = result["memory"]
+    traced = f", tracemalloc {mem['traced_bytes_per_session']} B/session" if mem["traced_bytes_per_session"] else ""
+    print(f"memory: {mem['sessions']} resident sessions, ~{mem['approx_bytes_per_session']} B/session{traced}")
+    for label, us in (result.get("micro_us") or {}).items():
+        print(f"{label:>26}: {us:10.1f} us/call")
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Names of metrics that got slower than ``baseline * (1 + tolerance)``."""
+    worse = []
+    for ep, s in result["latency_ms"].items():
+        old = (baseline.get("latency_ms") or {}).get(ep, {}).get("p95")
+        if old and s.get("p95", 0) > old * (1 + tolerance):
+            worse.append(f"{ep} p95 {old} -> {s['p95']} ms")
+    for label, us in (result.get("micro_us") or {}).items():
+        old = (baseline.get("micro_us") or {}).get(label)
+        if old and us > old * (1 + tolerance):
+            worse.append(f"{label} {old} -> {us} us")
+    old_tp = baseline.get("throughput_turns_s")
+    if old_tp and result["throughput_turns_s"] < old_tp / (1 + tolerance):
+        worse.append(f"throughput {old_tp} -> {result['throughput_turns_s']} turns/s")
+    return worse
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay senior ordering scripts against the in-process app with fake backends")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=4, help="scripts each user replays")
+    parser.add_argument("--profiles", type=int, default=10, help="distinct userIds shared by the virtual users")
+    parser.add_argument("--stream", action="store_true", help="use the SSE route and time the first sentence")
+    parser.add_argument("--audio", action="store_true", help="send each utterance through /api/audio/transcribe first")
+    parser.add_argument("--stt", choices=("speech", "transcriber"), default="speech", help="which fake STT backend serves uploads")
+    parser.add_argument("--no-fast-path", dest="fast_path", action="store_false", help="send every turn to the LLM")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM seconds per call (mean)")
+    parser.add_argument("--llm-jitter", type=float, default=0.01)
+    parser.add_argument("--web-latency", type=float, default=0.02, help="fake DuckDuckGo seconds per request")
+    parser.add_argument("--stt-latency", type=float, default=0.01)
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between turns of one user (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--tracemalloc", action="store_true", help="also measure allocated bytes per session (slower)")
+    parser.add_argument("--micro", action="store_true", help="time MenuCatalog/tool calls directly as well")
+    parser.add_argument("--micro-repeat", type=int, default=2000)
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    parser.add_argument("--baseline", type=Path, help="compare against a saved --json run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="voice-bench-") as tmp:
+        app_main, llm, web = load_app(args, Path(tmp))
+        result = asyncio.run(run_load(app_main, args))
+        if args.micro:
+            result["micro_us"] = run_micro(app_main, args.micro_repeat)
+
+    report(result, llm, web)
+    if args.json:
+        args.json.write_text(json.dumps(result, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    if args.baseline:
+        worse = compare(result, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for line in worse:
+            print("REGRESSION:", line)
+        return 1 if worse else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
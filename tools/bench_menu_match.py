@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Microbenchmark: MenuMatcher.match latency against catalog size.
+
+Builds synthetic catalogs (the real store menu plus generated Korean names)
+and times typical kiosk utterances: exact names with fillers, aliases and
+STT typos.
+
+    python tools/bench_menu_match.py --sizes 50 200 1000 3000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi_app.matching import MenuMatcher  # noqa: E402
+from fastapi_app.menus import MenuItem  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+SYLLABLES = "가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우주추쿠투푸후"
+SUFFIXES = ["버거", "치킨", "세트", "라떼", "스무디", "파이", "샐러드", "랩", "M", "L"]
+UTTERANCES = [
+    "빅맥 하나 주세요",
+    "불고기 버거 두 개 주세요",
+    "감튀 하나요",
+    "콜라 큰 걸로 주세요",
+    "빅멕이요",
+    "맥스파이시 상하이 치킨으로 할게요",
+    "아이스 아메리카노 두 잔이요",
+    "상하이 스파이스 버거 주세요",
+]
+
+
+def catalog(size: int, seed: int) -> list:
+    base = json.loads((ROOT / "data" / "oxoban_menu.json").read_text(encoding="utf-8"))["menu"]
+    items = [MenuItem(name=m["name"]) for m in base]
+    rng = random.Random(seed)
+    while len(items) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        items.append(MenuItem(name=f"{word} {rng.choice(SUFFIXES)}"))
+    return items[:max(size, len(base))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time MenuMatcher.match on synthetic catalogs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000, 3000])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        items = catalog(size, args.seed)
+        t0 = time.perf_counter()
+        matcher = MenuMatcher(items)
+        build_ms = (time.perf_counter() - t0) * 1e3
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for text in UTTERANCES:
+                matcher.match(text)
+        per_call = (time.perf_counter() - t0) / (args.repeat * len(UTTERANCES)) * 1e3
+        print(f"items={len(items):>5}  build {build_ms:8.1f} ms  match {per_call:7.3f} ms/call")
+    top = MenuMatcher(catalog(args.sizes[-1], args.seed))
+    for text in UTTERANCES:
+        found = top.match(text, limit=1)
+        print(f"  {text!r:>24} -> {found[0].item.name if found else None} ({found[0].method if found else '-'})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Microbenchmark: recommendation scoring over large synthetic catalogs.
+
+Compares RecommendationEngine (feature arrays + argpartition top-k) with the
+previous per-item loop over a joined review blob, per store and across all
+stores.
+
+    python tools/bench_recommend.py --stores 50 --items 2000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi_app import recommendations  # noqa: E402
+from fastapi_app.menus import MenuCatalog, MenuItem  # noqa: E402
+from fastapi_app.recommendations import RecommendationEngine  # noqa: E402
+from fastapi_app.reviews import ReviewBundle, ReviewService  # noqa: E402
+
+TAGS = ["저염", "저당", "단백질", "부드러움", "식사", "국", "간식", "음료"]
+ALLERGENS = ["우유", "땅콩", "새우", "밀", "대두", "계란", "생선"]
+WORDS = ["죽", "정식", "구이", "국밥", "버거", "스프", "찌개", "볶음"]
+PROFILE = {
+    "allergies": ["땅콩", "새우"],
+    "dislikes": ["매운"],
+    "diseases": ["고혈압"],
+    "prefers": ["부드러움"],
+    "orders": {"favorites": [{"item": "전복죽 1", "count": 4}]},
+}
+
+
+def legacy_recommend(menus: MenuCatalog, reviews: ReviewService, store: str, profile, limit: int = 3):
+    """RecommendationEngine.recommend before it was vectorised (kept for comparison)."""
+    menu = menus.list(store)
+    allergies = {str(a) for a in profile.get("allergies", [])}
+    dislikes = {str(a) for a in profile.get("dislikes", [])}
+    filtered = [i for i in menu if not (allergies & set(i.allergens)) and not any(d in i.name for d in dislikes)]
+    filtered = filtered or list(menu)
+    bundle = reviews.get(store)
+    blob = " ".join(bundle.reviews + [bundle.summary])
+    scored = []
+    for item in filtered:
+        score = 0
+        if item.name and item.name in blob:
+            score += 2
+        if "부드럽" in blob and ("죽" in item.name or "스프" in item.name):
+            score += 1
+        if "담백" in blob and ("정식" in item.name or "구이" in item.name):
+            score += 1
+        scored.append((score, item))
+    scored.sort(key=lambda tup: tup[0], reverse=True)
+    return [itm for _, itm in scored[:limit]]
+
+
+def populate(stores: int, items: int, seed: int):
+    rnd = random.Random(seed)
+    menus, reviews = MenuCatalog(), ReviewService()
+    for s in range(stores):
+        store = f"매장{s}"
+        menu = [
+            MenuItem(
+                name=f"{'매운 ' if rnd.random() < 0.1 else ''}{rnd.choice(['전복', '소고기', '야채'])}{rnd.choice(WORDS)} {i}",
+                desc="부드럽고 담백한 메뉴",
+                price=rnd.randrange(3000, 20000, 500),
+                tags=rnd.sample(TAGS, 2),
+                allergens=rnd.sample(ALLERGENS, rnd.randint(0, 2)),
+            )
+            for i in range(items)
+        ]
+        menus.upsert(store, menu)
+        picks = rnd.sample(menu, min(40, len(menu)))
+        reviews.set(ReviewBundle(
+            store=store,
+            summary="부드럽고 담백한 메뉴가 많아요.",
+            reviews=[f"{m.name} {rnd.choice(['맛있어요', '별로였어요', '좋아요', '짜요'])}" for m in picks],
+        ))
+    return menus, reviews
+
+
+def timed(fn, repeat: int) -> float:
+    fn()  # 특징 테이블/캐시 워밍업
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time recommendation scoring on synthetic catalogs")
+    parser.add_argument("--stores", type=int, default=50)
+    parser.add_argument("--items", type=int, default=2000, help="menu items per store")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    menus, reviews = populate(args.stores, args.items, args.seed)
+    engine = RecommendationEngine(menus, reviews)
+    stores = menus.stores()
+    store = stores[0]
+    print(f"stores={args.stores} items/store={args.items} numpy={'yes' if recommendations.np is not None else 'no'}")
+
+    t0 = time.perf_counter()
+    for s in stores:
+        engine.scores(s)
+    print(f"{'feature build':>24}: {(time.perf_counter() - t0) / len(stores) * 1e3:8.2f} ms/store (once per menu version)")
+
+    legacy = timed(lambda: legacy_recommend(menus, reviews, store, PROFILE), args.repeat)
+    vector = timed(lambda: engine.recommend(store, PROFILE), args.repeat)
+    across = timed(lambda: engine.recommend_across(stores, PROFILE, limit=5), max(1, args.repeat // 20))
+    print(f"{'legacy loop':>24}: {legacy:8.1f} us/call")
+    print(f"{'engine, one store':>24}: {vector:8.1f} us/call  ({legacy / vector:.1f}x)")
+    print(f"{'engine, all stores':>24}: {across:8.1f} us/call  ({args.stores * args.items} items)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
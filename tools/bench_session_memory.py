@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Microbenchmark: resident memory of idle OrderSession objects.
+
+Compares the slotted OrderSession with the previous dataclass layout
+(one dict per utterance, unbounded list history) and extrapolates to 1M
+idle sessions.
+
+    python tools/bench_session_memory.py --sessions 200000 --turns 4
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi_app.state import ConversationStage, OrderSession  # noqa: E402
+
+
+@dataclass
+class LegacyOrderSession:
+    """Layout of OrderSession before it was slotted (kept here for comparison)."""
+
+    session_id: str
+    stage: ConversationStage = ConversationStage.NEED_STORE
+    store: str = ""
+    selected_menu: Optional[str] = None
+    quantity: Optional[int] = None
+    recommendations: List[str] = field(default_factory=list)
+    profile: Dict[str, object] = field(default_factory=dict)
+    last_agent_message: str = ""
+    history: List[Dict[str, str]] = field(default_factory=list)
+
+    def remember_agent(self, message: str) -> None:
+        self.last_agent_message = message
+        self.history.append({"role": "assistant", "message": message})
+
+    def remember_user(self, message: str) -> None:
+        self.history.append({"role": "user", "message": message})
+
+
+UTTERANCES = [
+    ("빅맥 하나 주세요", "빅맥으로 준비할게요. 몇 개 드릴까요?"),
+    ("두 개요", "제가 다시 말씀드릴게요. 빅맥 2개, 모두 1만 1천 원이에요. 이대로 주문할까요?"),
+    ("네 주문할게요", "주문을 접수해 두었어요. 결제는 모의 처리이니 안심하셔도 됩니다. 더 도와드릴까요?"),
+]
+PROFILE = {"ageGroup": "senior", "allergies": ["peanut"], "prefers": ["soft", "less_salt"], "dislikes": ["spicy"]}
+
+
+def populate(cls, n: int, turns: int, with_profile: bool) -> list:
+    sessions = []
+    for i in range(n):
+        s = cls(session_id=f"kiosk-{i:08d}")
+        # 실제 요청처럼 매장/메뉴명은 요청마다 새 문자열로 들어온다
+        s.store = "".join(["맥도날드", ""])
+        for t in range(turns):
+            user, agent = UTTERANCES[t % len(UTTERANCES)]
+            s.remember_user(user)
+            s.remember_agent(agent)
+        s.selected_menu = "".join(["빅", "맥"])
+        s.quantity = 2
+        s.stage = ConversationStage.AWAIT_CONFIRMATION
+        if with_profile:
+            s.profile.update(PROFILE)
+        sessions.append(s)
+    return sessions
+
+
+def measure(cls, n: int, turns: int, with_profile: bool) -> tuple:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    sessions = populate(cls, n, turns, with_profile)
+    elapsed = time.perf_counter() - t0
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return current / n, elapsed / n * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure memory per idle OrderSession")
+    parser.add_argument("--sessions", type=int, default=100_000, help="number of sessions to allocate")
+    parser.add_argument("--turns", type=int, default=4, help="user/agent turn pairs per session")
+    parser.add_argument("--no-profile", action="store_true", help="leave the profile empty")
+    args = parser.parse_args()
+
+    print(f"sessions={args.sessions} turns={args.turns} profile={not args.no_profile} "
+          f"history_limit={OrderSession.history_limit}")
+    rows = []
+    for label, cls in (("legacy dataclass", LegacyOrderSession), ("slotted OrderSession", OrderSession)):
+        per_session, build_us = measure(cls, args.sessions, args.turns, not args.no_profile)
+        rows.append(per_session)
+        print(f"{label:>22}: {per_session:8.0f} B/session  {per_session * 1e6 / 2**30:6.2f} GiB per 1M  "
+              f"{build_us:6.1f} us/session to build")
+    print(f"{'ratio':>22}: {rows[1] / rows[0]:.2f}x of legacy")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
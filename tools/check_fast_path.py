@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Check FastPathRouter decisions against a table of utterances.
+
+Each case is (stage, selected menu, utterance, expected intent or None).
+``None`` means the router must hand the turn to the LLM.
+
+    python tools/check_fast_path.py [--verbose]
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agent.core import FastPathRouter  # noqa: E402
+from fastapi_app.menus import MenuCatalog  # noqa: E402
+from fastapi_app.state import ConversationStage, OrderSession  # noqa: E402
+
+STORE = "맥도날드"
+CONFIRM = ConversationStage.AWAIT_CONFIRMATION
+QTY = ConversationStage.AWAIT_QUANTITY
+CHOICE = ConversationStage.AWAIT_MENU_CHOICE
+
+CASES: List[Tuple[ConversationStage, Optional[str], str, Optional[str]]] = [
+    # 짧은 확인만 주문으로
+    (CONFIRM, "빅맥", "네", "confirm"),
+    (CONFIRM, "빅맥", "네 주문할게요", "confirm"),
+    (CONFIRM, "빅맥", "좋아요", "confirm"),
+    (CONFIRM, "빅맥", "그렇게 해주세요", "confirm"),
+    (QTY, "빅맥", "주문할게요", "confirm"),
+    (QTY, "빅맥", "이대로 결제해 주세요", "confirm"),
+    # 확인 + 추가 요청은 LLM으로 (주문이 빠진 채 접수되면 안 됨)
+    (CONFIRM, "빅맥", "네 콜라도 하나 주세요", None),
+    (CONFIRM, "빅맥", "콜라도 같이 주문할게요", None),
+    (CONFIRM, "빅맥", "응 근데 감튀도", None),
+    (CONFIRM, "빅맥", "네 좋아요 그런데 콜라도 주세요", None),
+    (CONFIRM, "빅맥", "콜라도 하나 주세요", None),
+    (QTY, "빅맥", "치즈버거도 주문할게요", None),
+    # 빼기/더하기/세트/포장은 메뉴 선택이 아님: LLM으로 (수량도 버리지 않음)
+    (CHOICE, None, "빅맥 빼고", None),
+    (CHOICE, None, "빅맥 없이 주세요", None),
+    (CHOICE, None, "빅맥 말고", None),
+    (CHOICE, None, "빅맥 세트", None),
+    (CHOICE, None, "빅맥 하나 포장이요", None),
+    (CHOICE, None, "빅맥 매장에서 먹을게요", None),
+    (QTY, "빅맥", "콜라 하나 더 주세요", None),
+    (QTY, "빅맥", "콜라 추가요", None),
+    (QTY, "빅맥", "콜라도요", None),
+    (CHOICE, None, "빅맥 두 개랑 콜라", None),
+    # 수량
+    (QTY, "빅맥", "두 개요", "quantity"),
+    (QTY, "빅맥", "네 개요", "quantity"),
+    (QTY, "빅맥", "하나 더", "quantity"),
+    (CONFIRM, "빅맥", "하나 빼주세요", "quantity"),
+    # 메뉴 선택
+    (CHOICE, None, "빅맥 하나 주세요", "select"),
+    (CHOICE, None, "치즈버거로 할게요", "select"),
+    (CHOICE, None, "더블 불고기 버거 주세요", "select"),
+    (QTY, "빅맥", "하나 더 주세요", "quantity"),
+    # 질문/부정
+    (CONFIRM, "빅맥", "아니요", None),
+    (CHOICE, None, "뭐가 맛있어요?", None),
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="print every decision, not only mismatches")
+    args = parser.parse_args()
+
+    catalog = MenuCatalog()
+    catalog.bootstrap_from_file(Path(__file__).resolve().parents[1] / "data" / "oxoban_menu.json")
+    router = FastPathRouter(catalog)
+
+    failures = 0
+    for stage, menu, text, expected in CASES:
+        session = OrderSession(session_id="check")
+        session.store = STORE
+        session.stage = stage
+        session.selected_menu = menu
+        decision = router.route(session, text)
+        got = decision.intent if decision is not None else None
+        ok = got == expected
+        failures += not ok
+        if args.verbose or not ok:
+            print(f"{'ok ' if ok else 'BAD'} [{stage.value}] {text!r}: expected {expected}, got {decision}")
+    print(f"{len(CASES) - failures}/{len(CASES)} cases passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
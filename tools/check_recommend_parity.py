@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Check that the numpy and pure-Python recommendation paths agree.
+
+Runs ``top_k`` on tie-heavy random score arrays and ``recommend`` on the
+bundled catalog for a few profiles, once with numpy and once with the
+module's numpy handle removed. Exits 1 on the first disagreement.
+
+    python tools/check_recommend_parity.py [--trials 2000]
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi_app import recommendations  # noqa: E402
+from fastapi_app.menus import MenuCatalog  # noqa: E402
+from fastapi_app.nutrition import NutritionTable  # noqa: E402
+from fastapi_app.recommendations import RecommendationEngine, top_k  # noqa: E402
+from fastapi_app.reviews import ReviewService  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+STORE = "맥도날드"
+PROFILES = [
+    {},
+    {"allergies": ["우유"], "dislikes": ["빅맥"], "prefers": ["부드러운"], "diseases": ["당뇨"]},
+    {"allergies": ["밀", "대두"], "diseases": ["고혈압"]},
+    {"prefers": ["매운"], "dislikes": ["감자"]},
+]
+
+
+def recommend_all(limit: int) -> list:
+    catalog = MenuCatalog()
+    catalog.bootstrap_from_file(ROOT / "data" / "oxoban_menu.json")
+    engine = RecommendationEngine(catalog, ReviewService(), nutrition=NutritionTable(ROOT / "data" / "nutrition.json"))
+    return [[m.name for m in engine.recommend(STORE, profile, limit=limit)] for profile in PROFILES]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    numpy = recommendations.np
+    if numpy is None:
+        print("numpy is not installed; nothing to compare")
+        return 0
+
+    rng = random.Random(args.seed)
+    cases = []
+    for _ in range(args.trials):
+        n = rng.randint(1, 40)
+        # 점수 종류를 적게 두어 k번째 경계에 동점이 자주 생기게 한다
+        score = [rng.choice([0.0, 0.5, 1.0, 2.0, float("-inf")]) for _ in range(n)]
+        cases.append((score, rng.randint(1, n + 2)))
+    fast = [top_k(score, k) for score, k in cases]
+    fast_recs = {limit: recommend_all(limit) for limit in (3, 5, 8)}
+
+    recommendations.np = None
+    try:
+        slow = [top_k(score, k) for score, k in cases]
+        slow_recs = {limit: recommend_all(limit) for limit in (3, 5, 8)}
+    finally:
+        recommendations.np = numpy
+
+    failures = 0
+    for (score, k), a, b in zip(cases, fast, slow):
+        if a != b:
+            failures += 1
+            if failures <= 5:
+                print(f"BAD top_k(k={k}) {score}: numpy {a} vs python {b}")
+    for limit in fast_recs:
+        for profile, a, b in zip(PROFILES, fast_recs[limit], slow_recs[limit]):
+            if a != b:
+                failures += 1
+                print(f"BAD recommend(limit={limit}) {profile}: numpy {a} vs python {b}")
+    print(f"{args.trials} top_k cases, {len(PROFILES) * len(fast_recs)} recommend cases, {failures} mismatches")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
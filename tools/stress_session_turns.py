@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Stress test: concurrent turns on the same sessions must not lose updates.
+
+A fake LLM reads the quantity from the state block of the system prompt,
+sleeps (simulated latency) and answers with quantity + 1. If two turns of one
+session interleave they read the same quantity and one increment is lost.
+Turns are fired from coroutines (handle_async) and worker threads (handle)
+at the same time.
+
+    python tools/stress_session_turns.py --sessions 20 --turns 15
+    python tools/stress_session_turns.py --no-lock   # shows the race
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agent.core import VoiceOrderAgent  # noqa: E402
+from agent.memory import Memory  # noqa: E402
+from fastapi_app.menus import MenuCatalog, MenuItem  # noqa: E402
+from fastapi_app.state import ConversationStage, OrderSession  # noqa: E402
+
+STORE = "스트레스 매장"
+_QTY = re.compile(r"수량: (\d+)")
+
+
+class FakeLLM:
+    available = True
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def _answer(self, messages):
+        found = _QTY.search(messages[0]["content"])
+        qty = int(found.group(1)) if found else 0
+        body = {"speak": f"{qty + 1}개로 할게요.", "actions": [{"type": "SET_QTY", "value": qty + 1}]}
+        return {"role": "assistant", "content": json.dumps(body, ensure_ascii=False)}
+
+    def chat(self, messages, tools=None, tool_choice=None):
+        time.sleep(self.latency)
+        return self._answer(messages)
+
+    async def achat(self, messages, tools=None, tool_choice=None):
+        await asyncio.sleep(self.latency)
+        return self._answer(messages)
+
+
+def build(latency: float, lock: bool) -> VoiceOrderAgent:
+    catalog = MenuCatalog()
+    catalog.upsert(STORE, [MenuItem(name="국밥", desc="", price=9000)])
+    memory = Memory()
+    if not lock:
+        memory.lock = lambda session_id: contextlib.nullcontext()  # type: ignore[assignment]
+        memory.alock = lambda session_id: contextlib.AsyncExitStack()  # type: ignore[assignment]
+    agent = VoiceOrderAgent(menu_catalog=catalog, memory=memory, llm=FakeLLM(latency))
+    agent._tool_schemas = []  # 도구 없이 바로 최종 JSON
+    return agent
+
+
+async def run(args) -> int:
+    OrderSession.history_limit = 4 * args.turns + 4
+    agent = build(args.latency, lock=not args.no_lock)
+    ids = [f"stress-{i}" for i in range(args.sessions)]
+    for sid in ids:
+        session = agent.memory.get_session(sid)
+        session.store, session.selected_menu = STORE, "국밥"
+        session.stage = ConversationStage.AWAIT_QUANTITY
+
+    # 자연어가 빠른 경로에 걸리지 않도록 LLM으로 가는 문장을 사용
+    message = "음 그걸로 조금 더 생각해 볼게요"
+    thread_turns = args.turns // 3
+    async_turns = args.turns - thread_turns
+
+    def thread_worker(sid: str) -> None:
+        for _ in range(thread_turns):
+            agent.handle(sid, message, store=STORE)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=thread_worker, args=(sid,)) for sid in ids]
+    for t in threads:
+        t.start()
+    await asyncio.gather(*(agent.handle_async(sid, message, store=STORE) for sid in ids for _ in range(async_turns)))
+    await asyncio.to_thread(lambda: [t.join() for t in threads])
+    elapsed = time.perf_counter() - t0
+
+    lost = 0
+    for sid in ids:
+        session = agent.memory.get_session(sid)
+        if session.quantity != args.turns or len(session.history) != 2 * args.turns:
+            lost += 1
+            print(f"  {sid}: quantity={session.quantity} (want {args.turns}) history={len(session.history)}")
+    serial = args.sessions * args.turns * args.latency
+    print(f"sessions={args.sessions} turns/session={args.turns} ({async_turns} async + {thread_turns} thread) "
+          f"lock={'off' if args.no_lock else 'on'}")
+    print(f"elapsed {elapsed:.2f}s (fully serial would be {serial:.2f}s, per-session serial {args.turns * args.latency:.2f}s)")
+    print(f"sessions with lost/garbled turns: {lost}/{args.sessions}")
+    print("stats:", agent.memory.stats())
+    return 1 if lost else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fire concurrent turns at the agent and check per-session consistency")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=15, help="turns per session")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake LLM latency in seconds")
+    parser.add_argument("--no-lock", action="store_true", help="disable per-session locks to show the race")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())